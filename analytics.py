@@ -0,0 +1,100 @@
+"""Multi-month expense analytics on columnar arrays (NumPy optional)"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENGINE = "numpy" if np is not None else "python"
+
+# === COLUMNS ===
+
+def build_columns(transactions, start_month=None, end_month=None):
+    """Load transactions from the month range into columns
+
+    Dates become datetime64[D], amounts int64 grosze and categories
+    dictionary-encoded codes (index into the returned category list).
+    Without NumPy the columns are plain lists with ISO date strings.
+    """
+    categories = []
+    category_codes = {}
+    dates = []
+    amounts = []
+    codes = []
+    for t in transactions:
+        month = t["date"][:7]
+        if (start_month and month < start_month) or (end_month and month > end_month):
+            continue
+        code = category_codes.get(t["category"])
+        if code is None:
+            code = category_codes[t["category"]] = len(categories)
+            categories.append(t["category"])
+        dates.append(t["date"])
+        amounts.append(t["amount"])
+        codes.append(code)
+
+    if np is not None:
+        dates = np.array(dates, dtype="datetime64[D]")
+        amounts = np.array(amounts, dtype=np.int64)
+        codes = np.array(codes, dtype=np.int32)
+    return {"dates": dates, "amounts": amounts, "codes": codes, "categories": categories}
+
+def group_sum(keys, amounts, size):
+    """Sum amounts per dense non-negative integer key, result has at least size elements
+
+    Float64 bincount is exact for totals below 2**53 grosze.
+    """
+    return np.bincount(keys, weights=amounts, minlength=size).astype(np.int64)
+
+# === ANALYSIS ===
+
+def month_category_totals(columns):
+    """Sum expenses per month and category: {month: {category: grosze}}"""
+    categories = columns["categories"]
+    if not categories:
+        return {}
+
+    result = {}
+    if np is None:
+        for date_str, amount, code in zip(columns["dates"], columns["amounts"], columns["codes"]):
+            month = result.setdefault(date_str[:7], {})
+            month[categories[code]] = month.get(categories[code], 0) + amount
+        return dict(sorted(result.items()))
+
+    months = columns["dates"].astype("datetime64[M]").astype(np.int64)
+    first_month = months.min()
+    keys = (months - first_month) * len(categories) + columns["codes"]
+    sums = group_sum(keys, columns["amounts"], 0)
+    # Amounts are always positive, so empty groups are exactly the zero sums
+    for key in np.flatnonzero(sums).tolist():
+        month = str(np.datetime64(int(first_month + key // len(categories)), "M"))
+        result.setdefault(month, {})[categories[key % len(categories)]] = int(sums[key])
+    return result
+
+def daily_totals(columns):
+    """Sum expenses per day: {YYYY-MM-DD: grosze} sorted by date"""
+    if np is None:
+        result = {}
+        for date_str, amount in zip(columns["dates"], columns["amounts"]):
+            result[date_str] = result.get(date_str, 0) + amount
+        return dict(sorted(result.items()))
+
+    if len(columns["dates"]) == 0:
+        return {}
+    days = columns["dates"].astype(np.int64)
+    first_day = days.min()
+    sums = group_sum(days - first_day, columns["amounts"], 0)
+    return {str(np.datetime64(int(first_day + day), "D")): int(sums[day]) for day in np.flatnonzero(sums).tolist()}
+
+def top_categories(columns, limit):
+    """Get categories with the highest expenses: [(category, grosze)]"""
+    categories = columns["categories"]
+    totals = [0] * len(categories)
+    if np is None:
+        for amount, code in zip(columns["amounts"], columns["codes"]):
+            totals[code] += amount
+    else:
+        totals = group_sum(columns["codes"], columns["amounts"], len(categories)).tolist()
+
+    ranked = sorted(zip(categories, totals), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit]
@@ -0,0 +1,91 @@
+"""Compressed, read-only archives of the entries of closed years"""
+import json
+import os
+import sys
+
+from budget_core import (ARCHIVE_DIR, backup_file, commit_change, entry_json, profiled, to_entries,
+                         write_atomic)
+
+# === ARCHIVE ===
+
+ARCHIVED_KEYS = ("transactions", "one_time_income")
+
+def archive_path(year):
+    """Get path of the compressed archive of a year"""
+    return os.path.join(ARCHIVE_DIR, f"{year}.json.gz")
+
+@profiled("archive_read")
+def read_archive(data, year):
+    """Get {key: entries} of an archived year, read once per loaded data"""
+    cache = data.setdefault("_archive", {})
+    if year not in cache:
+        import gzip
+
+        path = archive_path(year)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                cache[year] = to_entries(json.load(f))
+        except (OSError, EOFError, json.JSONDecodeError):
+            print(f"BŁĄD: Nie można odczytać archiwum roku {year} ({path}).")
+            print(f"Przywróć plik z kopii zapasowej: {path}.bak")
+            sys.exit(1)
+    return cache[year]
+
+@profiled("archive_write")
+def write_archive(year, entries):
+    """Write {key: entries} of a year as a gzip-compressed JSON archive"""
+    import gzip
+
+    path = archive_path(year)
+    content = gzip.compress(json.dumps(entries, default=entry_json).encode('utf-8'))
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    if os.path.exists(path):
+        backup_file(path)
+    write_atomic(path, lambda f: f.write(content))
+
+def archive_year(data, year):
+    """Move transactions and income of a year to its archive, return {key: number moved}
+
+    Aggregates are kept as they are, so balances, limits and reports still
+    cover the year. Entries added to an already archived year are merged
+    into its archive.
+    """
+    archived = data.get("archived_years", [])
+    stored = read_archive(data, year) if year in archived else {key: [] for key in ARCHIVED_KEYS}
+
+    moved = {}
+    entries = {}
+    for key in ARCHIVED_KEYS:
+        items = [item for item in data[key] if item is not None and item["date"][:4] == year]
+        moved[key] = len(items)
+        entries[key] = sorted(stored[key] + items, key=lambda item: item["id"])
+    if not any(moved.values()):
+        return moved
+
+    # The archive is written first: until the data file lists the year, it is ignored
+    write_archive(year, entries)
+    data.setdefault("_archive", {})[year] = entries
+    for key in ARCHIVED_KEYS:
+        kept = [item for item in data[key] if item is not None and item["date"][:4] != year]
+        commit_change(data, {"op": "set", "key": key, "value": kept})
+    commit_change(data, {"op": "set", "key": "archived_years", "value": sorted(set(archived) | {year})})
+    # Whole lists were replaced, which only a full write can store
+    data["_needs_snapshot"] = True
+    return moved
+
+def unarchive_year(data, year):
+    """Move entries of an archived year back to the data lists, return {key: number moved}
+
+    The archive file is left for the caller to remove once data is saved.
+    """
+    stored = read_archive(data, year)
+    moved = {}
+    for key in ARCHIVED_KEYS:
+        merged = sorted([item for item in data[key] if item is not None] + stored[key], key=lambda item: item["id"])
+        moved[key] = len(stored[key])
+        commit_change(data, {"op": "set", "key": key, "value": merged})
+    commit_change(data, {"op": "set", "key": "archived_years",
+                         "value": [y for y in data["archived_years"] if y != year]})
+    data["_needs_snapshot"] = True
+    data["_archive"].pop(year, None)
+    return moved
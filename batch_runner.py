@@ -0,0 +1,153 @@
+"""Running many commands on data loaded and saved once (batch)"""
+import json
+import sys
+
+import budget_core
+from budget_core import (COMMANDS, build_parser, find_command, has_pending_changes, load_data,
+                         run_command, save_data)
+
+# === BATCH ===
+
+# Commands that manage the storage or a server themselves
+BATCH_EXCLUDED = ('batch', 'serve', 'api', 'compact', 'migrate-sqlite', 'migrate-partitioned',
+                  'migrate-binary', 'export-json', 'archive', 'unarchive')
+
+def read_batch_input(file_name):
+    """Read batch lines from a file, or from stdin for '-'"""
+    if file_name == '-':
+        return sys.stdin.read().splitlines()
+    try:
+        with open(file_name, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except OSError as e:
+        print(f"BŁĄD: Nie można odczytać pliku {file_name}: {e.strerror}")
+        sys.exit(1)
+
+def parse_batch_line(line):
+    """Convert a batch line to CLI arguments - command text, JSON list or JSON object"""
+    import shlex
+
+    text = line.strip()
+    if not text.startswith(('[', '{')):
+        try:
+            return shlex.split(text)
+        except ValueError:
+            raise ValueError("niezamknięty cudzysłów") from None
+
+    try:
+        record = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"nieprawidłowy JSON ({e.msg})") from None
+    if isinstance(record, dict):
+        return record_to_argv(record)
+    if not isinstance(record, list) or not all(isinstance(arg, str) for arg in record):
+        raise ValueError("lista JSON może zawierać tylko napisy")
+    return record
+
+def record_to_argv(record):
+    """Convert {"command": ..., field: value} to CLI arguments of the command
+
+    Fields are named like the options (amount, date, from) or their
+    destinations (transaction_id, from_month).
+    """
+    fields = dict(record)
+    command = fields.pop("command", None)
+    if command not in COMMANDS:
+        raise ValueError(f"nieznana komenda: {command}")
+
+    argv = [command]
+    for flags, options in COMMANDS[command][1]:
+        name = flags[0].lstrip('-')
+        key = next((k for k in (options.get('dest'), name.replace('-', '_'), name) if k in fields), None)
+        if key is None:
+            continue
+        value = fields.pop(key)
+        if not flags[0].startswith('-'):
+            # A list fills a positional taking many values (search terms)
+            argv.extend(str(v) for v in (value if isinstance(value, list) else [value]))
+        elif options.get('action') == 'store_true':
+            if value:
+                argv.append(flags[0])
+        elif value is not None:
+            # --option=value keeps values starting with '-' from being read as options
+            argv.append(f"{flags[0]}={value}")
+    if fields:
+        raise ValueError(f"nieznane pola: {', '.join(sorted(fields))}")
+    return argv
+
+def run_batch_line(line):
+    """Run one batch line on the batch data, return (command, exit code, printed output)"""
+    import contextlib
+    import io
+    import traceback
+
+    output = io.StringIO()
+    command = None
+    code = 0
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            argv = parse_batch_line(line)
+            command = find_command(argv)
+            if command in BATCH_EXCLUDED:
+                raise ValueError(f"komendy {command} nie można użyć w paczce")
+        except ValueError as e:
+            print(f"BŁĄD: Nieprawidłowa linia: {e}")
+            return command, 2, output.getvalue()
+        try:
+            run_command(build_parser(argv).parse_args(argv))
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code)
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return command, code, output.getvalue()
+
+def run_batch(lines, data_file, atomic=False):
+    """Run commands from lines on data loaded once and save all their changes at once
+
+    A failing line is reported and skipped - its validation stops it before
+    any change. With atomic=True the first failure discards the whole batch.
+    A line failing after it changed data discards the batch in both modes.
+    Returns (results, line number that stopped the batch or None, saved).
+    """
+    data = load_data(data_file, defer_save=True)
+    budget_core.BATCH = {"path": data_file, "data": data}
+    results = []
+    stopped = None
+    try:
+        for number, line in enumerate(lines, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            changes = len(data.get("_changes", []))
+            command, code, output = run_batch_line(line)
+            results.append({"line": number, "command": command, "code": code, "output": output})
+            if code != 0 and (atomic or len(data.get("_changes", [])) != changes):
+                stopped = number
+                break
+    finally:
+        budget_core.BATCH = None
+
+    saved = stopped is None and has_pending_changes(data)
+    if saved:
+        save_data(data, data_file)
+    return results, stopped, saved
+
+def format_batch_results(results, stopped, saved):
+    """Format per-line results of a batch with a summary"""
+    lines = []
+    for result in results:
+        status = "OK" if result["code"] == 0 else f"BŁĄD (kod {result['code']})"
+        lines.append(f"Linia {result['line']} ({result['command'] or '?'}): {status}")
+        lines.extend(f"  {text}" if text else "" for text in result["output"].splitlines())
+
+    succeeded = sum(1 for result in results if result["code"] == 0)
+    lines.append(f"Wykonano {succeeded} z {len(results)} komend")
+    if stopped is not None:
+        lines.append(f"Przerwano na linii {stopped} - żadna zmiana z paczki nie została zapisana")
+    elif saved:
+        lines.append("Zmiany zapisano jednym zapisem")
+    else:
+        lines.append("Brak zmian do zapisania")
+    return "\n".join(lines)
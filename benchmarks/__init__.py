@@ -0,0 +1 @@
+"""Benchmarks and synthetic data generator for budget.py"""
@@ -0,0 +1,78 @@
+"""Burst of concurrent POST requests to the HTTP API (api)
+
+Sends the requests from parallel threads, then stops the server and checks
+that every transaction was saved. Compares the burst time with one direct
+`budget.py add`, which pays for a full load and save each time.
+
+Usage: python benchmarks/api_burst.py [transaction count] [requests] [threads]
+"""
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+def free_port():
+    """Get a free local TCP port"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def post_transaction(port, number):
+    """Add one transaction through the API, return the HTTP status"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    body = json.dumps({"amount": "10.00", "category": "Jedzenie", "description": f"Seria {number}"})
+    conn.request("POST", "/transactions", body, {"Content-Type": "application/json"})
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    with tempfile.TemporaryDirectory() as workdir:
+        data = generate_data(count)
+        write_data(data, Path(workdir) / budget_core.DATA_FILE)
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, BUDGET_PY, "add", "--amount", "1", "--category", "Jedzenie",
+                        "--description", "Pojedynczy"], cwd=workdir, capture_output=True, check=True)
+        single = time.perf_counter() - start
+
+        port = free_port()
+        server = subprocess.Popen([sys.executable, BUDGET_PY, "api", "--port", str(port)], cwd=workdir,
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                statuses = list(pool.map(lambda number: post_transaction(port, number), range(requests)))
+            burst = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+        saved = budget_core.read_json_data(str(Path(workdir) / budget_core.DATA_FILE))
+        added = sum(1 for t in saved["transactions"] if t["description"].startswith("Seria "))
+
+    print(f"Transakcje w pliku: {count}, żądania: {requests}, wątki: {threads}")
+    print(f"Pojedyncze budget.py add: {single * 1000:.0f} ms")
+    print(f"Seria przez API: {burst * 1000:.0f} ms ({burst * 1000 / requests:.1f} ms na żądanie)")
+    print(f"Odpowiedzi 201: {statuses.count(201)}/{requests}, zapisane w pliku: {added}/{requests}")
+    sys.exit(0 if added == requests and statuses.count(201) == requests else 1)
+
+if __name__ == "__main__":
+    main()
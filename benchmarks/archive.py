@@ -0,0 +1,89 @@
+"""Archiving closed years: data file size and command times before and after
+
+Generates a data file, times `budget.py add`, `status` and `report` on it,
+then moves every closed year to data/archive with `budget.py archive` and
+times the same commands again. Reports of the current year and of an
+archived year must print the same before and after.
+
+Usage: python benchmarks/archive.py [transaction count] [years]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+def run_cli(workdir, args, repeat=5):
+    """Run budget.py in workdir repeat times, return (median wall ms, last stdout)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, BUDGET_PY] + args, cwd=workdir, capture_output=True,
+                                text=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result.stdout
+
+def measure(workdir, reports):
+    """Get {command: ms}"""
+    times = {}
+    times["add"], _ = run_cli(workdir, ["add", "--amount", "12.50", "--category", "Jedzenie",
+                                        "--description", "Pomiar"])
+    times["status"], _ = run_cli(workdir, ["status"])
+    for args in reports:
+        times[" ".join(args)], _ = run_cli(workdir, args)
+    return times
+
+def report_outputs(workdir, reports):
+    """Get the printed reports"""
+    return [run_cli(workdir, args, repeat=1)[1] for args in reports]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    data = generate_data(count, years=years)
+    current_year = budget_core.get_current_month()[:4]
+    closed = sorted({t["date"][:4] for t in data["transactions"]} - {current_year})
+    reports = [["report", "--from", f"{current_year}-01"], ["report", "--from", f"{closed[-1]}-01",
+                                                             "--to", f"{closed[-1]}-12"]]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = Path(workdir) / budget_core.DATA_FILE
+        write_data(data, data_path)
+        size_before = data_path.stat().st_size
+        before = measure(workdir, reports)
+        before_outputs = report_outputs(workdir, reports)
+
+        start = time.perf_counter()
+        for year in closed:
+            subprocess.run([sys.executable, BUDGET_PY, "archive", "--year", year], cwd=workdir,
+                           capture_output=True, check=True)
+        archive_s = time.perf_counter() - start
+        size_after = data_path.stat().st_size
+        archive_dir = Path(workdir) / budget_core.ARCHIVE_DIR
+        archive_size = sum(os.path.getsize(path) for path in archive_dir.iterdir())
+
+        after_outputs = report_outputs(workdir, reports)
+        after = measure(workdir, reports)
+
+    same = before_outputs == after_outputs
+    print(f"Transakcje: {count}, lata: {years}, zarchiwizowane: {', '.join(closed)} ({archive_s:.1f} s)")
+    print(f"Plik danych: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB, "
+          f"archiwa gzip razem: {archive_size / 1e6:.1f} MB")
+    print(f"{'Komenda':<36} {'przed':>10} {'po':>10}")
+    for command in before:
+        print(f"{command:<36} {before[command]:>7.0f} ms {after[command]:>7.0f} ms")
+    print(f"Te same raporty przed i po archiwizacji: {'tak' if same else 'NIE'}")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
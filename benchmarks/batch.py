@@ -0,0 +1,77 @@
+"""Scripted workflow: many separate commands against one batch
+
+Runs the same list of add / income-add / edit / delete commands once as
+separate `budget.py` calls and once as `budget.py batch`, then checks that
+both leave the same transactions and income in the file.
+
+Usage: python benchmarks/batch.py [transaction count] [commands]
+"""
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+def workflow(data, count):
+    """Get count command lines mixing adds, income, edits and deletes of existing entries"""
+    transactions = data["transactions"]
+    lines = []
+    for n in range(count):
+        kind = n % 4
+        if kind == 0:
+            lines.append(f'add --amount {n % 90 + 10}.25 --category Jedzenie --description "Paczka {n}"')
+        elif kind == 1:
+            lines.append(f'income-add --amount {n % 50 + 100} --description "Zwrot {n}"')
+        elif kind == 2:
+            lines.append(f"edit {transactions[n]['id']} --amount {n % 70 + 5}")
+        else:
+            lines.append(f"delete {transactions[n]['id']}")
+    return lines
+
+def entries(workdir):
+    """Read transactions and one-time income saved in workdir"""
+    saved = budget_core.read_json_data(str(Path(workdir) / budget_core.DATA_FILE))
+    strip = lambda items: sorted((i["date"], i["amount"], i["description"]) for i in items if i is not None)
+    return strip(saved["transactions"]), strip(saved["one_time_income"])
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    commands = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    data = generate_data(count)
+    lines = workflow(data, commands)
+
+    with tempfile.TemporaryDirectory() as separate, tempfile.TemporaryDirectory() as batched:
+        write_data(data, Path(separate) / budget_core.DATA_FILE)
+        shutil.copytree(Path(separate) / "data", Path(batched) / "data", dirs_exist_ok=True)
+
+        start = time.perf_counter()
+        for line in lines:
+            subprocess.run([sys.executable, BUDGET_PY] + shlex.split(line), cwd=separate,
+                           capture_output=True, check=True)
+        separate_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, BUDGET_PY, "batch", "--atomic"], cwd=batched, input="\n".join(lines),
+                       capture_output=True, text=True, check=True)
+        batched_s = time.perf_counter() - start
+
+        same = entries(separate) == entries(batched)
+
+    print(f"Transakcje: {count}, komendy: {commands}")
+    print(f"Osobne wywołania: {separate_s * 1000:.0f} ms ({separate_s * 1000 / commands:.0f} ms na komendę)")
+    print(f"budget.py batch:  {batched_s * 1000:.0f} ms ({separate_s / batched_s:.1f}x szybciej)")
+    print(f"Te same dane po obu wariantach: {'tak' if same else 'NIE'}")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
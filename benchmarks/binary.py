@@ -0,0 +1,91 @@
+"""Binary record file against data.json
+
+Generates a data file, converts it with `budget.py migrate-binary` and
+compares file sizes, full reads, reading one month (the binary file bisects
+the date-sorted records through mmap and unpacks only that month) and the
+wall time of a few commands. Finally converts back with `export-json`:
+the entries must be the same as in the original file.
+
+Usage: python benchmarks/binary.py [transaction count]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import binary_storage
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+def timed(func, repeat=3):
+    """Get (median ms, result) of func()"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+def run_cli(workdir, args, repeat=3):
+    """Run budget.py in workdir, return median wall ms"""
+    return timed(lambda: subprocess.run([sys.executable, BUDGET_PY] + args, cwd=workdir,
+                                        capture_output=True, check=True), repeat)[0]
+
+def month_totals(data, month_str):
+    """Get (income, expenses) of a month from its loaded entries"""
+    start, end = budget_core.month_range(month_str)
+    return (budget_core.calculate_total(i for i in data["one_time_income"] if start <= i["date"] < end),
+            budget_core.calculate_total(t for t in data["transactions"] if start <= t["date"] < end))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    data = generate_data(count)
+    month = budget_core.previous_month(budget_core.get_current_month())
+    commands = {"status": ["status"], f"transactions --month {month}": ["transactions", "--month", month],
+                "add": ["add", "--amount", "12.50", "--category", "Jedzenie", "--description", "Pomiar"]}
+
+    with tempfile.TemporaryDirectory() as json_dir, tempfile.TemporaryDirectory() as binary_dir:
+        write_data(data, Path(json_dir) / budget_core.DATA_FILE)
+        shutil.copytree(Path(json_dir) / "data", Path(binary_dir) / "data", dirs_exist_ok=True)
+        subprocess.run([sys.executable, BUDGET_PY, "migrate-binary"], cwd=binary_dir, capture_output=True, check=True)
+        json_path = Path(json_dir) / budget_core.DATA_FILE
+        binary_path = Path(binary_dir) / budget_core.BINARY_FILE
+        sizes = (os.path.getsize(json_path), os.path.getsize(binary_path))
+
+        json_full, from_json = timed(lambda: budget_core.read_json_data(str(json_path)))
+        binary_full, from_binary = timed(lambda: binary_storage.read_binary_data(str(binary_path)))
+        same_read = all(from_json[key] == from_binary[key] for key in binary_storage.BINARY_KEYS)
+        json_month, json_totals = timed(lambda: month_totals(budget_core.read_json_data(str(json_path)), month))
+        binary_month, binary_totals = timed(
+            lambda: month_totals(binary_storage.read_binary_data(str(binary_path), months=[month]), month))
+
+        cli = {label: (run_cli(json_dir, args), run_cli(binary_dir, args)) for label, args in commands.items()}
+
+        subprocess.run([sys.executable, BUDGET_PY, "export-json"], cwd=binary_dir, capture_output=True, check=True)
+        exported = budget_core.read_json_data(str(Path(binary_dir) / budget_core.DATA_FILE))
+        expected = budget_core.read_json_data(str(json_path))
+        same_export = all(exported[key] == expected[key] for key in binary_storage.BINARY_KEYS)
+
+    same = same_read and json_totals == binary_totals and same_export
+    print(f"Transakcje: {count}")
+    print(f"Rozmiar: data.json {sizes[0] / 1e6:.1f} MB, data.bin {sizes[1] / 1e6:.1f} MB "
+          f"({sizes[0] / sizes[1]:.1f}x mniej)")
+    print(f"{'Pomiar':<36} {'JSON':>10} {'binarny':>10}")
+    print(f"{'odczyt całości':<36} {json_full:>7.0f} ms {binary_full:>7.0f} ms")
+    print(f"{'sumy miesiąca ' + month:<36} {json_month:>7.0f} ms {binary_month:>7.0f} ms")
+    for command, (json_ms, binary_ms) in cli.items():
+        print(f"{'budget.py ' + command:<36} {json_ms:>7.0f} ms {binary_ms:>7.0f} ms")
+    print(f"Te same wpisy i sumy, także po export-json: {'tak' if same else 'NIE'}")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare two benchmark result files written by run.py
+
+Usage: python benchmarks/compare.py OLD.json NEW.json [--threshold 10]
+"""
+import argparse
+import json
+
+def load_results(path):
+    """Read results keyed by (size, kind, name)"""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return report, {(r["size"], r["kind"], r["name"]): r for r in report["results"]}
+
+def change(old, new):
+    """Relative change in percent, None when the old value is zero"""
+    return (new - old) / old * 100 if old else None
+
+def format_change(value, threshold):
+    """Format a change, marking the ones above the threshold"""
+    if value is None:
+        return "-"
+    mark = " !" if value > threshold else ""
+    return f"{value:+.1f}%{mark}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównaj dwa pliki wyników benchmarków")
+    parser.add_argument("old", help="Wyniki bazowe")
+    parser.add_argument("new", help="Nowe wyniki")
+    parser.add_argument("--threshold", type=float, default=10, help="Próg oznaczenia regresji w %% (domyślnie 10)")
+    args = parser.parse_args()
+
+    old_report, old = load_results(args.old)
+    new_report, new = load_results(args.new)
+    print(f"Bazowe: {old_report.get('commit') or '?'}  Nowe: {new_report.get('commit') or '?'}")
+    print(f"{'Rozmiar':>9} {'Rodzaj':<8} {'Nazwa':<36} {'Czas przed':>11} {'Czas po':>10} {'Zmiana':>9} {'Pamięć':>9}")
+    for key in sorted(old.keys() & new.keys()):
+        size, kind, name = key
+        before, after = old[key], new[key]
+        time_change = change(before["median_ms"], after["median_ms"])
+        memory_change = change(before["peak_kb"], after["peak_kb"])
+        print(f"{size:>9} {kind:<8} {name:<36} {before['median_ms']:>11.2f} {after['median_ms']:>10.2f} "
+              f"{format_change(time_change, args.threshold):>9} {format_change(memory_change, args.threshold):>9}")
+    only_old = len(old.keys() - new.keys())
+    only_new = len(new.keys() - old.keys())
+    if only_old or only_new:
+        print(f"Pominięte pomiary: tylko w bazowych {only_old}, tylko w nowych {only_new}")
+
+if __name__ == "__main__":
+    main()
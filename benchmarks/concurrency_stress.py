@@ -0,0 +1,153 @@
+"""Concurrent writers against one data file: no transaction may be lost
+
+Starts many `budget.py add` / `income-add` processes at once, optionally
+together with POST requests to a running HTTP API (api), then checks that
+every transaction and income entry is in the file exactly once, that IDs are
+unique and that the aggregates match the entries. Also checks that a writer
+whose data went stale in between is rejected by the generation counter.
+Exits with status 1 when anything is lost or duplicated.
+
+Usage: python benchmarks/concurrency_stress.py [--processes 8] [--per-process 5]
+           [--api-requests 50] [--storage json|sqlite|partitioned|binary] [--journal]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+MIGRATIONS = {"sqlite": "migrate-sqlite", "partitioned": "migrate-partitioned", "binary": "migrate-binary"}
+
+def free_port():
+    """Get a free local TCP port"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def run_writer(workdir, env, worker, count):
+    """Add count expenses and one income entry from a single process chain, return failed calls"""
+    failures = []
+    calls = [["add", "--amount", "1.00", "--category", "Jedzenie", "--description", f"Stres {worker}-{n}"]
+             for n in range(count)]
+    calls.append(["income-add", "--amount", "2.00", "--description", f"Stres {worker}"])
+    for argv in calls:
+        result = subprocess.run([sys.executable, BUDGET_PY] + argv, cwd=workdir, env=env,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            failures.append((argv, result.stdout + result.stderr))
+    return failures
+
+def post_transaction(port, number):
+    """Add one expense through the API, return the HTTP status"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    body = json.dumps({"amount": "1.00", "category": "Jedzenie", "description": f"Stres API {number}"})
+    conn.request("POST", "/transactions", body, {"Content-Type": "application/json"})
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+def check_stale_writer(workdir, env):
+    """Load data, let another process save, then try to save the stale copy - it must be rejected"""
+    path = budget_core.resolve_data_file()
+    data = budget_core.load_data(path)
+    budget_core.add_transaction(data, 100, "Jedzenie", "Przestarzały zapis", "2025-01-01")
+    subprocess.run([sys.executable, BUDGET_PY, "set-limit", "4000"], cwd=workdir, env=env,
+                   capture_output=True, check=True)
+    try:
+        budget_core.save_data(data, path)
+    except budget_core.StaleDataError:
+        return True
+    finally:
+        if "_sqlite" in data:
+            data["_sqlite"].close()
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Test równoległych zapisów do jednego pliku danych")
+    parser.add_argument("--processes", type=int, default=8, help="Równoległe łańcuchy procesów (domyślnie 8)")
+    parser.add_argument("--per-process", type=int, default=5, help="Wydatki dodawane przez jeden łańcuch (domyślnie 5)")
+    parser.add_argument("--api-requests", type=int, default=50, help="Równoległe żądania POST do API (0 = bez API)")
+    parser.add_argument("--transactions", type=int, default=2000, help="Transakcje w pliku na starcie (domyślnie 2000)")
+    parser.add_argument("--storage", choices=["json", "sqlite", "partitioned", "binary"], default="json")
+    parser.add_argument("--journal", action="store_true", help="Zapis przez dziennik zmian (BUDGET_JOURNAL=1)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, BUDGET_JOURNAL="1" if args.journal else "0")
+    with tempfile.TemporaryDirectory() as workdir:
+        write_data(generate_data(args.transactions, years=2), Path(workdir) / budget_core.DATA_FILE)
+        if args.storage in MIGRATIONS:
+            subprocess.run([sys.executable, BUDGET_PY, MIGRATIONS[args.storage]], cwd=workdir, env=env,
+                           capture_output=True, check=True)
+
+        server = None
+        if args.api_requests:
+            port = free_port()
+            server = subprocess.Popen([sys.executable, BUDGET_PY, "api", "--port", str(port)], cwd=workdir,
+                                      env=env, stdout=subprocess.PIPE, text=True)
+            server.stdout.readline()
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(args.processes + min(args.api_requests, 20)) as pool:
+                writers = [pool.submit(run_writer, workdir, env, worker, args.per_process)
+                           for worker in range(args.processes)]
+                posts = [pool.submit(post_transaction, port, number) for number in range(args.api_requests)]
+                failures = [failure for writer in writers for failure in writer.result()]
+                statuses = [post.result() for post in posts]
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+        elapsed = time.perf_counter() - start
+
+        # Paths in budget_core are relative to the working directory
+        os.chdir(workdir)
+        os.environ["BUDGET_JOURNAL"] = env["BUDGET_JOURNAL"]
+        data = budget_core.load_data(budget_core.resolve_data_file())
+        expenses = [t for t in data["transactions"] if t["description"].startswith("Stres ")]
+        income = [i for i in data["one_time_income"] if i["description"].startswith("Stres ")]
+        transaction_ids = [t["id"] for t in data["transactions"]]
+        income_ids = [i["id"] for i in data["one_time_income"]]
+        drifts = budget_core.verify_aggregates(data)
+        if "_sqlite" in data:
+            data["_sqlite"].close()
+        stale_rejected = check_stale_writer(workdir, env)
+        os.chdir(ROOT)
+
+    expected_expenses = args.processes * args.per_process + statuses.count(201)
+    descriptions = [t["description"] for t in expenses] + [i["description"] for i in income]
+    duplicates = len(descriptions) - len(set(descriptions))
+    lost = expected_expenses - len(expenses) + args.processes - len(income)
+    unique_ids = len(transaction_ids) == len(set(transaction_ids)) and len(income_ids) == len(set(income_ids))
+
+    print(f"Magazyn: {args.storage}{' + dziennik' if args.journal else ''}, "
+          f"procesy: {args.processes} x {args.per_process + 1} komend, żądania API: {args.api_requests}")
+    print(f"Czas: {elapsed:.1f} s")
+    print(f"Nieudane komendy: {len(failures)}, odpowiedzi API 201: {statuses.count(201)}/{args.api_requests}")
+    print(f"Wydatki w pliku: {len(expenses)}/{expected_expenses}, przychody: {len(income)}/{args.processes}")
+    print(f"Utracone: {lost}, zduplikowane: {duplicates}, unikalne ID: {'tak' if unique_ids else 'NIE'}, "
+          f"rozbieżności agregatów: {len(drifts)}")
+    print(f"Przestarzały zapis odrzucony: {'tak' if stale_rejected else 'NIE'}")
+    for argv, output in failures[:5]:
+        print(f"  {' '.join(argv)}: {output.strip()}")
+
+    ok = (not failures and statuses.count(201) == args.api_requests and lost == 0 and duplicates == 0
+          and unique_ids and not drifts and stale_rejected)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
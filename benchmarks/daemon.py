@@ -0,0 +1,93 @@
+"""Latency of commands served by the daemon (serve) against direct runs
+
+Measures the socket round trip of a request to the daemon, the whole
+`budget.py <cmd>` call forwarded by the client and the direct call without
+a daemon. Exits with status 1 when a status request to the daemon is not
+answered within the target.
+
+Usage: python benchmarks/daemon.py [transaction count] [target ms]
+"""
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+import server
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+RUNS = 20
+
+# Median socket round trip of a status request
+TARGET_MS = 10
+
+COMMANDS = [
+    ["status"],
+    ["balance"],
+    ["list"],
+    ["transactions"],
+    ["add", "--amount", "1", "--category", "Jedzenie", "--description", "Test"],
+]
+
+def round_trip_ms(workdir, argv):
+    """Send one request straight to the daemon socket, return the time to the full answer in ms"""
+    start = time.perf_counter()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(Path(workdir) / budget_core.SOCKET_FILE))
+        client.sendall(json.dumps({"argv": argv}).encode("utf-8"))
+        client.shutdown(socket.SHUT_WR)
+        while client.recv(server.SOCKET_CHUNK_SIZE):
+            pass
+    return (time.perf_counter() - start) * 1000
+
+def call_ms(workdir, argv):
+    """Run budget.py with argv, return wall clock in ms"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, BUDGET_PY] + argv, cwd=workdir, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def median(func, *args):
+    """Median of RUNS calls of func"""
+    return statistics.median(func(*args) for _ in range(RUNS))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_MS
+    with tempfile.TemporaryDirectory() as workdir:
+        write_data(generate_data(count), Path(workdir) / budget_core.DATA_FILE)
+        direct = {" ".join(argv): median(call_ms, workdir, argv) for argv in COMMANDS}
+
+        daemon = subprocess.Popen([sys.executable, BUDGET_PY, "serve"], cwd=workdir,
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            # The daemon reports readiness once the data is loaded and the socket listens
+            daemon.stdout.readline()
+            print(f"Transakcje: {count}")
+            print(f"{'Komenda':<16} {'Bezpośrednio ms':>16} {'Przez klienta ms':>17} {'Gniazdo ms':>11}")
+            status_ms = None
+            for argv in COMMANDS:
+                name = " ".join(argv)
+                client = median(call_ms, workdir, argv)
+                socket_ms = median(round_trip_ms, workdir, argv)
+                if argv == ["status"]:
+                    status_ms = socket_ms
+                print(f"{argv[0]:<16} {direct[name]:>16.1f} {client:>17.1f} {socket_ms:>11.2f}")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    ok = status_ms <= target
+    print(f"Cel: status przez gniazdo do {target:.0f} ms - {'OK' if ok else 'NIESPEŁNIONY'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
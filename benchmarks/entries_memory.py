@@ -0,0 +1,88 @@
+"""Memory of the entry lists: dicts as read by json.load against slotted entries
+
+Generates a data file, reads it with json.load and measures the memory the
+data takes (tracemalloc) as dicts and after turning the lists into
+Transaction/Income/FixedCost entries. Then times reading, grouping by
+category, selecting a month (date prefix of a dict against the day number
+of an entry) and rebuilding aggregates on both. The entries must compare
+equal to the dicts they were made from.
+
+Usage: python benchmarks/entries_memory.py [transaction count]
+"""
+import gc
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import binary_storage
+import budget_core
+from benchmarks.generate import generate_data, write_data
+
+def timed(func, repeat=3):
+    """Get (median ms, result) of func()"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+def traced(func):
+    """Get (result, MB held by the result, peak MB while func ran)"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6, peak / 1e6
+
+def group_dicts(transactions):
+    """group_by_category as it was written for dicts"""
+    grouped = {}
+    for t in transactions:
+        grouped[t["category"]] = grouped.get(t["category"], 0) + t["amount"]
+    return grouped
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    month = budget_core.previous_month(budget_core.get_current_month())
+    first_day, next_day = binary_storage.binary_month_days(month)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = str(Path(workdir) / budget_core.DATA_FILE)
+        write_data(generate_data(count), path)
+
+        dicts, dicts_mb, dicts_peak = traced(lambda: budget_core.read_json_file(path))
+        entries, entries_mb, entries_peak = traced(lambda: budget_core.to_entries(budget_core.read_json_file(path)))
+        same = all(entries[key] == dicts[key] for key in budget_core.ENTRY_TYPES)
+
+        read = (timed(lambda: budget_core.read_json_file(path))[0],
+                timed(lambda: budget_core.to_entries(budget_core.read_json_file(path)))[0])
+        group = (timed(lambda: group_dicts(dicts["transactions"])),
+                 timed(lambda: budget_core.group_by_category(entries["transactions"])))
+        select = (timed(lambda: [t for t in dicts["transactions"] if t["date"].startswith(month)]),
+                  timed(lambda: [t for t in entries["transactions"] if first_day <= t.day < next_day]))
+        aggregates = (timed(lambda: budget_core.build_aggregates(dicts)),
+                      timed(lambda: budget_core.build_aggregates(entries)))
+        same = same and group[0][1] == group[1][1] and select[0][1] == select[1][1] and aggregates[0][1] == aggregates[1][1]
+
+    print(f"Transakcje: {count}")
+    print(f"Pamięć danych: słowniki {dicts_mb:.0f} MB, wpisy {entries_mb:.0f} MB "
+          f"({dicts_mb / entries_mb:.1f}x mniej, {entries_mb * 1e6 / count:.0f} B na transakcję)")
+    print(f"Szczyt przy odczycie: słowniki {dicts_peak:.0f} MB, wpisy {entries_peak:.0f} MB")
+    print(f"{'Pomiar':<36} {'słowniki':>10} {'wpisy':>10}")
+    print(f"{'odczyt pliku':<36} {read[0]:>7.0f} ms {read[1]:>7.0f} ms")
+    print(f"{'sumy kategorii (wszystkie)':<36} {group[0][0]:>7.0f} ms {group[1][0]:>7.0f} ms")
+    print(f"{'transakcje miesiąca ' + month:<36} {select[0][0]:>7.0f} ms {select[1][0]:>7.0f} ms")
+    print(f"{'build_aggregates':<36} {aggregates[0][0]:>7.0f} ms {aggregates[1][0]:>7.0f} ms")
+    print(f"Te same wpisy, sumy i wyniki: {'tak' if same else 'NIE'}")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Deterministic generator of synthetic multi-year budget data
+
+The same count, years, seed and end month always give the same file.
+
+Usage: python benchmarks/generate.py COUNT [--years 5] [--seed 0] [--end-month YYYY-MM] [--output data/data.json]
+"""
+import argparse
+import calendar
+import copy
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+
+# Share of everyday transactions per category, skewed like a real household
+CATEGORY_WEIGHTS = {
+    "Jedzenie": 38,
+    "Transport": 14,
+    "Restauracje": 10,
+    "Dom": 9,
+    "Rozrywka": 8,
+    "Zdrowie": 6,
+    "Ubrania": 5,
+    "Prezenty": 4,
+    "Edukacja": 3,
+    "Inne": 3,
+}
+
+# Median amount in grosze per category; amounts are log-normal around it
+CATEGORY_MEDIANS = {
+    "Jedzenie": 4500,
+    "Transport": 3000,
+    "Restauracje": 7000,
+    "Dom": 12000,
+    "Rozrywka": 6000,
+    "Zdrowie": 9000,
+    "Ubrania": 15000,
+    "Prezenty": 10000,
+    "Edukacja": 20000,
+    "Inne": 5000,
+}
+
+DESCRIPTIONS = {
+    "Jedzenie": ["Biedronka", "Lidl", "Żabka", "Piekarnia", "Warzywniak", "Zakupy tygodniowe"],
+    "Transport": ["Paliwo", "Bilet miesięczny", "Taxi", "Parking", "Bilet PKP"],
+    "Restauracje": ["Pizza", "Kebab", "Obiad na mieście", "Kawiarnia", "Sushi"],
+    "Dom": ["Środki czystości", "Naprawa", "IKEA", "Narzędzia"],
+    "Rozrywka": ["Kino", "Koncert", "Książka", "Gra", "Basen"],
+    "Zdrowie": ["Apteka", "Dentysta", "Lekarz", "Okulista"],
+    "Ubrania": ["Buty", "Kurtka", "Koszula", "Spodnie"],
+    "Prezenty": ["Prezent urodzinowy", "Kwiaty", "Prezent świąteczny"],
+    "Edukacja": ["Kurs online", "Podręczniki", "Szkolenie"],
+    "Inne": ["Poczta", "Opłata bankowa", "Różne"],
+}
+
+FIXED_COSTS = [
+    (180000, "Czynsz", "Miesięczny czynsz"),
+    (6999, "Internet", "Abonament internetowy"),
+    (25000, "Media", "Prąd i gaz"),
+    (4500, "Telefon", "Abonament telefoniczny"),
+    (12000, "Ubezpieczenie", "Ubezpieczenie mieszkania"),
+]
+
+RECURRING_INCOME = [
+    (850000, "Wypłata"),
+    (40000, "Najem garażu"),
+]
+
+# One extra one-time income entry per this many transactions
+EXTRA_INCOME_EVERY = 200
+EXTRA_INCOME = ["Premia", "Zwrot podatku", "Sprzedaż na OLX", "Zwrot zakupu"]
+
+def generate_months(years, end_month):
+    """Get YYYY-MM strings of the years ending with end_month, oldest first"""
+    year, month = map(int, end_month.split("-"))
+    index = year * 12 + month - 1
+    return [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(index - years * 12 + 1, index + 1)]
+
+def random_date(rng, month_str):
+    """Get a random day of the month"""
+    year, month = map(int, month_str.split("-"))
+    return f"{month_str}-{rng.randint(1, calendar.monthrange(year, month)[1]):02d}"
+
+def generate_data(count, years=5, seed=0, end_month=None):
+    """Create data with count transactions over years of months, fixed costs and income applied every month"""
+    rng = random.Random(seed)
+    months = generate_months(years, end_month or budget_core.get_current_month())
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+
+    data = budget_core.create_empty_data()
+    data["initial_balance"] = 1000000
+    for month_str in months:
+        if month_str.endswith("-12"):
+            data["limits"][month_str] = 800000
+
+    data["fixed_costs"] = [
+        {"id": i, "amount": amount, "category": category, "description": description}
+        for i, (amount, category, description) in enumerate(FIXED_COSTS, 1)
+    ]
+    data["recurring_income"] = [
+        {"id": i, "amount": amount, "description": description}
+        for i, (amount, description) in enumerate(RECURRING_INCOME, 1)
+    ]
+
+    # Fixed costs take their share of count first, the rest are everyday expenses
+    fixed_months = months[-(count // len(FIXED_COSTS)):] if count >= len(FIXED_COSTS) else []
+    transactions = []
+    for month_str in fixed_months:
+        for amount, category, description in FIXED_COSTS:
+            transactions.append((f"{month_str}-01", amount, category, description))
+    for _ in range(count - len(transactions)):
+        category = rng.choices(categories, weights)[0]
+        amount = max(1, int(rng.lognormvariate(0, 0.6) * CATEGORY_MEDIANS[category]))
+        transactions.append((random_date(rng, rng.choice(months)), amount, category,
+                             rng.choice(DESCRIPTIONS[category])))
+
+    # Entries are added day by day, so IDs follow dates
+    transactions.sort(key=lambda t: t[0])
+    data["transactions"] = [
+        {"id": i, "date": date_str, "amount": amount, "category": category, "description": description}
+        for i, (date_str, amount, category, description) in enumerate(transactions, 1)
+    ]
+
+    income = [(f"{month_str}-01", amount, description)
+              for month_str in months for amount, description in RECURRING_INCOME]
+    for _ in range(count // EXTRA_INCOME_EVERY):
+        income.append((random_date(rng, rng.choice(months)), rng.randint(5000, 300000), rng.choice(EXTRA_INCOME)))
+    income.sort(key=lambda i: i[0])
+    first_income_id = len(RECURRING_INCOME) + 1
+    data["one_time_income"] = [
+        {"id": i, "date": date_str, "amount": amount, "description": description}
+        for i, (date_str, amount, description) in enumerate(income, first_income_id)
+    ]
+
+    data["next_transaction_id"] = len(data["transactions"]) + 1
+    data["next_fixed_cost_id"] = len(FIXED_COSTS) + 1
+    data["next_income_id"] = first_income_id + len(income)
+    data["applied_fixed_costs_months"] = fixed_months
+    data["applied_recurring_income_months"] = list(months)
+    data["aggregates"] = budget_core.build_aggregates(data)
+    return data
+
+def legacy_data(data):
+    """Copy data in the format from before integer grosze (PLN floats, no aggregates)"""
+    legacy = copy.deepcopy(data)
+    legacy.pop("amount_unit", None)
+    legacy.pop("aggregates", None)
+    legacy["initial_balance"] = legacy["initial_balance"] / 100
+    legacy["limits"] = {month: amount / 100 for month, amount in legacy["limits"].items()}
+    for key in ("transactions", "fixed_costs", "recurring_income", "one_time_income"):
+        for item in legacy[key]:
+            item["amount"] = item["amount"] / 100
+    return legacy
+
+def write_data(data, path):
+    """Write data as a JSON data file in the current layout"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    budget_core.create_json_data(data, str(path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generuj syntetyczny plik danych budżetu")
+    parser.add_argument("count", type=int, help="Liczba transakcji")
+    parser.add_argument("--years", type=int, default=5, help="Liczba lat historii (domyślnie 5)")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno generatora (domyślnie 0)")
+    parser.add_argument("--end-month", default=None, help="Ostatni miesiąc (YYYY-MM), domyślnie bieżący")
+    parser.add_argument("--output", default=budget_core.DATA_FILE,
+                        help=f"Plik wynikowy (domyślnie {budget_core.DATA_FILE})")
+    args = parser.parse_args()
+
+    data = generate_data(args.count, args.years, args.seed, args.end_month)
+    write_data(data, args.output)
+    print(f"Zapisano {len(data['transactions'])} transakcji i {len(data['one_time_income'])} przychodów do {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Timing and peak-memory benchmarks of CLI subcommands and core functions
+
+Every size gets a generated data file (see generate.py). CLI commands run in
+a fresh interpreter: the time is the median wall clock, the memory is the
+process peak RSS. Core functions run in this process: the time is the median
+of perf_counter, the memory is the tracemalloc peak of a separate run.
+Results are written as JSON to compare across commits with compare.py.
+
+Usage: python benchmarks/run.py [--sizes 1000 10000 100000] [--repeat 5] [--output results.json]
+"""
+import argparse
+import copy
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, legacy_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+# Child process: run a script in-process like `python script`, then report its
+# own peak RSS in kB. VmHWM is preferred because ru_maxrss survives exec and
+# includes the forking parent.
+RUNNER = """
+import os, resource, runpy, sys
+sys.argv = sys.argv[1:]
+sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    try:
+        with open("/proc/self/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("RSS", rss, file=sys.stderr)
+"""
+
+def cli_commands(data):
+    """Get (name, arguments, mutates, setup) for every subcommand, using IDs and months present in data
+
+    setup lists the commands run untimed before every run, e.g. to bring the
+    data into the storage the command works on.
+    """
+    month = budget_core.get_current_month()
+    past_month = data["transactions"][len(data["transactions"]) // 2]["date"][:7]
+    transaction_id = data["transactions"][len(data["transactions"]) // 2]["id"]
+    income_id = data["one_time_income"][-1]["id"]
+    # Generated history reaches back over the previous year, which is closed
+    closed_year = str(int(month[:4]) - 1)
+    commands = [
+        ("status", [], False),
+        ("status --detailed", ["--detailed"], False),
+        ("add", ["--amount", "12.50", "--category", "Jedzenie", "--description", "Bułki"], True),
+        ("apply-fixed", [], True),
+        ("list", ["--month", past_month], False),
+        ("transactions", ["--month", past_month], False),
+        ("edit", [str(transaction_id), "--amount", "99.99"], True),
+        ("delete", [str(transaction_id)], True),
+        ("set-limit", ["4000", "--month", month], True),
+        ("limits", [], False),
+        ("fixed-list", [], False),
+        ("fixed-add", ["--amount", "49.99", "--category", "Rozrywka", "--description", "Streaming"], True),
+        ("fixed-edit", ["1", "--amount", "1850"], True),
+        ("fixed-delete", ["2"], True),
+        ("set-balance", ["12000"], True),
+        ("balance", [], False),
+        ("balance --detailed", ["--detailed"], False),
+        ("balance --month", ["--month", past_month], False),
+        ("recurring-list", [], False),
+        ("recurring-add", ["--amount", "300", "--description", "Dodatek"], True),
+        ("recurring-edit", ["1", "--amount", "9000"], True),
+        ("recurring-delete", ["2"], True),
+        ("apply-recurring-income", [], True),
+        ("income-add", ["--amount", "150", "--description", "Zwrot"], True),
+        ("income-list", ["--month", past_month], False),
+        ("income-edit", [str(income_id), "--amount", "200"], True),
+        ("income-delete", [str(income_id)], True),
+        ("import", ["--csv", "import.csv"], True),
+        ("analyze", ["--categories", "--daily"], False),
+        ("report", ["--from", past_month, "--to", month], False),
+        ("search", ["biedronka", "OR", "lidl", "--min", "20"], False),
+        ("verify-aggregates", [], True),
+        ("batch", ["batch.txt"], True),
+        ("compact", [], True),
+        ("migrate-partitioned", [], True),
+        ("migrate-sqlite", [], True),
+        ("migrate-binary", [], True),
+        ("export-json", [], True, [["migrate-binary"]]),
+        ("archive", ["--year", closed_year], True),
+        ("unarchive", ["--year", closed_year], True, [["archive", "--year", closed_year]]),
+    ]
+    return [(name, name.split()[:1] + arguments, mutates, setup[0] if setup else [])
+            for name, arguments, mutates, *setup in commands]
+
+def write_import_csv(path, rows=1000):
+    """Write a bank statement CSV of new transactions for the import benchmark"""
+    sample = generate_data(rows, years=1, seed=1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("date,amount,description,category\n")
+        for t in sample["transactions"]:
+            amount = budget_core.to_pln(t["amount"])
+            f.write(f'{t["date"]},{amount},Import {t["id"]} {t["description"]},{t["category"]}\n')
+
+def write_batch_file(path, rows=100):
+    """Write a batch of add commands for the batch benchmark"""
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(rows):
+            f.write(f'add --amount {n % 90 + 10}.50 --category Jedzenie --description "Paczka {n}"\n')
+
+def run_cli(workdir, args):
+    """Run budget.py with args in workdir, return (wall ms, peak RSS kB)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", RUNNER, BUDGET_PY] + args, cwd=workdir,
+                            capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"budget.py {' '.join(args)} failed:\n{result.stdout}{result.stderr}")
+    line = [l for l in result.stderr.splitlines() if l.startswith("RSS")][-1]
+    return elapsed, int(line.split()[1])
+
+def bench_cli(workdir, pristine, args, mutates, repeat, setup=()):
+    """Benchmark a CLI command, restoring the data directory after every run of a mutating one"""
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        for setup_args in setup:
+            run_cli(workdir, setup_args)
+        elapsed, rss = run_cli(workdir, args)
+        times.append(elapsed)
+        peak = max(peak, rss)
+        if mutates:
+            shutil.rmtree(workdir / "data")
+            shutil.copytree(pristine, workdir / "data")
+    return times, peak
+
+def bench_function(setup, func, repeat):
+    """Benchmark func(setup()), return (times in ms, tracemalloc peak in kB); setup is not timed"""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append((time.perf_counter() - start) * 1000)
+    arg = setup()
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return times, peak // 1024
+
+def core_functions(data, path):
+    """Get (name, setup, func) of the core functions to benchmark"""
+    without_aggregates = {k: v for k, v in data.items() if k != "aggregates"}
+    legacy = legacy_data(data)
+    transactions = [budget_core.Transaction.from_dict(t) for t in data["transactions"]]
+
+    def save(loaded):
+        loaded["_needs_snapshot"] = True
+        budget_core.save_data(loaded, path)
+
+    return [
+        ("load_data", lambda: path, budget_core.load_data),
+        ("load_data (sekcje)", lambda: path, lambda p: budget_core.load_data(p, months=[])),
+        ("save_data", lambda: budget_core.load_data(path), save),
+        ("calculate_current_balance", lambda: data, budget_core.calculate_current_balance),
+        ("calculate_current_balance (bez sum)", lambda: without_aggregates, budget_core.calculate_current_balance),
+        ("group_by_category", lambda: transactions, budget_core.group_by_category),
+        ("migrate_data", lambda: copy.deepcopy(legacy), budget_core.migrate_data),
+        ("build_aggregates", lambda: data, budget_core.build_aggregates),
+    ]
+
+def result(size, kind, name, times, peak_kb):
+    """Build one result record"""
+    return {
+        "size": size,
+        "kind": kind,
+        "name": name,
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kb": peak_kb,
+    }
+
+def git_commit():
+    """Get the current commit hash, None outside a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarki komend CLI i funkcji budżetu")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Liczby transakcji")
+    parser.add_argument("--years", type=int, default=5, help="Lata historii w danych (domyślnie 5)")
+    parser.add_argument("--repeat", type=int, default=5, help="Powtórzenia każdego pomiaru (domyślnie 5)")
+    parser.add_argument("--only", nargs="+", default=None, help="Uruchom tylko podane komendy i funkcje")
+    parser.add_argument("--output", default=None, help="Plik JSON z wynikami (domyślnie standardowe wyjście)")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        data = generate_data(size, years=args.years)
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp) / "work"
+            pristine = Path(tmp) / "pristine"
+            write_data(data, pristine / "data.json")
+            shutil.copytree(pristine, workdir / "data")
+            write_import_csv(workdir / "import.csv")
+            write_batch_file(workdir / "batch.txt")
+
+            for name, cli_args, mutates, setup in cli_commands(data):
+                if args.only and name not in args.only:
+                    continue
+                times, peak = bench_cli(workdir, pristine, cli_args, mutates, args.repeat, setup)
+                results.append(result(size, "cli", name, times, peak))
+                print(f"{size:>9} cli      {name:<36} {statistics.median(times):>10.1f} ms {peak / 1024:>8.1f} MB", file=sys.stderr)
+
+            path = str(pristine / "data.json")
+            for name, setup, func in core_functions(data, path):
+                if args.only and name not in args.only:
+                    continue
+                times, peak = bench_function(setup, func, args.repeat)
+                results.append(result(size, "function", name, times, peak))
+                print(f"{size:>9} function {name:<36} {statistics.median(times):>10.3f} ms {peak / 1024:>8.1f} MB", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "years": args.years,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Full-text search: inverted index against a scan of every entry
+
+Generates a data file, then times `budget.py search` run twice (the first
+run builds and saves data/data.json.search, the second reads it), the same
+queries on data kept in memory (serve, api, batch) and on SQLite, where the
+index lives in the search_terms table. Every variant must find the same
+entries as a plain scan that folds and splits each description.
+
+Usage: python benchmarks/search.py [transaction count]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+import text_search
+from benchmarks.generate import generate_data, write_data
+
+BUDGET_PY = str(ROOT / "budget.py")
+
+QUERIES = [
+    ["biedronka"],
+    ["zabka", "OR", "lidl"],
+    ["jedzenie", "warzywniak"],
+    ["czyn*"],
+    ["paliwo", "OR", "bilet", "miesieczny"],
+]
+
+def scan(data, key, groups):
+    """Find entries by folding and splitting every description, the way search works without an index"""
+    found = []
+    for item in data[key]:
+        text = budget_core.fold_text(f"{item['description']} {item.get('category', '')}")
+        tokens = set(budget_core.SEARCH_TOKEN.findall(text))
+        for group in groups:
+            if all(any(t.startswith(word[:-1]) for t in tokens) if word.endswith("*") else word in tokens
+                   for word in group):
+                found.append(item["id"])
+                break
+    return found
+
+def timed(func, repeat=5):
+    """Get (median ms, result) of func()"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+def run_cli(workdir, args):
+    """Run budget.py in workdir, return wall ms"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, BUDGET_PY] + args, cwd=workdir, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def search_all(data, path, key):
+    """Run every query, return the found IDs"""
+    return [[item["id"] for item in
+             text_search.search_entries(data, path, key, budget_core.validate_search_query(query), "", "~")]
+            for query in QUERIES]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    data = generate_data(count)
+    key = "transactions"
+    query = QUERIES[1]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_data(data, Path(workdir) / budget_core.DATA_FILE)
+        first = run_cli(workdir, ["search"] + query)
+        second = run_cli(workdir, ["search"] + query)
+
+        os.chdir(workdir)
+        loaded = budget_core.load_data(budget_core.DATA_FILE)
+        scan_ms, expected = timed(lambda: [scan(loaded, key, budget_core.validate_search_query(q)) for q in QUERIES], 1)
+        text_search.load_search_index(loaded, budget_core.DATA_FILE)
+        memory_ms, in_memory = timed(lambda: search_all(loaded, budget_core.DATA_FILE, key))
+
+        subprocess.run([sys.executable, BUDGET_PY, "migrate-sqlite"], cwd=workdir, capture_output=True, check=True)
+        sqlite_cli = run_cli(workdir, ["search"] + query)
+        connected = budget_core.load_data(budget_core.SQLITE_FILE, months=[])
+        sqlite_ms, in_sqlite = timed(lambda: search_all(connected, budget_core.SQLITE_FILE, key))
+        connected["_sqlite"].close()
+        os.chdir(ROOT)
+
+    same = in_memory == expected and in_sqlite == expected
+    matches = sum(len(ids) for ids in expected)
+    print(f"Transakcje: {count}, zapytania: {len(QUERIES)}, znalezione wpisy razem: {matches}")
+    print(f"budget.py search {' '.join(query)}: pierwsze {first:.0f} ms (budowa indeksu), kolejne {second:.0f} ms")
+    print(f"budget.py search na SQLite: {sqlite_cli:.0f} ms")
+    print(f"Przegląd wszystkich wpisów: {scan_ms / len(QUERIES):.0f} ms na zapytanie")
+    print(f"Indeks w pamięci (serve, api, batch): {memory_ms / len(QUERIES):.2f} ms na zapytanie")
+    print(f"Indeks w SQLite: {sqlite_ms / len(QUERIES):.2f} ms na zapytanie")
+    print(f"Te same wyniki we wszystkich wariantach: {'tak' if same else 'NIE'}")
+    sys.exit(0 if same else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Cold start time of the CLI: wall clock and import cost per command
+
+Each command run is paired with a run of the bare interpreter, so both see
+the same load on the machine. Exits with status 1 when a command exceeds
+the startup target or imports a module that only other code paths need.
+
+Usage: python benchmarks/startup.py [target ms]
+"""
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_PY = str(ROOT / "budget.py")
+
+RUNS = 20
+
+# Overhead above a bare interpreter (`python -c pass`): fastest command run
+# minus fastest interpreter run out of RUNS pairs. Other processes only ever
+# add time, so the minimum moves by 1-2 ms between invocations where the
+# median moved by 10-20 ms. The single-file budget.py the project started
+# from measures 35-37 ms here and the commands must stay clearly below it;
+# they measure 18-22 ms since the code is imported from cached modules.
+TARGET_MS = 30
+
+COMMANDS = [
+    ["limits"],
+    ["status"],
+    ["list"],
+    ["fixed-list"],
+    ["set-limit", "5000"],
+]
+
+# Modules needed only by other commands (storage backends, import, servers, analytics)
+DEFERRED_MODULES = {"sqlite3", "csv", "pathlib", "numpy", "analytics", "server", "sqlite_storage",
+                    "partitioned_storage", "binary_storage", "journal", "archives", "text_search",
+                    "batch_runner"}
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+def run_ms(workdir, args):
+    """Wall clock of running python with args once, in ms"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=workdir, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+def paired_ms(workdir, args):
+    """Run python with args and a bare interpreter in turns, return ([command ms], [interpreter ms])"""
+    command, bare = [], []
+    for _ in range(RUNS):
+        command.append(run_ms(workdir, args))
+        bare.append(run_ms(workdir, ["-c", "pass"]))
+    return command, bare
+
+def imported_modules(workdir, args):
+    """Run python -X importtime with args, return {module: self import time in µs}"""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=workdir,
+                            capture_output=True, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(2)] = int(match.group(1))
+    return modules
+
+def prepare_workdir(workdir):
+    """Create a small data file in workdir for the commands to read"""
+    (Path(workdir) / "data").mkdir()
+    subprocess.run([sys.executable, BUDGET_PY, "set-balance", "1000"], cwd=workdir,
+                   capture_output=True, check=True)
+
+def measure_command(workdir, command, baseline_modules):
+    """Get startup timings of a command and the deferred modules it imports
+
+    baseline_modules are the modules a bare interpreter imports, see imported_modules.
+    """
+    elapsed, bare = paired_ms(workdir, [BUDGET_PY] + command)
+    modules = imported_modules(workdir, [BUDGET_PY] + command)
+    extra = {name: us for name, us in modules.items() if name not in baseline_modules}
+    return {
+        "elapsed": min(elapsed),
+        "bare": min(bare),
+        "overhead": min(elapsed) - min(bare),
+        "median": statistics.median(elapsed) - statistics.median(bare),
+        "imports": sum(extra.values()) / 1000,
+        "leaked": sorted(name for name in extra if name.split(".")[0] in DEFERRED_MODULES),
+    }
+
+def main():
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else TARGET_MS
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_workdir(workdir)
+        baseline_modules = imported_modules(workdir, ["-c", "pass"])
+        print(f"Najkrótszy z {RUNS} przebiegów, na zmianę z interpreterem bez skryptu (`python -c pass`)")
+        print(f"{'Komenda':<16} {'Czas ms':>8} {'Interpreter':>12} {'Narzut ms':>10} {'Mediana':>8} "
+              f"{'Importy ms':>11}  Odroczone moduły")
+        for command in COMMANDS:
+            result = measure_command(workdir, command, baseline_modules)
+            print(f"{' '.join(command):<16} {result['elapsed']:>8.1f} {result['bare']:>12.1f} "
+                  f"{result['overhead']:>10.1f} {result['median']:>8.1f} {result['imports']:>11.1f}  "
+                  f"{', '.join(result['leaked']) or '-'}")
+            if result["overhead"] > target or result["leaked"]:
+                failed = True
+    print(f"Cel: narzut do {target:.0f} ms, bez odroczonych modułów - {'NIESPEŁNIONY' if failed else 'OK'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
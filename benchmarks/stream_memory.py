@@ -0,0 +1,49 @@
+"""Peak RSS of read-only commands against data file size, streaming vs full load
+
+Usage: python benchmarks/stream_memory.py [transaction counts...]
+"""
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import budget_core
+from benchmarks.generate import generate_data, write_data
+from benchmarks.run import RUNNER
+
+FULL_LOAD = """
+import sys
+sys.path.insert(0, {root!r})
+import budget_core
+data = budget_core.load_data(budget_core.DATA_FILE)
+print(budget_core.format_transactions_list(budget_core.get_month_transactions(data, {month!r})))
+"""
+
+def peak_rss(workdir, args):
+    """Run python with args in workdir, return peak RSS in MB"""
+    result = subprocess.run([sys.executable, "-c", RUNNER] + args, cwd=workdir,
+                            capture_output=True, text=True, check=True)
+    line = [l for l in result.stderr.splitlines() if l.startswith("RSS")][-1]
+    return int(line.split()[1]) / 1024
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 50000, 200000]
+    print(f"{'Transakcje':>10} {'Plik MB':>8} {'list MB':>8} {'transactions MB':>16} {'pełne wczytanie MB':>19}")
+    for count in counts:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / budget_core.DATA_FILE
+            write_data(generate_data(count, years=2, seed=count), path)
+            size = path.stat().st_size / 1024 / 1024
+            budget_py = str(ROOT / "budget.py")
+            list_rss = peak_rss(workdir, [budget_py, "list", "--month", "2025-03"])
+            transactions_rss = peak_rss(workdir, [budget_py, "transactions", "--month", "2025-03"])
+            script = Path(workdir) / "full_load.py"
+            script.write_text(FULL_LOAD.format(root=str(ROOT), month="2025-03"))
+            full_rss = peak_rss(workdir, [str(script)])
+            print(f"{count:>10} {size:>8.1f} {list_rss:>8.1f} {transactions_rss:>16.1f} {full_rss:>19.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Binary data file: fixed-width records and a string table, read through mmap"""
+import json
+import os
+import sys
+
+from budget_core import (Income, ProfilePhase, Transaction, backup_file, compact_data, date_to_day,
+                         day_to_date, entry_json, load_data, profiled, snapshot_of, to_entries,
+                         write_atomic)
+
+# === BINARY STORAGE ===
+
+BINARY_KEYS = ("transactions", "one_time_income")
+
+BINARY_FIELDS = {
+    "transactions": {"id", "date", "amount", "category", "description"},
+    "one_time_income": {"id", "date", "amount", "description"},
+}
+
+BINARY_MAGIC = b"BUDGBIN1"
+
+# Magic, then offset and length of the JSON metadata written after the records
+BINARY_HEADER = "<8sQQ"
+
+BINARY_HEADER_SIZE = 24
+
+# id, day number (date.toordinal()), amount in grosze, category and description codes in the string table
+BINARY_RECORD = "<IiqiI"
+
+BINARY_RECORD_SIZE = 24
+
+NO_CATEGORY = -1  # category code of income entries
+
+def map_binary_file(path):
+    """Map a binary data file read-only, return (mmap, metadata)"""
+    import mmap
+    import struct
+
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = struct.unpack_from(BINARY_HEADER, mm)
+        if magic != BINARY_MAGIC:
+            raise ValueError(magic)
+        meta = json.loads(mm[offset:offset + length])
+    except (ValueError, struct.error):
+        print(f"BŁĄD: Plik {path} jest uszkodzony (nieprawidłowy format binarny).")
+        print(f"Przywróć go z backupu: {path}.bak")
+        print("Nie próbowano nadpisać pliku.")
+        sys.exit(1)
+    return mm, meta
+
+def binary_month_days(month_str):
+    """Get day numbers of the first day of a month and of the next month"""
+    from datetime import date
+
+    year, month = int(month_str[:4]), int(month_str[5:7])
+    return date(year, month, 1).toordinal(), date(year + month // 12, month % 12 + 1, 1).toordinal()
+
+def binary_position(mm, section, day):
+    """Get index of the first record of a date-sorted section with day number >= day"""
+    import struct
+
+    offset, count = section
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from("<i", mm, offset + middle * BINARY_RECORD_SIZE + 4)[0] < day:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def read_binary_strings(mm, table):
+    """Get all strings of the string table"""
+    import struct
+
+    offset, count = table
+    ends = struct.unpack_from(f"<{count + 1}I", mm, offset)
+    blob = mm[offset + 4 * (count + 1):offset + 4 * (count + 1) + ends[-1]]
+    return [blob[ends[code]:ends[code + 1]].decode('utf-8') for code in range(count)]
+
+def binary_string_reader(mm, table, codes):
+    """Get a function reading single strings of the table, remembering string -> code in codes"""
+    import struct
+
+    offset, count = table
+    blob = offset + 4 * (count + 1)
+    cache = {}
+
+    def string(code):
+        value = cache.get(code)
+        if value is None:
+            start, end = struct.unpack_from("<II", mm, offset + 4 * code)
+            value = cache[code] = mm[blob + start:blob + end].decode('utf-8')
+            codes[value] = code
+        return value
+
+    return string
+
+def unpack_binary_entries(mm, key, section, first, last, string):
+    """Get records first..last-1 of a section as entries"""
+    import struct
+
+    offset = section[0]
+    records = mm[offset + first * BINARY_RECORD_SIZE:offset + last * BINARY_RECORD_SIZE]
+    if key == "transactions":
+        return [Transaction(item_id, day_to_date(day), amount, string(category), string(description))
+                for item_id, day, amount, category, description in struct.iter_unpack(BINARY_RECORD, records)]
+    return [Income(item_id, day_to_date(day), amount, string(description))
+            for item_id, day, amount, _, description in struct.iter_unpack(BINARY_RECORD, records)]
+
+@profiled("read")
+def read_binary_data(path, months=None):
+    """Read a binary data file - all records, or only the records of the given months
+
+    Records are sorted by date, so the records of a month are found by
+    bisection in the mapped file and no other record is unpacked.
+    """
+    mm, data = map_binary_file(path)
+    with mm, ProfilePhase("parse"):
+        records = data.pop("records")
+        # Aggregates and the grosze conversion need the full history
+        if "aggregates" not in data or data.get("amount_unit") != "grosze":
+            months = None
+
+        # Codes of strings in memory, reused by a save of the same months
+        codes = {}
+        if months is None:
+            string = read_binary_strings(mm, records["strings"]).__getitem__
+        else:
+            string = binary_string_reader(mm, records["strings"], codes)
+        for key in BINARY_KEYS:
+            section = records[key]
+            if months is None:
+                data[key] = unpack_binary_entries(mm, key, section, 0, section[1], string)
+            else:
+                data[key] = []
+                for month in sorted(months):
+                    first_day, next_day = binary_month_days(month)
+                    data[key].extend(unpack_binary_entries(mm, key, section, binary_position(mm, section, first_day),
+                                                           binary_position(mm, section, next_day), string))
+            # Lists keep ID (insertion) order like the other storages
+            data[key].sort(key=lambda item: item["id"])
+
+    data["_loaded_months"] = None if months is None else set(months)
+    data["_binary_codes"] = codes
+    return data
+
+def pack_binary_entries(key, items, codes, strings, base):
+    """Pack entries as (day, id, record, month) sorted by date, adding new strings to the table
+
+    New strings get codes from base + their position in strings.
+    """
+    import struct
+
+    record = struct.Struct(BINARY_RECORD)
+
+    def code_of(value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = base + len(strings)
+            strings.append(value)
+        return code
+
+    rows = []
+    for item in items:
+        try:
+            if set(item) != BINARY_FIELDS[key] or not isinstance(item["description"], str):
+                raise ValueError(item)
+            day = date_to_day(item["date"])
+            category = code_of(item["category"]) if "category" in item else NO_CATEGORY
+            packed = record.pack(item["id"], day, item["amount"], category, code_of(item["description"]))
+        except (ValueError, TypeError, struct.error):
+            print(f"BŁĄD: Wpisu nie można zapisać w formacie binarnym ({key})")
+            print(f"Podano: {item}")
+            sys.exit(1)
+        rows.append((day, item["id"], packed, item["date"][:7]))
+    rows.sort()
+    return rows
+
+def pack_binary_strings(strings, old=None):
+    """Pack a string table: offsets of string ends followed by their UTF-8 bytes
+
+    old is (mmap, table) of a table the new strings are appended to.
+    """
+    import struct
+
+    encoded = [value.encode('utf-8') for value in strings]
+    start, count, old_ends, old_blob = 0, 0, b"", b""
+    if old is not None:
+        mm, (offset, count) = old
+        start = struct.unpack_from("<I", mm, offset + 4 * count)[0]
+        old_ends = mm[offset:offset + 4 * count]
+        old_blob = mm[offset + 4 * (count + 1):offset + 4 * (count + 1) + start]
+    ends = [start]
+    for value in encoded:
+        ends.append(ends[-1] + len(value))
+    return count + len(strings), old_ends + struct.pack(f"<{len(ends)}I", *ends) + old_blob + b"".join(encoded)
+
+def merge_binary_section(mm, section, loaded, rows):
+    """Get records of a section: rows for the loaded months, old records of the other months"""
+    import struct
+
+    offset, count = section
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row[3], []).append(row)
+
+    pieces = []
+    position = 0
+    for month in sorted(loaded | set(by_month)):
+        first_day, next_day = binary_month_days(month)
+        start, end = binary_position(mm, section, first_day), binary_position(mm, section, next_day)
+        pieces.append(mm[offset + position * BINARY_RECORD_SIZE:offset + start * BINARY_RECORD_SIZE])
+        month_rows = list(by_month.get(month, []))
+        if month not in loaded:
+            # A month that was not read: only new entries can be in memory
+            for n in range(start, end):
+                record = mm[offset + n * BINARY_RECORD_SIZE:offset + (n + 1) * BINARY_RECORD_SIZE]
+                item_id, day = struct.unpack_from("<Ii", record)
+                month_rows.append((day, item_id, record))
+            month_rows.sort()
+        pieces.extend(row[2] for row in month_rows)
+        position = end
+    pieces.append(mm[offset + position * BINARY_RECORD_SIZE:offset + count * BINARY_RECORD_SIZE])
+    return b"".join(pieces)
+
+def pack_binary_data(data, old):
+    """Get ({key: records}, string count, string table) of data
+
+    old is (mmap, metadata) of the current file when data holds only some
+    months: its records of the other months and its strings are kept.
+    """
+    strings = []
+    if old is None:
+        codes, base = {}, 0
+    else:
+        mm, meta = old
+        codes, base = data["_binary_codes"], meta["records"]["strings"][1]
+
+    sections = {}
+    for key in BINARY_KEYS:
+        rows = pack_binary_entries(key, data[key], codes, strings, base)
+        if old is None:
+            sections[key] = b"".join(row[2] for row in rows)
+        else:
+            sections[key] = merge_binary_section(mm, meta["records"][key], data["_loaded_months"], rows)
+    count, table = pack_binary_strings(strings, None if old is None else (mm, meta["records"]["strings"]))
+    return sections, count, table
+
+@profiled("write")
+def write_binary_data(data, path):
+    """Write data to a binary file: header, records, string table, then the other sections as JSON"""
+    import struct
+
+    old = map_binary_file(path) if data["_loaded_months"] is not None else None
+    try:
+        with ProfilePhase("serialize"):
+            sections, count, table = pack_binary_data(data, old)
+    finally:
+        if old is not None:
+            old[0].close()
+
+    meta = {k: v for k, v in snapshot_of(data).items() if k not in BINARY_KEYS}
+    meta["records"] = {}
+    offset = BINARY_HEADER_SIZE
+    for key in BINARY_KEYS:
+        meta["records"][key] = [offset, len(sections[key]) // BINARY_RECORD_SIZE]
+        offset += len(sections[key])
+    meta["records"]["strings"] = [offset, count]
+    content = json.dumps(meta, default=entry_json).encode('utf-8')
+    header = struct.pack(BINARY_HEADER, BINARY_MAGIC, offset + len(table), len(content))
+
+    if os.path.exists(path):
+        backup_file(path)
+    write_atomic(path, lambda f: f.writelines([header, *sections.values(), table, content]))
+
+def create_binary_data(data, path):
+    """Create new binary data file"""
+    data["_loaded_months"] = None
+    write_binary_data(data, path)
+
+def save_binary_data(data, path):
+    """Save data - records of months the command did not read are copied as they are"""
+    data.pop("_changes", None)
+    data.pop("_needs_snapshot", None)
+    write_binary_data(data, path)
+
+def compact_binary_data(data, path):
+    """Rewrite the binary file with only the strings still in use"""
+    data.pop("_changes", None)
+    data.pop("_needs_snapshot", None)
+    if data["_loaded_months"] is not None:
+        data.update(to_entries(read_binary_data(path)))
+        data.pop("_index", None)
+    write_binary_data(data, path)
+
+def read_binary_generation(path):
+    """Get save generation stored in a binary data file"""
+    mm, meta = map_binary_file(path)
+    mm.close()
+    return meta.get("generation", 0)
+
+def migrate_json_to_binary(json_path, binary_path):
+    """One-shot copy of JSON data file into a new binary data file"""
+    if os.path.exists(binary_path):
+        print(f"BŁĄD: Plik {binary_path} już istnieje.")
+        print("Usuń go ręcznie, jeśli chcesz przeprowadzić migrację ponownie.")
+        sys.exit(1)
+
+    data = load_data(json_path)
+    create_binary_data(data, binary_path)
+    return data
+
+def export_binary_to_json(binary_path, json_path):
+    """Write binary data back to a JSON data file, keep the binary file only as a backup"""
+    data = load_data(binary_path)
+    compact_data(data, json_path)
+    backup_file(binary_path)
+    os.unlink(binary_path)
+    return data
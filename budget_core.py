@@ -0,0 +1,3258 @@
+import functools
+import json
+import os
+import sys
+import re
+import time
+import argparse
+
+# Commands of budget.py. Other modules (sqlite3, decimal, datetime, shutil, csv)
+# are imported by the functions that need them, so that short commands start
+# quickly. The code of other storages and rarely used commands is kept in
+# modules imported the same way: journal, streaming, sqlite_storage,
+# partitioned_storage, binary_storage, server (serve, api), archives,
+# text_search (search), batch_runner (batch) and analytics (analyze).
+
+# === CONSTANTS ===
+DATA_FILE = "data/data.json"
+SQLITE_FILE = "data/data.db"
+MANIFEST_FILE = "data/manifest.json"
+BINARY_FILE = "data/data.bin"  # fixed-width records with a string table, read through mmap
+PARTITIONS_DIR = "transactions"  # month partitions, relative to the manifest
+JOURNAL_SUFFIX = ".journal"
+SEARCH_SUFFIX = ".search"  # full-text search index kept next to the data file, rebuilt when missing
+JOURNAL_COMPACT_SIZE = 256 * 1024  # bytes of journal before it is folded into the snapshot
+JOURNAL_MODE = os.environ.get("BUDGET_JOURNAL", "0") == "1"
+ARCHIVE_DIR = "data/archive"  # compressed, read-only entries of closed years (archive)
+SOCKET_FILE = "data/budget.sock"  # Unix socket of the running daemon (serve)
+API_HOST = "127.0.0.1"  # default address of the HTTP API (api)
+API_PORT = 8765
+LOCK_FILE = "data/budget.lock"  # advisory lock held by a command for its whole load-modify-save cycle
+LOCK_TIMEOUT = 10  # seconds a command waits for another one to release the lock
+LOCK_POLL_MAX = 0.02  # longest pause between attempts to take the lock
+STALE_RETRIES = 3  # attempts of a command whose data was saved by another writer in between
+
+# === PROFILING ===
+
+# Active profile of the command when --profile is given, None otherwise
+PROFILE = None
+
+class ProfilePhase:
+    """Time a phase of the command; phases entered inside it are recorded as its children"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if PROFILE is None:
+            return self
+        import tracemalloc
+
+        stack = PROFILE["stack"]
+        # Keep the parent's peak so far, the counter is reset for the child
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        path = (stack[-1]["path"] if stack else ()) + (self.name,)
+        PROFILE["phases"].setdefault(path, {"calls": 0, "seconds": 0.0, "peak": 0})
+        tracemalloc.reset_peak()
+        stack.append({"path": path, "peak": 0, "start": time.perf_counter()})
+        return self
+
+    def __exit__(self, *exc_info):
+        if PROFILE is None:
+            return False
+        import tracemalloc
+
+        frame = PROFILE["stack"].pop()
+        peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+        stats = PROFILE["phases"][frame["path"]]
+        stats["calls"] += 1
+        stats["seconds"] += time.perf_counter() - frame["start"]
+        stats["peak"] = max(stats["peak"], peak)
+        if PROFILE["stack"]:
+            parent = PROFILE["stack"][-1]
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        return False
+
+def profiled(name):
+    """Record every call of the decorated function as a profile phase"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if PROFILE is None:
+                return func(*args, **kwargs)
+            with ProfilePhase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start_profiling(args):
+    """Start timing phases and tracing memory, report when the command exits"""
+    global PROFILE
+    import atexit
+    import tracemalloc
+
+    tracemalloc.start()
+    PROFILE = {"command": args.command, "stack": [], "phases": {}}
+    profiler = None
+    if args.profile_cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    command_phase = ProfilePhase("command")
+    command_phase.__enter__()
+    # atexit also covers commands ending with sys.exit
+    atexit.register(finish_profiling, command_phase, profiler, args)
+
+def finish_profiling(command_phase, profiler, args):
+    """Stop profiling and print the breakdown to stderr or write it as JSON"""
+    global PROFILE
+    import tracemalloc
+
+    command_phase.__exit__(None, None, None)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_cprofile)
+    tracemalloc.stop()
+
+    report = profile_report(PROFILE)
+    PROFILE = None
+    if args.profile_output:
+        with open(args.profile_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Profil zapisano do {args.profile_output}", file=sys.stderr)
+    else:
+        print(format_profile(report), file=sys.stderr)
+    if profiler is not None:
+        print(f"Profil cProfile zapisano do {args.profile_cprofile} (python -m pstats {args.profile_cprofile})",
+              file=sys.stderr)
+
+def profile_report(profile):
+    """Build profile report: phases in call order with total and own (without child phases) time"""
+    phases = profile["phases"]
+    child_seconds = {}
+    for path, stats in phases.items():
+        if len(path) > 1:
+            child_seconds[path[:-1]] = child_seconds.get(path[:-1], 0.0) + stats["seconds"]
+
+    root = phases[("command",)]
+    return {
+        "command": profile["command"],
+        "total_ms": round(root["seconds"] * 1000, 3),
+        "peak_kb": root["peak"] // 1024,
+        "phases": [
+            {
+                "phase": "/".join(path),
+                "depth": len(path) - 1,
+                "calls": stats["calls"],
+                "ms": round(stats["seconds"] * 1000, 3),
+                "self_ms": round((stats["seconds"] - child_seconds.get(path, 0.0)) * 1000, 3),
+                "peak_kb": stats["peak"] // 1024,
+            }
+            for path, stats in phases.items()
+        ]
+    }
+
+def format_profile(report):
+    """Format profile report as a table, child phases indented under their parent"""
+    lines = [f"=== PROFIL: {report['command']} ===",
+             f"{'Faza':<32} {'Wywołania':>9} {'Czas ms':>10} {'Własny ms':>10} {'Szczyt pamięci':>15}",
+             "-" * 80]
+    for phase in report["phases"]:
+        name = "  " * phase["depth"] + phase["phase"].rsplit("/", 1)[-1]
+        lines.append(f"{name:<32} {phase['calls']:>9} {phase['ms']:>10.2f} {phase['self_ms']:>10.2f} "
+                     f"{phase['peak_kb'] / 1024:>12.2f} MB")
+    lines.append("-" * 80)
+    lines.append(f"Razem: {report['total_ms']:.2f} ms, szczyt pamięci {report['peak_kb'] / 1024:.2f} MB "
+                 "(czasy zmierzone przy włączonym tracemalloc)")
+    return "\n".join(lines)
+
+# === ENTRIES ===
+
+@functools.lru_cache(maxsize=None)
+def date_to_day(date_str):
+    """Get day number (date.toordinal()) of a YYYY-MM-DD date"""
+    from datetime import date
+
+    return date.fromisoformat(date_str).toordinal()
+
+@functools.lru_cache(maxsize=None)
+def day_to_date(day):
+    """Get YYYY-MM-DD date of a day number, one string object per day"""
+    from datetime import date
+
+    return date.fromordinal(day).isoformat()
+
+class Entry:
+    """Entry of a data list with its fields in slots, readable like the dict it replaces
+
+    Fields are attributes (t.amount), and item["amount"], get(), update()
+    and dict(item) work as on the dicts kept in files and change records,
+    so storage, journal and API code handles both. Dates are kept as day
+    numbers and categories are interned: rows of one day or category share
+    one string.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    @classmethod
+    def from_dict(cls, item):
+        """Create from a dict with exactly the fields of the type, TypeError otherwise"""
+        return cls(**item)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        setattr(self, field, sys.intern(value) if field == "category" else value)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in self.FIELDS else default
+
+    def update(self, fields):
+        for field, value in fields.items():
+            self[field] = value
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.FIELDS]
+
+    def __contains__(self, field):
+        return field in self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Entry):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class DatedEntry(Entry):
+    """Entry with a date, stored as a day number"""
+
+    __slots__ = ("day",)
+
+    @property
+    def date(self):
+        return day_to_date(self.day)
+
+    @date.setter
+    def date(self, value):
+        self.day = date_to_day(value)
+
+class Transaction(DatedEntry):
+    """Expense"""
+
+    __slots__ = ("id", "amount", "category", "description")
+    FIELDS = ("id", "date", "amount", "category", "description")
+
+    def __init__(self, id, date, amount, category, description):
+        self.id = id
+        self.day = date_to_day(date)
+        self.amount = amount
+        self.category = sys.intern(category)
+        self.description = description
+
+    def to_dict(self):
+        return {"id": self.id, "date": day_to_date(self.day), "amount": self.amount, "category": self.category,
+                "description": self.description}
+
+class Income(DatedEntry):
+    """One-time income"""
+
+    __slots__ = ("id", "amount", "description")
+    FIELDS = ("id", "date", "amount", "description")
+
+    def __init__(self, id, date, amount, description):
+        self.id = id
+        self.day = date_to_day(date)
+        self.amount = amount
+        self.description = description
+
+    def to_dict(self):
+        return {"id": self.id, "date": day_to_date(self.day), "amount": self.amount, "description": self.description}
+
+class FixedCost(Entry):
+    """Fixed monthly cost"""
+
+    __slots__ = ("id", "amount", "category", "description")
+    FIELDS = ("id", "amount", "category", "description")
+
+    def __init__(self, id, amount, category, description):
+        self.id = id
+        self.amount = amount
+        self.category = sys.intern(category)
+        self.description = description
+
+    def to_dict(self):
+        return {"id": self.id, "amount": self.amount, "category": self.category, "description": self.description}
+
+ENTRY_TYPES = {"transactions": Transaction, "one_time_income": Income, "fixed_costs": FixedCost}
+
+def as_entry(key, item):
+    """Get an entry dict of a list as its entry object; entries, tombstones and other lists stay as they are"""
+    entry_type = ENTRY_TYPES.get(key)
+    if entry_type is None or item is None or isinstance(item, Entry):
+        return item
+    return entry_type.from_dict(item)
+
+def to_entries(sections):
+    """Turn entry dicts of loaded lists into entry objects in place, lists not read yet on first access"""
+    for key, entry_type in ENTRY_TYPES.items():
+        if not dict.__contains__(sections, key):
+            continue
+        items = dict.__getitem__(sections, key)
+        position = 0
+        try:
+            # Replacing one by one frees each dict right away
+            for position, item in enumerate(items):
+                if item is not None and not isinstance(item, Entry):
+                    items[position] = entry_type(**item)
+        except (ValueError, TypeError):
+            print(f"BŁĄD: Nieprawidłowy wpis w danych ({key})")
+            print(f"Podano: {items[position]}")
+            print("Popraw wpis w pliku danych lub przywróć go z backupu (.bak)")
+            sys.exit(1)
+
+    if isinstance(sections, LazyData) and sections.lazy_keys:
+        loader = sections.loader
+        sections.loader = lambda: to_entries(loader())
+    return sections
+
+def entries_as_dicts(sections):
+    """Copy of sections with entry lists as lists of dicts, for the indented (pure Python) JSON encoder
+
+    Passing entries through json default costs two more generator levels
+    for every value written, converting whole lists first is faster.
+    """
+    return {key: [item.to_dict() if isinstance(item, Entry) else item for item in value] if key in ENTRY_TYPES else value
+            for key, value in sections.items()}
+
+def entry_json(value):
+    """json.dumps default: entries are written as the dicts they replace"""
+    if isinstance(value, Entry):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# === STORAGE ===
+
+def create_empty_data():
+    """Create initial empty data structure"""
+    return {
+        "amount_unit": "grosze",
+        "limits": {
+            "default": 500000
+        },
+        "auto_apply_fixed_costs": True,
+        "applied_fixed_costs_months": [],
+        "next_transaction_id": 1,
+        "transactions": [],
+        "next_fixed_cost_id": 1,
+        "fixed_costs": [],
+        "initial_balance": 0,
+        "next_income_id": 1,
+        "recurring_income": [],
+        "one_time_income": [],
+        "auto_apply_recurring_income": True,
+        "applied_recurring_income_months": [],
+        "aggregates": empty_aggregates(0)
+    }
+
+@profiled("migrate")
+def migrate_data(data):
+    """Migrate old data structure to new format"""
+    migrated = False
+
+    # Migrate limit to limits
+    if "limit" in data and "limits" not in data:
+        data["limits"] = {
+            "default": data["limit"]
+        }
+        del data["limit"]
+        migrated = True
+
+    # Ensure limits structure exists
+    if "limits" not in data:
+        data["limits"] = {"default": 5000}
+        migrated = True
+
+    # Add auto_apply_fixed_costs if missing
+    if "auto_apply_fixed_costs" not in data:
+        data["auto_apply_fixed_costs"] = True
+        migrated = True
+
+    # Add applied_fixed_costs_months if missing
+    if "applied_fixed_costs_months" not in data:
+        data["applied_fixed_costs_months"] = []
+        migrated = True
+
+    # Add IDs to transactions
+    if "next_transaction_id" not in data:
+        next_id = 1
+        for transaction in data.get("transactions", []):
+            if "id" not in transaction:
+                transaction["id"] = next_id
+                next_id += 1
+        data["next_transaction_id"] = next_id
+        migrated = True
+
+    # Add IDs to fixed costs
+    if "next_fixed_cost_id" not in data:
+        next_id = 1
+        for fixed_cost in data.get("fixed_costs", []):
+            if "id" not in fixed_cost:
+                fixed_cost["id"] = next_id
+                next_id += 1
+        data["next_fixed_cost_id"] = next_id
+        migrated = True
+
+    # Add initial_balance if missing
+    if "initial_balance" not in data:
+        data["initial_balance"] = 0.0
+        migrated = True
+
+    # Add recurring_income if missing
+    if "recurring_income" not in data:
+        data["recurring_income"] = []
+        migrated = True
+
+    # Add one_time_income if missing
+    if "one_time_income" not in data:
+        data["one_time_income"] = []
+        migrated = True
+
+    # Add auto_apply_recurring_income if missing
+    if "auto_apply_recurring_income" not in data:
+        data["auto_apply_recurring_income"] = True
+        migrated = True
+
+    # Add applied_recurring_income_months if missing
+    if "applied_recurring_income_months" not in data:
+        data["applied_recurring_income_months"] = []
+        migrated = True
+
+    # Add IDs to income entries
+    if "next_income_id" not in data:
+        next_id = 1
+        for income in data.get("recurring_income", []):
+            if "id" not in income:
+                income["id"] = next_id
+                next_id += 1
+        for income in data.get("one_time_income", []):
+            if "id" not in income:
+                income["id"] = next_id
+                next_id += 1
+        data["next_income_id"] = next_id
+        migrated = True
+
+    # Convert amounts from PLN floats to integer grosze
+    if data.get("amount_unit") != "grosze":
+        rounded = convert_amounts_to_grosze(data)
+        if rounded:
+            print(f"Uwaga: zaokrąglono do pełnych groszy kwoty z więcej niż 2 miejscami po przecinku (liczba: {rounded})")
+        data["amount_unit"] = "grosze"
+        # Aggregates were kept in PLN, rebuild them below
+        data.pop("aggregates", None)
+        migrated = True
+
+    # Build materialized aggregates if missing
+    if "aggregates" not in data:
+        data["aggregates"] = build_aggregates(data)
+        migrated = True
+
+    return migrated
+
+@profiled("load")
+def load_data(path, defer_save=False, months=None):
+    """Load data from storage file, create if doesn't exist
+
+    Migration and auto-apply changes are written once at the end. With
+    defer_save=True they stay pending and are written by the caller's save_data.
+    months limits which month partitions are read (None = all); the current
+    month is always included. Backends without partitions read everything.
+    """
+    # A running daemon keeps the whole data in memory
+    if RESIDENT is not None and RESIDENT["path"] == path:
+        return finish_load(RESIDENT["data"], path, defer_save)
+    # Commands of a batch share the data loaded by the batch, the batch saves it
+    if BATCH is not None and BATCH["path"] == path:
+        return finish_load(BATCH["data"], path, defer_save=True)
+    return read_data_file(path, defer_save, months)
+
+def read_data_file(path, defer_save=False, months=None):
+    """Load data from the storage file like load_data, also when it is held in memory"""
+    storage = get_storage(path)
+
+    # Step 1-2: Check if file exists, if not create empty data
+    if not os.path.exists(path):
+        # Step 3: Create empty data
+        data = create_empty_data()
+        # Step 4: Save to file
+        storage["create"](data, path)
+        # Step 5: Return created dict
+        return data
+
+    # Step 6-13: File exists, read it with the storage backend
+    if months is not None:
+        months = set(months) | {get_current_month()}
+    data = storage["read"](path, months)
+
+    # Step 14: Migrate data if needed
+    migrated = migrate_data(data)
+    if migrated:
+        print("Migracja struktury danych do nowego formatu...")
+        # Migration is not expressed as change records, so a full rewrite is needed
+        data["_needs_snapshot"] = True
+        # Printed by save_data once the migrated data is written - a command
+        # that fails before saving leaves the file as it was
+        data["_notices"] = ["Migracja zakończona. Dane zostały zaktualizowane."]
+
+    return finish_load(to_entries(data), path, defer_save)
+
+def finish_load(data, path, defer_save):
+    """Auto-apply fixed costs and recurring income for the current month, save pending changes"""
+    # Step 15: Auto-apply fixed costs if needed
+    count, total = auto_apply_fixed_if_needed(data)
+    if count > 0:
+        print(f"Automatycznie dodano {count} kosztów stałych ({to_pln(total):.2f} PLN) dla bieżącego miesiąca")
+
+    # Step 15a: Auto-apply recurring income if needed
+    income_count, income_total = auto_apply_recurring_income_if_needed(data)
+    if income_count > 0:
+        print(f"Automatycznie dodano {income_count} przychodów cyklicznych ({to_pln(income_total):.2f} PLN) dla bieżącego miesiąca")
+
+    # Step 15b: Write all pending changes at once
+    if has_pending_changes(data) and not defer_save:
+        save_data(data, path)
+
+    # Step 16: Return data
+    return data
+
+def auto_apply_due(data):
+    """Check if loading data would add fixed costs or recurring income for the current month"""
+    month_str = get_current_month()
+    for flag, applied, entries in (("auto_apply_fixed_costs", "applied_fixed_costs_months", "fixed_costs"),
+                                   ("auto_apply_recurring_income", "applied_recurring_income_months", "recurring_income")):
+        if data.get(flag, True) and month_str not in data.get(applied, []) and data.get(entries):
+            return True
+    return False
+
+@profiled("save")
+def save_data(data, path):
+    """Save data with the storage backend matching the file"""
+    compact_deleted(data)
+    # Changes of a batch command stay pending until the batch saves them all
+    if BATCH is not None and BATCH["path"] == path:
+        return
+    checkpoint_closed_months(data)
+    bump_generation(data, path)
+    update_search_file(data, path, data.get("_changes", []))
+    get_storage(path)["save"](data, path)
+    note_resident_save(path)
+    print_notices(data)
+
+def print_notices(data):
+    """Print messages that were waiting for the data to be written"""
+    for notice in data.pop("_notices", []):
+        print(notice)
+
+def has_pending_changes(data):
+    """Check if data has changes that were not saved yet"""
+    return bool(data.get("_changes")) or data.get("_needs_snapshot", False)
+
+@profiled("compact")
+def compact_storage(data, path):
+    """Rewrite storage file in its most compact form"""
+    compact_deleted(data)
+    bump_generation(data, path)
+    update_search_file(data, path, data.get("_changes", []))
+    get_storage(path)["compact"](data, path)
+    note_resident_save(path)
+    print_notices(data)
+
+def get_storage(path):
+    """Get storage backend for a data file based on its name"""
+    if os.path.splitext(path)[1] == ".db":
+        return STORAGE_BACKENDS["sqlite"]
+    if os.path.basename(path) == os.path.basename(MANIFEST_FILE):
+        return STORAGE_BACKENDS["partitioned"]
+    if os.path.splitext(path)[1] == ".bin":
+        return STORAGE_BACKENDS["binary"]
+    return STORAGE_BACKENDS["json"]
+
+def resolve_data_file():
+    """Get data file to use - SQLite database, partition manifest or binary file once migrated, JSON otherwise"""
+    if os.path.exists(SQLITE_FILE):
+        return SQLITE_FILE
+    if os.path.exists(MANIFEST_FILE):
+        return MANIFEST_FILE
+    if os.path.exists(BINARY_FILE):
+        return BINARY_FILE
+    return DATA_FILE
+
+# === LOCKING ===
+
+class StaleDataError(Exception):
+    """Data file was saved by another writer after this command loaded it"""
+
+class DataLock:
+    """Hold the exclusive lock of the data directory for a whole load-modify-save cycle
+
+    Nested locks in the same process reuse the outermost one. Systems without
+    fcntl run unlocked and rely on the generation check alone.
+    """
+
+    depth = 0
+    handle = None
+
+    def __enter__(self):
+        if DataLock.depth == 0:
+            DataLock.handle = acquire_lock(LOCK_FILE)
+        DataLock.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        DataLock.depth -= 1
+        if DataLock.depth == 0 and DataLock.handle is not None:
+            # Closing the file releases the lock
+            DataLock.handle.close()
+            DataLock.handle = None
+        return False
+
+@profiled("lock")
+def acquire_lock(path, timeout=LOCK_TIMEOUT):
+    """Take an exclusive lock on the lock file, waiting at most timeout seconds
+
+    Returns the open lock file, or None when it cannot be opened.
+    """
+    handle = open_lock(path)
+    deadline = time.monotonic() + timeout
+    pause = 0.001
+    while handle is not None and not try_lock(handle):
+        if time.monotonic() >= deadline:
+            handle.close()
+            print(f"BŁĄD: Dane są zablokowane przez inną komendę budżetu dłużej niż {timeout} s ({path}).")
+            print("Poczekaj na jej zakończenie i spróbuj ponownie.")
+            sys.exit(1)
+        time.sleep(pause)
+        pause = min(pause * 2, LOCK_POLL_MAX)
+    return handle
+
+def open_lock(path):
+    """Open the lock file, None when it cannot be created"""
+    try:
+        return open(path, 'a')
+    except OSError:
+        # No data directory - the command reports it when it reaches the data file
+        return None
+
+def try_lock(handle):
+    """Take the exclusive lock on an open lock file if it is free, without waiting"""
+    try:
+        import fcntl
+    except ImportError:
+        # Nothing to wait for, the generation check alone guards the saves
+        return True
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+@profiled("check_generation")
+def bump_generation(data, path):
+    """Check that the file was not saved by another writer since data was loaded, count this save
+
+    Raises StaleDataError when the stored generation differs from the loaded one.
+    """
+    loaded = data.get("generation", 0)
+    if os.path.exists(path):
+        stored = get_storage(path)["generation"](path)
+        if stored != loaded:
+            raise StaleDataError(f"wczytana generacja {loaded}, w pliku {stored}")
+    commit_change(data, {"op": "set", "key": "generation", "value": loaded + 1})
+
+def retry_stale(func):
+    """Call func holding the data lock, call it again when another writer saved in between"""
+    for attempt in range(1, STALE_RETRIES + 1):
+        try:
+            with DataLock():
+                if RESIDENT is not None:
+                    import server
+                    server.refresh_resident()
+                return func()
+        except StaleDataError as e:
+            # Resident data holds the rejected changes - reload it from the file
+            if RESIDENT is not None:
+                RESIDENT["signature"] = None
+            if attempt == STALE_RETRIES:
+                raise
+            print(f"Uwaga: dane zostały zapisane przez inny proces ({e}), ponawiam komendę", file=sys.stderr)
+
+def run_locked(args):
+    """Run a parsed subcommand under the data lock, retrying it on stale data"""
+    try:
+        retry_stale(lambda: run_command(args))
+    except StaleDataError as e:
+        print(f"BŁĄD: Dane były zmieniane przez inny proces w trakcie każdej z {STALE_RETRIES} prób ({e}).")
+        print("Zmiana nie została zapisana. Spróbuj ponownie.")
+        sys.exit(1)
+
+# === LAZY DATA ===
+
+class LazyData(dict):
+    """Data dict whose big lists are read from storage only on first access
+
+    Any access to a lazy key (indexing, get, pop, iteration over the whole
+    dict) calls loader, which returns {key: list} for the lazy keys.
+    """
+
+    def __init__(self, sections, loader, lazy_keys):
+        super().__init__(sections)
+        self.loader = loader
+        self.lazy_keys = {key for key in lazy_keys if key not in sections}
+
+    def materialize(self):
+        """Read all lazy lists now"""
+        if not self.lazy_keys:
+            return
+        keys, self.lazy_keys = self.lazy_keys, set()
+        with ProfilePhase("materialize"):
+            loaded = self.loader()
+        for key in keys:
+            dict.__setitem__(self, key, loaded.get(key, []))
+
+    def __missing__(self, key):
+        if key in self.lazy_keys:
+            self.materialize()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.lazy_keys or dict.__contains__(self, key)
+
+    def __setitem__(self, key, value):
+        self.lazy_keys.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def get(self, key, default=None):
+        if key in self.lazy_keys:
+            self.materialize()
+        return dict.get(self, key, default)
+
+    def pop(self, key, *default):
+        if key in self.lazy_keys:
+            self.materialize()
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key in self.lazy_keys:
+            self.materialize()
+        return dict.setdefault(self, key, default)
+
+    def __iter__(self):
+        self.materialize()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.materialize()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self.materialize()
+        return dict.values(self)
+
+    def items(self):
+        self.materialize()
+        return dict.items(self)
+
+    def copy(self):
+        self.materialize()
+        return dict(dict.items(self))
+
+# === JSON STORAGE ===
+
+# Marker of files written with small sections first and the big lists last
+JSON_LAYOUT = "sections-first"
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAMED_KEYS = ("transactions", "one_time_income")
+
+def create_json_data(data, path):
+    """Create new JSON data file"""
+    write_json_atomic(json_layout(data), path)
+
+def json_layout(snapshot):
+    """Order snapshot for the JSON file: layout marker, small sections, then the big lists"""
+    ordered = {"layout": JSON_LAYOUT}
+    ordered.update((k, v) for k, v in snapshot.items() if k not in STREAMED_KEYS)
+    for key in STREAMED_KEYS:
+        if key in snapshot:
+            ordered[key] = snapshot[key]
+    return ordered
+
+@profiled("parse")
+def read_json_file(path):
+    """Read whole JSON data file"""
+    # Step 6-7: File exists, try to read it
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    # Step 8-10: Handle corrupted JSON
+    except json.JSONDecodeError:
+        print(f"BŁĄD: Plik {path} jest uszkodzony (nieprawidłowy JSON).")
+        print(f"Sprawdź składnię lub przywróć z backupu: {path}.bak")
+        print("Nie próbowano nadpisać pliku.")
+        sys.exit(1)
+
+@profiled("parse_sections")
+def read_json_sections(path):
+    """Read only the small sections of a sections-first JSON file, None for other layouts"""
+    import streaming
+
+    sections = {}
+    try:
+        for _ in streaming.iter_json_records(path, None, sections, head_only=True):
+            pass
+    except json.JSONDecodeError:
+        return None
+    if sections.pop("layout", None) != JSON_LAYOUT:
+        return None
+    return LazyData(sections, lambda: read_json_file(path), STREAMED_KEYS)
+
+@profiled("read")
+def read_json_data(path, months=None):
+    """Read and validate data from JSON file, replay journal
+
+    When months is given the command needs at most a few months, so the
+    transaction and income lists are left to be read on first access.
+    """
+    data = read_json_sections(path) if months is not None else None
+    if data is None:
+        data = read_json_file(path)
+        data.pop("layout", None)
+
+    # Step 11-13: Validate basic structure
+    if "transactions" not in data or "fixed_costs" not in data:
+        print(f"BŁĄD: Plik {path} ma nieprawidłową strukturę.")
+        print("Wymagane pola: transactions, fixed_costs")
+        print(f"Sprawdź plik lub przywróć z backupu: {path}.bak")
+        sys.exit(1)
+
+    # Step 13a: Replay journal of changes made since the last snapshot
+    if os.path.exists(journal_path(path)):
+        import journal
+        journal.replay_journal(data, path)
+
+    return data
+
+def save_json_data(data, path):
+    """Save data - append pending changes to the journal or write a full snapshot"""
+    changes = data.pop("_changes", [])
+    needs_snapshot = data.pop("_needs_snapshot", False)
+
+    # Journal mode: append only the changes made by this command
+    if JOURNAL_MODE and changes and not needs_snapshot and os.path.exists(path):
+        import journal
+        journal.append_journal(path, changes)
+        if os.path.getsize(journal_path(path)) > JOURNAL_COMPACT_SIZE:
+            compact_data(data, path)
+        return
+
+    compact_data(data, path)
+
+def write_snapshot(data, path):
+    """Write full data snapshot to JSON file with backup"""
+    # Step 1-2: Create backup if file exists
+    if os.path.exists(path):
+        backup_file(path)
+
+    # Lists this command never read are copied from the old file as they are
+    if isinstance(data, LazyData) and data.lazy_keys and write_sections_atomic(data, path):
+        return
+
+    # Step 3-4: Save file atomically
+    write_json_atomic(json_layout(snapshot_of(data)), path)
+
+def write_json_atomic(data, path):
+    """Write JSON to a temp file, fsync it and swap it in with os.replace"""
+    with ProfilePhase("serialize"):
+        content = json.dumps(entries_as_dicts(data), indent=2).encode('utf-8')
+    write_atomic(path, lambda f: f.write(content))
+
+def write_sections_atomic(data, path):
+    """Rewrite the small sections of a sections-first file, copy the big lists byte for byte
+
+    Returns False when the lists cannot be located and a full write is needed.
+    """
+    offset = find_lists_offset(path)
+    if offset is None:
+        return False
+
+    # dict.items() sees only what was loaded, without materializing the lists
+    sections = json_layout({k: v for k, v in dict.items(data) if not k.startswith("_")})
+    head = json.dumps(sections, indent=2, default=entry_json)
+
+    def write_content(f):
+        import shutil
+
+        # Replace the closing brace of the sections with the lists of the old file
+        f.write(head[:-2].encode('utf-8') + b",\n")
+        with open(path, 'rb') as old:
+            old.seek(offset)
+            shutil.copyfileobj(old, f)
+
+    write_atomic(path, write_content)
+    return True
+
+def find_lists_offset(path):
+    """Get byte offset of the first big list in a sections-first JSON file, None if not found"""
+    # Top-level keys are the only ones indented by exactly two spaces
+    markers = [f'\n  "{key}": ['.encode('utf-8') for key in STREAMED_KEYS]
+    head = b""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return None
+            start = max(0, len(head) - 32)
+            head += chunk
+            found = [pos for pos in (head.find(marker, start) for marker in markers) if pos >= 0]
+            if found:
+                return min(found) + 1
+
+@profiled("write")
+def write_atomic(path, write_content):
+    """Write file content to a temp file, fsync it and swap it in with os.replace"""
+    tmp_path = str(path) + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            write_content(f)
+            f.flush()
+            with ProfilePhase("fsync"):
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    # Handle permission errors
+    except PermissionError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        print(f"BŁĄD: Nie można zapisać do pliku {path}")
+        print("Plik jest otwarty w innym programie. Zamknij edytor i spróbuj ponownie.")
+        sys.exit(1)
+
+@profiled("backup")
+def backup_file(path):
+    """Keep current file as .bak - hard link since the file is replaced, not rewritten"""
+    backup_path = str(path) + '.bak'
+    tmp_path = backup_path + '.tmp'
+    try:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        os.link(path, tmp_path)
+        os.replace(tmp_path, backup_path)
+    except OSError:
+        # Filesystem without hard links
+        import shutil
+        shutil.copy2(path, backup_path)
+
+def snapshot_of(data):
+    """Return data without in-memory keys (prefixed with '_')"""
+    return {k: v for k, v in data.items() if not k.startswith("_")}
+
+def journal_path(path):
+    """Get path of the change journal kept next to the data file"""
+    return str(path) + JOURNAL_SUFFIX
+
+def compact_data(data, path):
+    """Fold the journal into a full snapshot and remove the journal"""
+    write_snapshot(data, path)
+    jpath = journal_path(path)
+    if os.path.exists(jpath):
+        os.unlink(jpath)
+
+def read_json_generation(path):
+    """Get save generation of a JSON data file with its journal"""
+    # The counter is written only in the sections-first layout, older files have none
+    sections = read_json_sections(path)
+    generation = sections.get("generation", 0) if sections is not None else 0
+    if os.path.exists(journal_path(path)):
+        import journal
+        for change in journal.read_journal(path):
+            if change["op"] == "set" and change["key"] == "generation":
+                generation = change["value"]
+    return generation
+
+# === ID INDEX ===
+
+def get_id_index(data, key):
+    """Get ID -> list position index for a list, build it on first use"""
+    indexes = data.setdefault("_index", {})
+    if key not in indexes:
+        index = {}
+        for position, item in enumerate(data[key]):
+            if item is not None:
+                index.setdefault(item.get("id"), position)
+        indexes[key] = index
+    return indexes[key]
+
+def find_item(data, key, item_id):
+    """Find item with given ID in a list, return None if not found"""
+    position = get_id_index(data, key).get(item_id)
+    if position is None:
+        return None
+    return data[key][position]
+
+def compact_deleted(data):
+    """Drop tombstones left by deletions and rebuild indexes of affected lists"""
+    for key in data.pop("_tombstones", set()):
+        data[key][:] = [item for item in data[key] if item is not None]
+        data["_index"].pop(key, None)
+        data.get("_date_index", {}).pop(key, None)
+
+# === DATE INDEX ===
+
+def month_range(month_str):
+    """Get [start, end) string range matching dates that start with month_str"""
+    return (month_str, month_str + "~")
+
+def month_of(date_str):
+    """Get YYYY-MM month of a YYYY-MM-DD date"""
+    return date_str[:7]
+
+def get_date_index(data, key):
+    """Get (dates, positions) of a list's entries sorted by date, build it on first use"""
+    indexes = data.setdefault("_date_index", {})
+    if key not in indexes:
+        # Entries are mostly added in date order, so the sort is close to linear
+        order = sorted((item["date"], position) for position, item in enumerate(data[key])
+                       if item is not None and isinstance(item.get("date"), str))
+        indexes[key] = ([date_str for date_str, _ in order], [position for _, position in order])
+    return indexes[key]
+
+def index_date(data, key, date_str, position):
+    """Add a list position to the date index, if the index is built"""
+    from bisect import bisect_right
+
+    index = data.get("_date_index", {}).get(key)
+    if index is None or not isinstance(date_str, str):
+        return
+    dates, positions = index
+    at = bisect_right(dates, date_str)
+    dates.insert(at, date_str)
+    positions.insert(at, position)
+
+def unindex_date(data, key, date_str, position):
+    """Remove a list position from the date index, if the index is built"""
+    from bisect import bisect_left
+
+    index = data.get("_date_index", {}).get(key)
+    if index is None or not isinstance(date_str, str):
+        return
+    dates, positions = index
+    at = bisect_left(dates, date_str)
+    while at < len(dates) and dates[at] == date_str:
+        if positions[at] == position:
+            del dates[at]
+            del positions[at]
+            return
+        at += 1
+
+def select_by_date(data, key, start, end):
+    """Get entries with start <= date < end in list (ID) order, using the date index"""
+    from bisect import bisect_left
+
+    dates, positions = get_date_index(data, key)
+    items = data[key]
+    return [items[position] for position in sorted(positions[bisect_left(dates, start):bisect_left(dates, end)])]
+
+# === SEARCH INDEX ===
+
+SEARCH_KEYS = ("transactions", "one_time_income")
+SEARCH_FIELDS = {"description", "category"}
+SEARCH_TOKEN = re.compile(r"[a-z0-9]+")
+# Letters NFKD does not split into a base letter and a combining accent
+SEARCH_FOLD = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss"})
+
+def fold_text(text):
+    """Lowercase text and strip diacritics ('Żabka Łódź' -> 'zabka lodz')"""
+    import unicodedata
+
+    decomposed = unicodedata.normalize("NFKD", text.lower().translate(SEARCH_FOLD))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+@functools.lru_cache(maxsize=65536)
+def text_tokens(text):
+    """Get folded words of a text"""
+    return frozenset(SEARCH_TOKEN.findall(fold_text(text)))
+
+def search_tokens(item):
+    """Get folded words of an entry's description and category"""
+    return text_tokens(f"{item.get('description', '')} {item.get('category', '')}")
+
+def index_search(data, key, item, sign):
+    """Add (sign=1) or remove (sign=-1) an entry's tokens in the search index, if the index is built"""
+    index = data.get("_search_index", {}).get(key)
+    if index is None:
+        return
+    for token in search_tokens(item):
+        if sign > 0:
+            index.setdefault(token, set()).add(item["id"])
+        elif token in index:
+            index[token].discard(item["id"])
+            if not index[token]:
+                del index[token]
+
+def search_path(path):
+    """Get path of the search index kept next to the data file"""
+    return str(path) + SEARCH_SUFFIX
+
+def update_search_file(data, path, changes):
+    """Log entries touched by a save for the saved search index, if there is one"""
+    if os.path.exists(search_path(path)):
+        import text_search
+        text_search.log_saved_changes(data, path, changes)
+
+# === CHANGES ===
+
+def apply_change(data, change):
+    """Apply a single change record to data"""
+    op = change["op"]
+    key = change["key"]
+
+    if op == "set":
+        if key == "initial_balance":
+            update_aggregate_balance(data, change["value"] - data.get(key, 0))
+        value = change["value"]
+        data[key] = [as_entry(key, item) for item in value] if key in ENTRY_TYPES else value
+        data.get("_index", {}).pop(key, None)
+        data.get("_date_index", {}).pop(key, None)
+        if key in SEARCH_KEYS:
+            # The saved index is dropped on save too, the next search builds both again
+            data.pop("_search_index", None)
+    elif op == "append":
+        # The change record keeps the same object as the list
+        item = change["item"] = as_entry(key, change["item"])
+        data[key].append(item)
+        if key in data.get("_index", {}):
+            data["_index"][key].setdefault(item.get("id"), len(data[key]) - 1)
+        index_date(data, key, item.get("date"), len(data[key]) - 1)
+        index_search(data, key, item, 1)
+        update_aggregates(data, key, item, 1)
+    elif op == "update":
+        item = find_item(data, key, change["id"])
+        if item is not None:
+            update_aggregates(data, key, item, -1)
+            # Back-dated edits move the entry within the date index
+            if "date" in change["fields"]:
+                position = get_id_index(data, key)[change["id"]]
+                unindex_date(data, key, item.get("date"), position)
+                index_date(data, key, change["fields"]["date"], position)
+            retokenize = not SEARCH_FIELDS.isdisjoint(change["fields"])
+            if retokenize:
+                index_search(data, key, item, -1)
+            item.update(change["fields"])
+            if retokenize:
+                index_search(data, key, item, 1)
+            update_aggregates(data, key, item, 1)
+    elif op == "remove":
+        # Leave a tombstone instead of shifting the list, compact_deleted cleans up before save
+        position = get_id_index(data, key).pop(change["id"], None)
+        if position is not None:
+            update_aggregates(data, key, data[key][position], -1)
+            unindex_date(data, key, data[key][position].get("date"), position)
+            index_search(data, key, data[key][position], -1)
+            data[key][position] = None
+            data.setdefault("_tombstones", set()).add(key)
+
+def commit_change(data, change):
+    """Apply a change to data and remember it for the next save"""
+    apply_change(data, change)
+    if change["op"] == "set" and isinstance(change["value"], (dict, list)):
+        # The record is written at save time, later changes to the live value must not reach it
+        import copy
+        change = dict(change, value=copy.deepcopy(change["value"]))
+    data.setdefault("_changes", []).append(change)
+
+# === STORAGE BACKENDS ===
+
+def storage_call(module, name):
+    """Get a function of a storage module that imports the module when called"""
+    def call(*args):
+        import importlib
+        return getattr(importlib.import_module(module), name)(*args)
+    return call
+
+def sqlite_for_query(data):
+    """Get SQLite connection if entries can be queried in SQL"""
+    # Unsaved changes exist only in memory, so SQL would miss them
+    if data.get("_changes"):
+        return None
+    return data.get("_sqlite")
+
+STORAGE_BACKENDS = {
+    "json": {
+        "create": create_json_data,
+        "read": read_json_data,
+        "save": save_json_data,
+        "compact": compact_data,
+        "generation": read_json_generation,
+    },
+    "sqlite": {
+        "create": storage_call("sqlite_storage", "create_sqlite_data"),
+        "read": storage_call("sqlite_storage", "read_sqlite_data"),
+        "save": storage_call("sqlite_storage", "save_sqlite_data"),
+        "compact": storage_call("sqlite_storage", "compact_sqlite_data"),
+        "generation": storage_call("sqlite_storage", "read_sqlite_generation"),
+    },
+    "partitioned": {
+        "create": storage_call("partitioned_storage", "create_partitioned_data"),
+        "read": storage_call("partitioned_storage", "read_partitioned_data"),
+        "save": storage_call("partitioned_storage", "save_partitioned_data"),
+        "compact": storage_call("partitioned_storage", "compact_partitioned_data"),
+        "generation": storage_call("partitioned_storage", "read_partitioned_generation"),
+    },
+    "binary": {
+        "create": storage_call("binary_storage", "create_binary_data"),
+        "read": storage_call("binary_storage", "read_binary_data"),
+        "save": storage_call("binary_storage", "save_binary_data"),
+        "compact": storage_call("binary_storage", "compact_binary_data"),
+        "generation": storage_call("binary_storage", "read_binary_generation"),
+    },
+}
+
+# === ARCHIVE ===
+
+def archived_entries(data, year):
+    """Get {key: entries} of an archived year, see archives.read_archive"""
+    import archives
+    return archives.read_archive(data, year)
+
+def archived_years_between(data, start, end):
+    """Get archived years that may hold dates with start <= date < end"""
+    # Dates of a year sort between the year itself and year + "~"
+    return [year for year in data.get("archived_years", []) if start < year + "~" and year < end]
+
+def archived_between(data, key, start, end):
+    """Get archived transactions or income with start <= date < end"""
+    found = []
+    for year in archived_years_between(data, start, end):
+        found.extend(item for item in archived_entries(data, year)[key] if start <= item["date"] < end)
+    return found
+
+def print_archived_hint(data, key, item_id):
+    """Tell how to change an entry that was not found because its year is archived"""
+    for year in data.get("archived_years", []):
+        if any(item["id"] == item_id for item in archived_entries(data, year)[key]):
+            print(f"Wpis należy do zarchiwizowanego roku {year}. Aby go zmienić, przywróć rok: "
+                  f"python budget.py unarchive --year {year}")
+            return
+
+# === MONEY ===
+
+def to_grosze(amount):
+    """Convert PLN amount (Decimal, str, int or float) to integer grosze"""
+    from decimal import Decimal, ROUND_HALF_UP
+
+    pln = Decimal(str(amount))
+    return int((pln * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def to_pln(grosze):
+    """Convert integer grosze to Decimal PLN for display"""
+    from decimal import Decimal
+
+    return Decimal(grosze) / 100
+
+def convert_amounts_to_grosze(data):
+    """Convert all PLN amounts in data to grosze, return number of rounded amounts"""
+    from decimal import Decimal
+
+    rounded = 0
+
+    def convert(value):
+        nonlocal rounded
+        grosze = to_grosze(value)
+        if Decimal(grosze) != Decimal(str(value)) * 100:
+            rounded += 1
+        return grosze
+
+    for key in ("transactions", "one_time_income", "fixed_costs", "recurring_income"):
+        for item in data.get(key, []):
+            item["amount"] = convert(item["amount"])
+    data["limits"] = {month: convert(amount) for month, amount in data.get("limits", {}).items()}
+    data["initial_balance"] = convert(data.get("initial_balance", 0))
+    return rounded
+
+# === VALIDATION ===
+
+# The check_* functions raise ValueError with the message, validate_* print it and exit
+
+def check_amount(value):
+    """Check amount is a positive number, return it in grosze"""
+    from decimal import Decimal, InvalidOperation
+
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise ValueError("Kwota musi być liczbą (np. 50.00 lub 50)")
+
+    grosze = to_grosze(amount)
+    if grosze <= 0:
+        raise ValueError("Kwota musi być większa od 0")
+    return grosze
+
+def check_string(value, field_name):
+    """Check string is not empty, return it stripped"""
+    if not value or not value.strip():
+        raise ValueError(f"{field_name} nie może być pusta(y)")
+    return value.strip()
+
+def check_date(value):
+    """Check date is in YYYY-MM-DD format"""
+    from datetime import datetime
+
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+        return value
+    except ValueError:
+        raise ValueError("Data musi być w formacie YYYY-MM-DD (np. 2025-11-24)") from None
+
+def check_month(value):
+    """Check month is in YYYY-MM format"""
+    from datetime import datetime
+
+    try:
+        # strptime also takes 2025-6, which would not compare right with YYYY-MM dates
+        if not re.fullmatch(r"\d{4}-\d{2}", value):
+            raise ValueError
+        datetime.strptime(value, "%Y-%m")
+        return value
+    except ValueError:
+        raise ValueError("Miesiąc musi być w formacie YYYY-MM (np. 2025-11)") from None
+
+def validate_amount(value):
+    """Validate amount is a positive number, return it in grosze"""
+    try:
+        return check_amount(value)
+    except ValueError as e:
+        print(f"BŁĄD: {e}")
+        print(f"Podano: {value}")
+        sys.exit(1)
+
+def validate_string(value, field_name):
+    """Validate string is not empty"""
+    try:
+        return check_string(value, field_name)
+    except ValueError as e:
+        print(f"BŁĄD: {e}")
+        sys.exit(1)
+
+def validate_date(value):
+    """Validate date is in YYYY-MM-DD format, default to today"""
+    if value is None:
+        return time.strftime("%Y-%m-%d")
+    try:
+        return check_date(value)
+    except ValueError as e:
+        print(f"BŁĄD: {e}")
+        print(f"Podano: {value}")
+        sys.exit(1)
+
+def validate_month(value):
+    """Validate month is in YYYY-MM format"""
+    try:
+        return check_month(value)
+    except ValueError as e:
+        print(f"BŁĄD: {e}")
+        print(f"Podano: {value}")
+        sys.exit(1)
+
+def validate_closed_year(value):
+    """Validate year is in YYYY format and already over"""
+    if not re.fullmatch(r"\d{4}", value or ""):
+        print("BŁĄD: Rok musi być w formacie YYYY (np. 2024)")
+        print(f"Podano: {value}")
+        sys.exit(1)
+    if value >= get_current_month()[:4]:
+        print("BŁĄD: Archiwizować można tylko zakończone lata")
+        print(f"Podano: {value}")
+        sys.exit(1)
+    return value
+
+def validate_month_range(start_month, end_month):
+    """Validate optional month range, start must not be after end"""
+    if start_month:
+        validate_month(start_month)
+    if end_month:
+        validate_month(end_month)
+    if start_month and end_month and start_month > end_month:
+        print("BŁĄD: Miesiąc początkowy nie może być późniejszy niż końcowy")
+        print(f"Podano: {start_month} - {end_month}")
+        sys.exit(1)
+
+def validate_date_range(month, from_date, to_date, days):
+    """Validate the period of a listing, return (start, end, months to load) for start <= date < end
+
+    The period is a month (the current one by default), --from/--to dates
+    (open start, today as the end) or the last N days including today.
+    """
+    if sum(value is not None for value in (month, from_date or to_date, days)) > 1:
+        print("BŁĄD: Podaj tylko jeden okres: --month, --from/--to albo --days")
+        sys.exit(1)
+
+    if days is not None:
+        from datetime import date, timedelta
+
+        if days < 1:
+            print("BŁĄD: Liczba dni musi być większa od zera")
+            print(f"Podano: {days}")
+            sys.exit(1)
+        from_date = (date.today() - timedelta(days=days - 1)).isoformat()
+    elif from_date is None and to_date is None:
+        month = month if month else get_current_month()
+        return month_range(month) + ([month],)
+
+    start = validate_date(from_date) if from_date is not None else ""
+    end = validate_date(to_date)
+    if start > end:
+        print("BŁĄD: Data początkowa nie może być późniejsza niż końcowa")
+        print(f"Podano: {start} - {end}")
+        sys.exit(1)
+    # Dates of the last day start with end, so they sort before end + "~"
+    return start, end + "~", month_span(start[:7], end[:7]) if start else None
+
+def validate_search_query(terms):
+    """Validate search terms, return OR-ed groups of words that must all match
+
+    'biedronka OR lidl mleko' gives [['biedronka'], ['lidl', 'mleko']]; a word
+    ending with * matches every word starting with it.
+    """
+    groups = [[]]
+    for term in terms:
+        if term == "OR":
+            groups.append([])
+            continue
+        words = SEARCH_TOKEN.findall(fold_text(term))
+        if words and term.endswith("*"):
+            words[-1] += "*"
+        groups[-1].extend(words)
+
+    if not all(groups):
+        print("BŁĄD: Podaj słowa do wyszukania (litery lub cyfry), alternatywy rozdziel słowem OR")
+        print(f"Podano: {' '.join(terms)}")
+        sys.exit(1)
+    return groups
+
+def validate_amount_range(min_amount, max_amount):
+    """Validate optional amount bounds, return them in grosze (None when not given)"""
+    low = validate_amount(min_amount) if min_amount is not None else None
+    high = validate_amount(max_amount) if max_amount is not None else None
+    if low is not None and high is not None and low > high:
+        print("BŁĄD: Kwota minimalna nie może być większa niż maksymalna")
+        print(f"Podano: {min_amount} - {max_amount}")
+        sys.exit(1)
+    return low, high
+
+# === TRANSACTIONS ===
+
+def get_current_month():
+    """Get current month in YYYY-MM format"""
+    return time.strftime("%Y-%m")
+
+def month_span(start_month, end_month):
+    """Get all months from start to end (inclusive) in YYYY-MM format"""
+    year, month = map(int, start_month.split("-"))
+    months = []
+    while f"{year:04d}-{month:02d}" <= end_month:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def previous_month(month_str):
+    """Get the month before month_str in YYYY-MM format"""
+    year, month = map(int, month_str.split("-"))
+    year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return f"{year:04d}-{month:02d}"
+
+def get_limit_for_month(data, month_str):
+    """Get limit for a specific month, fallback to default"""
+    limits = data.get("limits", {})
+    if month_str in limits:
+        return limits[month_str]
+    return limits.get("default", 500000)
+
+def set_limit(data, amount, month_str=None):
+    """Set limit for a specific month or default"""
+    limits = dict(data.get("limits", {}))
+
+    if month_str is None:
+        limits["default"] = amount
+    else:
+        limits[month_str] = amount
+
+    commit_change(data, {"op": "set", "key": "limits", "value": limits})
+
+def format_limits_list(limits):
+    """Format limits list output"""
+    if not limits:
+        return "Brak ustawionych limitów"
+
+    lines = []
+    lines.append(f"{'Miesiąc':<15} {'Limit':<15}")
+    lines.append("-" * 30)
+
+    # Show default first
+    if "default" in limits:
+        lines.append(f"{'default':<15} {to_pln(limits['default']):.2f} PLN")
+
+    # Show month-specific limits sorted
+    month_limits = {k: v for k, v in limits.items() if k != "default"}
+    for month in sorted(month_limits.keys()):
+        lines.append(f"{month:<15} {to_pln(month_limits[month]):.2f} PLN")
+
+    return "\n".join(lines)
+
+def iter_by_month(transactions, month_str):
+    """Yield transactions from month (YYYY-MM), works on any iterable including streams"""
+    for t in transactions:
+        try:
+            if t["date"].startswith(month_str):
+                yield t
+        except (KeyError, AttributeError):
+            # Skip transactions with invalid dates
+            pass
+
+def filter_by_month(transactions, month_str):
+    """Filter transactions by month (YYYY-MM)"""
+    return list(iter_by_month(transactions, month_str))
+
+def iter_by_dates(transactions, start, end):
+    """Yield transactions with start <= date < end, works on any iterable including streams"""
+    for t in transactions:
+        try:
+            if start <= t["date"] < end:
+                yield t
+        except (KeyError, TypeError):
+            # Skip transactions with invalid dates
+            pass
+
+def calculate_total(transactions):
+    """Calculate total amount from transactions (any iterable)"""
+    total = 0
+    for t in transactions:
+        total += t["amount"]
+    return total
+
+def get_month_transactions(data, month_str):
+    """Get transactions for a month, using the date index when available"""
+    return get_entries_between(data, "transactions", *month_range(month_str))
+
+def get_entries_between(data, key, start, end):
+    """Get transactions or one-time income with start <= date < end in ID order"""
+    conn = sqlite_for_query(data)
+    if conn is None:
+        entries = select_by_date(data, key, start, end)
+    else:
+        import sqlite_storage
+        entries = sqlite_storage.sqlite_entries_between(conn, key, start, end)
+
+    archived = archived_between(data, key, start, end)
+    if archived:
+        entries = sorted(entries + archived, key=lambda item: item["id"])
+    return entries
+
+def get_month_expenses(data, month_str):
+    """Calculate total expenses for a month"""
+    if "aggregates" in data:
+        return get_month_aggregates(data, month_str)["expenses"]
+    return calculate_total(select_by_date(data, "transactions", *month_range(month_str)))
+
+def get_month_category_totals(data, month_str):
+    """Get expenses for a month grouped by category"""
+    if "aggregates" in data:
+        return dict(get_month_aggregates(data, month_str)["categories"])
+    return group_by_category(select_by_date(data, "transactions", *month_range(month_str)))
+
+def add_transaction(data, amount, category, description, transaction_date):
+    """Add a transaction to data"""
+    transaction = Transaction(data["next_transaction_id"], transaction_date, amount, category, description)
+    commit_change(data, {"op": "append", "key": "transactions", "item": transaction})
+    commit_change(data, {"op": "set", "key": "next_transaction_id", "value": data["next_transaction_id"] + 1})
+
+def group_by_category(transactions):
+    """Group transactions (any iterable) by category and sum amounts"""
+    grouped = {}
+    for t in transactions:
+        grouped[t.category] = grouped.get(t.category, 0) + t.amount
+    return grouped
+
+def find_transaction_by_id(data, transaction_id):
+    """Find transaction by ID, return None if not found"""
+    return find_item(data, "transactions", transaction_id)
+
+def edit_transaction(data, transaction_id, **kwargs):
+    """Edit transaction fields"""
+    transaction = find_transaction_by_id(data, transaction_id)
+    if not transaction:
+        print(f"BŁĄD: Nie znaleziono transakcji o ID {transaction_id}")
+        print_archived_hint(data, "transactions", transaction_id)
+        sys.exit(1)
+
+    # Update allowed fields
+    fields = {}
+    if "amount" in kwargs and kwargs["amount"] is not None:
+        fields["amount"] = validate_amount(kwargs["amount"])
+    if "category" in kwargs and kwargs["category"] is not None:
+        fields["category"] = validate_string(kwargs["category"], "Kategoria")
+    if "description" in kwargs and kwargs["description"] is not None:
+        fields["description"] = validate_string(kwargs["description"], "Opis")
+    if "date" in kwargs and kwargs["date"] is not None:
+        fields["date"] = validate_date(kwargs["date"])
+
+    commit_change(data, {"op": "update", "key": "transactions", "id": transaction_id, "fields": fields})
+    return transaction
+
+def delete_transaction(data, transaction_id):
+    """Delete transaction by ID"""
+    transaction = find_transaction_by_id(data, transaction_id)
+    if not transaction:
+        print(f"BŁĄD: Nie znaleziono transakcji o ID {transaction_id}")
+        print_archived_hint(data, "transactions", transaction_id)
+        sys.exit(1)
+
+    commit_change(data, {"op": "remove", "key": "transactions", "id": transaction_id})
+    return transaction
+
+def format_transactions_list(transactions):
+    """Format list of transactions with IDs"""
+    if not transactions:
+        return "Brak transakcji w tym miesiącu"
+
+    lines = []
+    lines.append(f"{'ID':<5} {'Data':<12} {'Kwota':<10} {'Kategoria':<20} Opis")
+    lines.append("-" * 80)
+
+    for t in transactions:
+        amount = f"{to_pln(t.amount):.2f} PLN"
+        lines.append(f"{t.id:<5} {t.date:<12} {amount:<10} {t.category:<20} {t.description}")
+
+    return "\n".join(lines)
+
+# === BALANCE ===
+
+def set_initial_balance(data, amount):
+    """Set the initial portfolio balance"""
+    commit_change(data, {"op": "set", "key": "initial_balance", "value": amount})
+
+def calculate_total_income(data):
+    """Calculate total income from all sources (one-time only, recurring already applied as one-time)"""
+    if "aggregates" in data:
+        return data["aggregates"]["income"]
+
+    total = 0
+
+    # Sum all one-time income
+    for income in data.get("one_time_income", []):
+        total += income["amount"]
+
+    return total
+
+def calculate_total_expenses(data):
+    """Calculate total expenses from all transactions"""
+    if "aggregates" in data:
+        return data["aggregates"]["expenses"]
+
+    total = 0
+    for transaction in data.get("transactions", []):
+        total += transaction["amount"]
+    return total
+
+def calculate_current_balance(data):
+    """Calculate current global balance: initial + income - expenses"""
+    if "aggregates" in data:
+        return data["aggregates"]["balance"]
+
+    initial = data.get("initial_balance", 0)
+    income = calculate_total_income(data)
+    expenses = calculate_total_expenses(data)
+    return initial + income - expenses
+
+def calculate_balance_at_month_end(data, month_str):
+    """Calculate global balance after all entries dated up to the end of a month"""
+    if "aggregates" in data:
+        return month_end_balance(data["aggregates"], month_str)
+
+    end = month_range(month_str)[1]
+    income = calculate_total(i for i in data.get("one_time_income", []) if i["date"] < end)
+    expenses = calculate_total(t for t in data.get("transactions", []) if t["date"] < end)
+    return data.get("initial_balance", 0) + income - expenses
+
+def calculate_balance_for_month(data, month_str):
+    """Calculate income and expenses for a specific month"""
+    month_income = 0
+    month_expenses = 0
+
+    # One-time income for the month
+    if "aggregates" in data:
+        month_income = get_month_aggregates(data, month_str)["income"]
+    else:
+        for income in data.get("one_time_income", []):
+            if income["date"].startswith(month_str):
+                month_income += income["amount"]
+
+    # Expenses for the month
+    month_expenses = get_month_expenses(data, month_str)
+
+    return month_income, month_expenses
+
+# === AGGREGATES ===
+
+def empty_aggregates(initial_balance):
+    """Create aggregates for data without transactions and income"""
+    return {
+        "income": 0,
+        "expenses": 0,
+        "balance": initial_balance,
+        "months": {}
+    }
+
+def empty_month_aggregates():
+    """Create aggregates for a month without transactions and income"""
+    return {"income": 0, "expenses": 0, "categories": {}}
+
+def build_aggregates(data):
+    """Rebuild aggregates from scratch"""
+    aggregates = empty_aggregates(data.get("initial_balance", 0))
+    data_view = {"aggregates": aggregates}
+    for key in ("transactions", "one_time_income"):
+        for item in data.get(key, []):
+            update_aggregates(data_view, key, item, 1)
+        # Archived years are not in the lists, but their totals stay in the aggregates
+        for item in archived_between(data, key, "", "~"):
+            update_aggregates(data_view, key, item, 1)
+    return aggregates
+
+def get_month_aggregates(data, month_str):
+    """Get aggregates for a month (zeros if nothing was recorded)"""
+    return data["aggregates"]["months"].get(month_str, empty_month_aggregates())
+
+def add_to_total(totals, key, delta):
+    """Add delta to a total, drop category totals when they reach zero"""
+    value = totals.get(key, 0) + delta
+    if value == 0 and key not in ("income", "expenses", "balance"):
+        totals.pop(key, None)
+    else:
+        totals[key] = value
+
+def update_aggregate_balance(data, delta):
+    """Shift global balance in aggregates"""
+    if "aggregates" in data:
+        add_to_total(data["aggregates"], "balance", delta)
+        # The initial balance is part of every month-end balance
+        checkpoints = data["aggregates"].get("checkpoints", {})
+        for month_str in checkpoints:
+            checkpoints[month_str] += delta
+
+def update_aggregates(data, key, item, sign):
+    """Add (sign=1) or remove (sign=-1) a transaction or income entry from aggregates"""
+    if key not in ("transactions", "one_time_income") or "aggregates" not in data:
+        return
+
+    aggregates = data["aggregates"]
+    amount = item["amount"] * sign
+    month_str = item["date"][:7]
+    month = aggregates["months"].setdefault(month_str, empty_month_aggregates())
+
+    if key == "transactions":
+        add_to_total(aggregates, "expenses", amount)
+        add_to_total(aggregates, "balance", -amount)
+        add_to_total(month, "expenses", amount)
+        add_to_total(month["categories"], item["category"], amount)
+    else:
+        add_to_total(aggregates, "income", amount)
+        add_to_total(aggregates, "balance", amount)
+        add_to_total(month, "income", amount)
+
+    if not month["categories"] and month["income"] == 0 and month["expenses"] == 0:
+        del aggregates["months"][month_str]
+    drop_checkpoints(aggregates, month_str)
+
+def drop_checkpoints(aggregates, month_str):
+    """Forget month-end balances from month_str on, a back-dated entry changed them"""
+    checkpoints = aggregates.get("checkpoints")
+    if checkpoints:
+        for stale in [m for m in checkpoints if m >= month_str]:
+            del checkpoints[stale]
+
+def month_end_balance(aggregates, month_str):
+    """Get balance at the end of a month: nearest earlier checkpoint plus the months after it
+
+    Closed months passed on the way get checkpoints, which are saved with the
+    aggregates on the next save.
+    """
+    checkpoints = aggregates.setdefault("checkpoints", {})
+    if month_str in checkpoints:
+        return checkpoints[month_str]
+
+    months = aggregates["months"]
+    earlier = [m for m in checkpoints if m < month_str]
+    if earlier:
+        start = max(earlier)
+        balance = checkpoints[start]
+        following = month_span(start, month_str)[1:]
+    elif months and min(months) <= month_str:
+        # Global balance minus all income and expenses is the initial balance
+        balance = aggregates["balance"] - aggregates["income"] + aggregates["expenses"]
+        following = month_span(min(months), month_str)
+    else:
+        return aggregates["balance"] - aggregates["income"] + aggregates["expenses"]
+
+    current = get_current_month()
+    for m in following:
+        totals = months.get(m)
+        if totals is not None:
+            balance += totals["income"] - totals["expenses"]
+        if m < current:
+            checkpoints[m] = balance
+    return balance
+
+def aggregate_totals(aggregates):
+    """Flatten aggregates into {label: grosze} for comparison"""
+    totals = {}
+    for key, label in (("income", "przychody"), ("expenses", "wydatki"), ("balance", "saldo")):
+        totals[label] = aggregates.get(key, 0)
+    for month_str, month in aggregates.get("months", {}).items():
+        totals[f"{month_str} przychody"] = month.get("income", 0)
+        totals[f"{month_str} wydatki"] = month.get("expenses", 0)
+        for category, total in month.get("categories", {}).items():
+            totals[f"{month_str} {category}"] = total
+    return totals
+
+def checkpoint_closed_months(data):
+    """Store month-end balances of all closed months, so they are saved with the aggregates"""
+    if "aggregates" in data:
+        month_end_balance(data["aggregates"], previous_month(get_current_month()))
+
+def verify_aggregates(data):
+    """Rebuild aggregates and return list of (label, stored, expected) drifts"""
+    stored = aggregate_totals(data.get("aggregates", {}))
+    rebuilt = build_aggregates(data)
+    expected = aggregate_totals(rebuilt)
+    for month_str, balance in data.get("aggregates", {}).get("checkpoints", {}).items():
+        stored[f"{month_str} saldo na koniec"] = balance
+        expected[f"{month_str} saldo na koniec"] = month_end_balance(rebuilt, month_str)
+
+    drifts = []
+    for label in sorted(set(stored) | set(expected)):
+        stored_value = stored.get(label, 0)
+        expected_value = expected.get(label, 0)
+        if stored_value != expected_value:
+            drifts.append((label, stored_value, expected_value))
+    return drifts
+
+# === RECURRING INCOME ===
+
+def add_recurring_income(data, amount, description):
+    """Add a new recurring monthly income"""
+    income = {
+        "id": data["next_income_id"],
+        "amount": amount,
+        "description": description
+    }
+    commit_change(data, {"op": "append", "key": "recurring_income", "item": income})
+    commit_change(data, {"op": "set", "key": "next_income_id", "value": data["next_income_id"] + 1})
+    return income
+
+def find_recurring_income_by_id(data, income_id):
+    """Find recurring income by ID, return None if not found"""
+    return find_item(data, "recurring_income", income_id)
+
+def edit_recurring_income(data, income_id, **kwargs):
+    """Edit recurring income fields"""
+    income = find_recurring_income_by_id(data, income_id)
+    if not income:
+        print(f"BŁĄD: Nie znaleziono przychodu cyklicznego o ID {income_id}")
+        sys.exit(1)
+
+    fields = {}
+    if "amount" in kwargs and kwargs["amount"] is not None:
+        fields["amount"] = validate_amount(kwargs["amount"])
+    if "description" in kwargs and kwargs["description"] is not None:
+        fields["description"] = validate_string(kwargs["description"], "Opis")
+
+    commit_change(data, {"op": "update", "key": "recurring_income", "id": income_id, "fields": fields})
+    return income
+
+def delete_recurring_income(data, income_id):
+    """Delete recurring income by ID"""
+    income = find_recurring_income_by_id(data, income_id)
+    if not income:
+        print(f"BŁĄD: Nie znaleziono przychodu cyklicznego o ID {income_id}")
+        sys.exit(1)
+
+    commit_change(data, {"op": "remove", "key": "recurring_income", "id": income_id})
+    return income
+
+def apply_recurring_income(data, month_str=None):
+    """Apply recurring income as one-time entries for the first day of the month"""
+    if not data.get("recurring_income"):
+        print("Brak przychodów cyklicznych do dodania")
+        return (0, 0)
+
+    if month_str is None:
+        month_str = get_current_month()
+
+    # Check if already applied
+    if month_str in data.get("applied_recurring_income_months", []):
+        print(f"Przychody cykliczne dla {month_str} zostały już dodane")
+        return (0, 0)
+
+    first_day = f"{month_str}-01"
+    count = 0
+    total_amount = 0
+
+    next_id = data["next_income_id"]
+    for recurring in data["recurring_income"]:
+        income = Income(next_id, first_day, recurring["amount"], recurring["description"])
+        commit_change(data, {"op": "append", "key": "one_time_income", "item": income})
+        next_id += 1
+        count += 1
+        total_amount += recurring["amount"]
+    commit_change(data, {"op": "set", "key": "next_income_id", "value": next_id})
+
+    # Mark month as applied
+    applied = data.get("applied_recurring_income_months", []) + [month_str]
+    commit_change(data, {"op": "set", "key": "applied_recurring_income_months", "value": applied})
+
+    return (count, total_amount)
+
+@profiled("auto_apply_recurring")
+def auto_apply_recurring_income_if_needed(data):
+    """Automatically apply recurring income if not yet applied for current month"""
+    if not data.get("auto_apply_recurring_income", True):
+        return (0, 0)
+
+    month_str = get_current_month()
+    if month_str in data.get("applied_recurring_income_months", []):
+        return (0, 0)
+
+    return apply_recurring_income(data, month_str)
+
+def format_recurring_income_list(recurring_income):
+    """Format list of recurring income with IDs"""
+    if not recurring_income:
+        return "Brak przychodów cyklicznych"
+
+    lines = []
+    lines.append(f"{'ID':<5} {'Kwota':<15} Opis")
+    lines.append("-" * 50)
+
+    for inc in recurring_income:
+        iid = inc.get("id", "?")
+        amount = f"{to_pln(inc.get('amount', 0)):.2f} PLN"
+        description = inc.get("description", "")
+        lines.append(f"{iid:<5} {amount:<15} {description}")
+
+    return "\n".join(lines)
+
+# === ONE-TIME INCOME ===
+
+def add_one_time_income(data, amount, description, income_date):
+    """Add a one-time income entry"""
+    income = Income(data["next_income_id"], income_date, amount, description)
+    commit_change(data, {"op": "append", "key": "one_time_income", "item": income})
+    commit_change(data, {"op": "set", "key": "next_income_id", "value": data["next_income_id"] + 1})
+    return income
+
+def find_one_time_income_by_id(data, income_id):
+    """Find one-time income by ID, return None if not found"""
+    return find_item(data, "one_time_income", income_id)
+
+def edit_one_time_income(data, income_id, **kwargs):
+    """Edit one-time income fields"""
+    income = find_one_time_income_by_id(data, income_id)
+    if not income:
+        print(f"BŁĄD: Nie znaleziono przychodu jednorazowego o ID {income_id}")
+        print_archived_hint(data, "one_time_income", income_id)
+        sys.exit(1)
+
+    fields = {}
+    if "amount" in kwargs and kwargs["amount"] is not None:
+        fields["amount"] = validate_amount(kwargs["amount"])
+    if "description" in kwargs and kwargs["description"] is not None:
+        fields["description"] = validate_string(kwargs["description"], "Opis")
+    if "date" in kwargs and kwargs["date"] is not None:
+        fields["date"] = validate_date(kwargs["date"])
+
+    commit_change(data, {"op": "update", "key": "one_time_income", "id": income_id, "fields": fields})
+    return income
+
+def delete_one_time_income(data, income_id):
+    """Delete one-time income by ID"""
+    income = find_one_time_income_by_id(data, income_id)
+    if not income:
+        print(f"BŁĄD: Nie znaleziono przychodu jednorazowego o ID {income_id}")
+        print_archived_hint(data, "one_time_income", income_id)
+        sys.exit(1)
+
+    commit_change(data, {"op": "remove", "key": "one_time_income", "id": income_id})
+    return income
+
+def filter_income_by_month(income_list, month_str):
+    """Filter income entries by month"""
+    filtered = []
+    for inc in income_list:
+        try:
+            if inc["date"].startswith(month_str):
+                filtered.append(inc)
+        except (KeyError, AttributeError):
+            pass
+    return filtered
+
+def get_month_income(data, month_str):
+    """Get one-time income entries for a month, using the date index when available"""
+    if "one_time_income" not in data:
+        return []
+    return get_entries_between(data, "one_time_income", *month_range(month_str))
+
+def format_one_time_income_list(income_list):
+    """Format list of one-time income with IDs"""
+    if not income_list:
+        return "Brak przychodów jednorazowych"
+
+    lines = []
+    lines.append(f"{'ID':<5} {'Data':<12} {'Kwota':<15} Opis")
+    lines.append("-" * 60)
+
+    for inc in income_list:
+        iid = inc.get("id", "?")
+        date_str = inc.get("date", "")
+        amount = f"{to_pln(inc.get('amount', 0)):.2f} PLN"
+        description = inc.get("description", "")
+        lines.append(f"{iid:<5} {date_str:<12} {amount:<15} {description}")
+
+    return "\n".join(lines)
+
+# === DISPLAY ===
+
+def calculate_detailed_status(limit, spent, month):
+    """Calculate detailed budget information (limit and spent in grosze, results in PLN)"""
+    from calendar import monthrange
+    from datetime import date
+
+    limit, spent = to_pln(limit), to_pln(spent)
+
+    # Parse month
+    year, month_num = map(int, month.split("-"))
+    current_date = date.today()
+
+    # Get days in month
+    days_in_month = monthrange(year, month_num)[1]
+
+    # Calculate days elapsed and remaining
+    if year == current_date.year and month_num == current_date.month:
+        days_elapsed = current_date.day
+    elif year < current_date.year or (year == current_date.year and month_num < current_date.month):
+        days_elapsed = days_in_month  # Past month
+    else:
+        days_elapsed = 0  # Future month
+
+    days_remaining = max(0, days_in_month - days_elapsed)
+
+    # Calculate averages
+    avg_daily = float(spent) / days_elapsed if days_elapsed > 0 else 0
+    remaining_budget = float(limit) - float(spent)
+    suggested_daily = remaining_budget / days_remaining if days_remaining > 0 else 0
+
+    return {
+        "days_in_month": days_in_month,
+        "days_elapsed": days_elapsed,
+        "days_remaining": days_remaining,
+        "avg_daily": avg_daily,
+        "suggested_daily": suggested_daily,
+        "remaining": remaining_budget
+    }
+
+def format_detailed_status(limit, spent, month, details):
+    """Format detailed status output"""
+    limit, spent = to_pln(limit), to_pln(spent)
+    remaining = details["remaining"]
+    percent_spent = (float(spent) / float(limit) * 100) if limit > 0 else 0
+
+    output = f"""=== BUDŻET - {month.upper()} ===
+Limit: {limit:.2f} PLN
+Wydano: {spent:.2f} PLN ({percent_spent:.0f}%)
+Pozostało: {remaining:.2f} PLN ({100-percent_spent:.0f}%)
+
+Dni w miesiącu: {details['days_in_month']}
+Upłynęło dni: {details['days_elapsed']}
+Pozostało dni: {details['days_remaining']}
+
+Średnie wydatki dziennie: {details['avg_daily']:.2f} PLN
+Sugerowany budżet dzienny (pozostałe dni): {details['suggested_daily']:.2f} PLN"""
+
+    return output
+
+def format_status(limit, spent, remaining, month):
+    """Format status output"""
+    limit, spent, remaining = to_pln(limit), to_pln(spent), to_pln(remaining)
+    return f"""Limit: {limit:.2f} PLN
+Wydano ({month}): {spent:.2f} PLN
+Pozostało: {remaining:.2f} PLN"""
+
+def format_status_with_balance(limit, spent, remaining, month, current_balance, month_income):
+    """Format status output with balance"""
+    limit, spent, remaining = to_pln(limit), to_pln(spent), to_pln(remaining)
+    current_balance, month_income = to_pln(current_balance), to_pln(month_income)
+    month_balance = float(month_income) - float(spent)
+    return f"""Saldo portfela: {current_balance:.2f} PLN
+
+Limit ({month}): {limit:.2f} PLN
+Wydano ({month}): {spent:.2f} PLN
+Pozostało w budżecie: {remaining:.2f} PLN
+
+Przychody w miesiącu: {month_income:.2f} PLN
+Bilans miesiąca: {month_balance:.2f} PLN"""
+
+def format_detailed_status_with_balance(limit, spent, month, details, current_balance, month_income):
+    """Format detailed status output including balance information"""
+    limit, spent = to_pln(limit), to_pln(spent)
+    current_balance, month_income = to_pln(current_balance), to_pln(month_income)
+    remaining_budget = details["remaining"]
+    percent_spent = (float(spent) / float(limit) * 100) if limit > 0 else 0
+    month_balance = float(month_income) - float(spent)
+
+    output = f"""=== BUDŻET I SALDO - {month.upper()} ===
+
+SALDO PORTFELA: {current_balance:.2f} PLN
+
+BUDŻET MIESIĘCZNY:
+Limit: {limit:.2f} PLN
+Wydano: {spent:.2f} PLN ({percent_spent:.0f}%)
+Pozostało: {remaining_budget:.2f} PLN ({100-percent_spent:.0f}%)
+
+Przychody w miesiącu: {month_income:.2f} PLN
+Wydatki w miesiącu: {spent:.2f} PLN
+Bilans miesiąca: {month_balance:.2f} PLN
+
+ANALIZA CZASOWA:
+Dni w miesiącu: {details['days_in_month']}
+Upłynęło dni: {details['days_elapsed']}
+Pozostało dni: {details['days_remaining']}
+
+Średnie wydatki dziennie: {details['avg_daily']:.2f} PLN
+Sugerowany budżet dzienny (pozostałe dni): {details['suggested_daily']:.2f} PLN"""
+
+    return output
+
+def format_category_list(grouped):
+    """Format category list output"""
+    if not grouped:
+        return "Brak transakcji w tym miesiącu"
+    sorted_cats = sorted(grouped.keys())
+    lines = [f"{cat}: {to_pln(grouped[cat]):.2f} PLN" for cat in sorted_cats]
+    return "\n".join(lines)
+
+def format_analysis(month_totals, top, daily, engine, show_categories=False, show_daily=False):
+    """Format multi-month expense analysis output"""
+    if not month_totals:
+        return "Brak transakcji w wybranym okresie"
+
+    months = list(month_totals)
+    lines = [
+        "=== ANALIZA WYDATKÓW ===",
+        f"Zakres: {months[0]} - {months[-1]} (silnik: {engine})",
+        "",
+        f"{'Miesiąc':<10} {'Wydatki':<16} {'Średnio dziennie':<18} Największa kategoria",
+    ]
+    for month, categories in month_totals.items():
+        spent = sum(categories.values())
+        avg_daily = calculate_detailed_status(0, spent, month)["avg_daily"]
+        biggest = min(categories, key=lambda cat: (-categories[cat], cat))
+        lines.append(f"{month:<10} {f'{to_pln(spent):.2f} PLN':<16} {f'{avg_daily:.2f} PLN':<18} "
+                     f"{biggest} ({to_pln(categories[biggest]):.2f} PLN)")
+
+    grand_total = sum(sum(categories.values()) for categories in month_totals.values())
+    if top:
+        lines.append("")
+        lines.append(f"Top {len(top)} kategorii:")
+    for position, (category, amount) in enumerate(top, 1):
+        share = amount / grand_total * 100 if grand_total else 0
+        lines.append(f"{position}. {category}: {to_pln(amount):.2f} PLN ({share:.0f}%)")
+
+    if show_categories:
+        for month, categories in month_totals.items():
+            lines.append("")
+            lines.append(f"{month}:")
+            for category in sorted(categories):
+                lines.append(f"  {category}: {to_pln(categories[category]):.2f} PLN")
+
+    if show_daily:
+        lines.append("")
+        lines.append("Wydatki dzienne:")
+        for day, amount in daily.items():
+            lines.append(f"{day}: {to_pln(amount):.2f} PLN")
+
+    return "\n".join(lines)
+
+# === REPORT ===
+
+def build_report(data, start_month, end_month):
+    """Build month x category expenses with income, limit and remaining budget of every month
+
+    Reads the maintained aggregates when present, otherwise makes one pass
+    over transactions and one-time income.
+    """
+    months = month_span(start_month, end_month)
+    if "aggregates" in data:
+        totals = {month_str: get_month_aggregates(data, month_str) for month_str in months}
+    else:
+        totals = {month_str: empty_month_aggregates() for month_str in months}
+        for key in ("transactions", "one_time_income"):
+            for item in data[key]:
+                month = totals.get(month_of(item["date"]))
+                if month is None:
+                    continue
+                if key == "transactions":
+                    month["expenses"] += item["amount"]
+                    month["categories"][item["category"]] = month["categories"].get(item["category"], 0) + item["amount"]
+                else:
+                    month["income"] += item["amount"]
+
+    rows = []
+    for month_str in months:
+        month = totals[month_str]
+        limit = get_limit_for_month(data, month_str)
+        rows.append({
+            "month": month_str,
+            "categories": dict(month["categories"]),
+            "expenses": month["expenses"],
+            "income": month["income"],
+            "limit": limit,
+            "remaining": limit - month["expenses"],
+            "over_limit": month["expenses"] > limit,
+        })
+    categories = sorted({category for row in rows for category in row["categories"]})
+    return {"from": start_month, "to": end_month, "categories": categories, "months": rows}
+
+def report_total(report, field):
+    """Sum a field over all months of the report"""
+    return sum(row[field] for row in report["months"])
+
+def category_total(report, category):
+    """Sum a category's expenses over all months of the report"""
+    return sum(row["categories"].get(category, 0) for row in report["months"])
+
+def format_report_text(report):
+    """Format report as a table with a row per month and a total row"""
+    header = ["Miesiąc"] + report["categories"] + ["Wydatki", "Przychody", "Limit", "Pozostało", "Status"]
+    rows = []
+    for row in report["months"]:
+        amounts = [row["categories"].get(category, 0) for category in report["categories"]]
+        amounts += [row["expenses"], row["income"], row["limit"], row["remaining"]]
+        status = "PONAD LIMIT" if row["over_limit"] else "OK"
+        rows.append([row["month"]] + [f"{to_pln(amount):.2f}" for amount in amounts] + [status])
+
+    totals = [category_total(report, category) for category in report["categories"]]
+    totals += [report_total(report, "expenses"), report_total(report, "income")]
+    over = sum(1 for row in report["months"] if row["over_limit"])
+    total_row = ["Razem"] + [f"{to_pln(amount):.2f}" for amount in totals] + ["", "", f"ponad limit: {over}"]
+
+    widths = [max(len(line[column]) for line in [header, total_row] + rows) for column in range(len(header))]
+    def format_line(line):
+        cells = [line[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(line[1:-1], widths[1:-1])]
+        return "  ".join(cells + [line[-1]]).rstrip()
+
+    lines = [f"=== RAPORT {report['from']} - {report['to']} (kwoty w PLN) ===", format_line(header)]
+    lines.append("-" * len(format_line(header)))
+    lines.extend(format_line(line) for line in rows)
+    lines.append("-" * len(format_line(header)))
+    lines.append(format_line(total_row))
+    return "\n".join(lines)
+
+def format_report_csv(report):
+    """Format report as CSV with a row per month, amounts in PLN"""
+    import csv
+    import io
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["month"] + report["categories"] + ["expenses", "income", "limit", "remaining", "over_limit"])
+    for row in report["months"]:
+        amounts = [row["categories"].get(category, 0) for category in report["categories"]]
+        amounts += [row["expenses"], row["income"], row["limit"], row["remaining"]]
+        writer.writerow([row["month"]] + [f"{to_pln(amount):.2f}" for amount in amounts] + [int(row["over_limit"])])
+    return output.getvalue().rstrip("\n")
+
+def format_report_json(report):
+    """Format report as JSON, amounts in PLN"""
+    amount = lambda grosze: float(to_pln(grosze))
+    months = [{
+        "month": row["month"],
+        "categories": {category: amount(total) for category, total in sorted(row["categories"].items())},
+        "expenses": amount(row["expenses"]),
+        "income": amount(row["income"]),
+        "limit": amount(row["limit"]),
+        "remaining": amount(row["remaining"]),
+        "over_limit": row["over_limit"],
+    } for row in report["months"]]
+    totals = {
+        "categories": {category: amount(category_total(report, category)) for category in report["categories"]},
+        "expenses": amount(report_total(report, "expenses")),
+        "income": amount(report_total(report, "income")),
+        "months_over_limit": sum(1 for row in report["months"] if row["over_limit"]),
+    }
+    return json.dumps({"from": report["from"], "to": report["to"], "months": months, "totals": totals},
+                      ensure_ascii=False, indent=2)
+
+# Output formats of the report command
+REPORT_FORMATS = {"text": format_report_text, "csv": format_report_csv, "json": format_report_json}
+
+# === FIXED COSTS ===
+
+def apply_fixed_costs(data, month_str=None):
+    """Apply fixed costs as transactions for the first day of the month"""
+    if not data.get("fixed_costs"):
+        print("Brak kosztów stałych do dodania")
+        return (0, 0)
+
+    # Use current month if not specified
+    if month_str is None:
+        month_str = get_current_month()
+
+    # Check if already applied for this month
+    if month_str in data.get("applied_fixed_costs_months", []):
+        print(f"Koszty stałe dla {month_str} zostały już dodane")
+        return (0, 0)
+
+    # Create date for first day of month
+    first_day = f"{month_str}-01"
+
+    count = 0
+    total_amount = 0
+
+    next_id = data["next_transaction_id"]
+    for fixed_cost in data["fixed_costs"]:
+        transaction = Transaction(next_id, first_day, fixed_cost.amount, fixed_cost.category, fixed_cost.description)
+        commit_change(data, {"op": "append", "key": "transactions", "item": transaction})
+        next_id += 1
+        count += 1
+        total_amount += fixed_cost.amount
+    commit_change(data, {"op": "set", "key": "next_transaction_id", "value": next_id})
+
+    # Mark month as applied
+    applied = data.get("applied_fixed_costs_months", []) + [month_str]
+    commit_change(data, {"op": "set", "key": "applied_fixed_costs_months", "value": applied})
+
+    return (count, total_amount)
+
+@profiled("auto_apply_fixed")
+def auto_apply_fixed_if_needed(data):
+    """Automatically apply fixed costs if not yet applied for current month"""
+    if not data.get("auto_apply_fixed_costs", True):
+        return (0, 0)
+
+    month_str = get_current_month()
+    if month_str in data.get("applied_fixed_costs_months", []):
+        return (0, 0)
+
+    return apply_fixed_costs(data, month_str)
+
+def add_fixed_cost(data, amount, category, description):
+    """Add a new fixed cost"""
+    fixed_cost = FixedCost(data["next_fixed_cost_id"], amount, category, description)
+    commit_change(data, {"op": "append", "key": "fixed_costs", "item": fixed_cost})
+    commit_change(data, {"op": "set", "key": "next_fixed_cost_id", "value": data["next_fixed_cost_id"] + 1})
+    return fixed_cost
+
+def find_fixed_cost_by_id(data, fixed_cost_id):
+    """Find fixed cost by ID, return None if not found"""
+    return find_item(data, "fixed_costs", fixed_cost_id)
+
+def edit_fixed_cost(data, fixed_cost_id, **kwargs):
+    """Edit fixed cost fields"""
+    fixed_cost = find_fixed_cost_by_id(data, fixed_cost_id)
+    if not fixed_cost:
+        print(f"BŁĄD: Nie znaleziono kosztu stałego o ID {fixed_cost_id}")
+        sys.exit(1)
+
+    # Update allowed fields
+    fields = {}
+    if "amount" in kwargs and kwargs["amount"] is not None:
+        fields["amount"] = validate_amount(kwargs["amount"])
+    if "category" in kwargs and kwargs["category"] is not None:
+        fields["category"] = validate_string(kwargs["category"], "Kategoria")
+    if "description" in kwargs and kwargs["description"] is not None:
+        fields["description"] = validate_string(kwargs["description"], "Opis")
+
+    commit_change(data, {"op": "update", "key": "fixed_costs", "id": fixed_cost_id, "fields": fields})
+    return fixed_cost
+
+def delete_fixed_cost(data, fixed_cost_id):
+    """Delete fixed cost by ID"""
+    fixed_cost = find_fixed_cost_by_id(data, fixed_cost_id)
+    if not fixed_cost:
+        print(f"BŁĄD: Nie znaleziono kosztu stałego o ID {fixed_cost_id}")
+        sys.exit(1)
+
+    commit_change(data, {"op": "remove", "key": "fixed_costs", "id": fixed_cost_id})
+    return fixed_cost
+
+def format_fixed_costs_list(fixed_costs):
+    """Format list of fixed costs with IDs"""
+    if not fixed_costs:
+        return "Brak kosztów stałych"
+
+    lines = []
+    lines.append(f"{'ID':<5} {'Kwota':<15} {'Kategoria':<20} Opis")
+    lines.append("-" * 70)
+
+    for fc in fixed_costs:
+        fid = fc.get("id", "?")
+        amount = f"{to_pln(fc.get('amount', 0)):.2f} PLN"
+        category = fc.get("category", "")
+        description = fc.get("description", "")
+        lines.append(f"{fid:<5} {amount:<15} {category:<20} {description}")
+
+    return "\n".join(lines)
+
+# === IMPORT ===
+
+# CSV header names (English and Polish) mapped to transaction fields
+CSV_COLUMNS = {
+    "date": "date", "data": "date",
+    "amount": "amount", "kwota": "amount",
+    "category": "category", "kategoria": "category",
+    "description": "description", "opis": "description",
+}
+MAX_REPORTED_ERRORS = 20
+
+def normalize_description(description):
+    """Normalize description for duplicate detection"""
+    return " ".join(description.split()).casefold()
+
+def transaction_key(date_str, amount, description):
+    """Get duplicate detection key of a transaction"""
+    return (date_str, amount, normalize_description(description))
+
+def parse_csv_amount(text):
+    """Parse an amount from a bank statement, return signed grosze
+
+    Spaces separate thousands. With both ',' and '.' the last one is the
+    decimal separator. A single ',' or '.' is decimal unless exactly three
+    digits follow it or it appears more than once - money has at most two
+    decimal places, so 1.234 and 1,234 are 1234, while 12,50 is 12.50.
+    """
+    number = text.strip().replace("\u2212", "-")
+    for space in (" ", "\xa0", "\u202f"):
+        number = number.replace(space, "")
+    sign = -1 if number.startswith("-") else 1
+    if number.startswith(("-", "+")):
+        number = number[1:]
+
+    decimals = "0"
+    last = max(number.rfind(","), number.rfind("."))
+    if last >= 0:
+        separators = number.count(",") + number.count(".")
+        if number.count(number[last]) == 1 and (separators > 1 or len(number) - last - 1 != 3):
+            number, decimals = number[:last], number[last + 1:]
+
+    groups = re.split(r"[.,]", number)
+    valid = (all(group.isdigit() for group in groups) and decimals.isdigit()
+             and (len(groups) == 1 or (len(set(re.findall(r"[.,]", number))) == 1 and len(groups[0]) <= 3
+                                       and all(len(group) == 3 for group in groups[1:]))))
+    if not valid:
+        raise ValueError("Kwota musi być liczbą (np. 50.00, -1 234,56 lub 1,234.56)")
+    return sign * check_amount(f"{''.join(groups)}.{decimals}")
+
+def read_csv_transactions(csv_path, default_category, delimiter=","):
+    """Read and validate CSV rows, return (rows, errors, credits) without exiting on bad rows
+
+    A statement with negative amounts lists expenses as debits: they are
+    imported with the sign flipped and the credit rows are only counted.
+    Without negative amounts every row is an expense.
+    """
+    import csv
+
+    rows = []
+    errors = []
+    valid_dates = set()
+    try:
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            header = next(reader, [])
+            columns = {CSV_COLUMNS[name.strip().lower()]: i
+                       for i, name in enumerate(header) if name.strip().lower() in CSV_COLUMNS}
+            missing = [name for name in ("date", "amount", "description") if name not in columns]
+            if missing:
+                print(f"BŁĄD: Brak kolumn w pliku {csv_path}: {', '.join(missing)}")
+                print("Wymagany nagłówek: date,amount,description (opcjonalnie category)")
+                sys.exit(1)
+
+            date_col, amount_col, description_col = columns["date"], columns["amount"], columns["description"]
+            category_col = columns.get("category")
+            for line_number, row in enumerate(reader, start=2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                try:
+                    if len(row) < len(header):
+                        raise ValueError(f"Wiersz ma {len(row)} kolumn, oczekiwano {len(header)}")
+                    date_str = row[date_col].strip()
+                    if date_str not in valid_dates:
+                        valid_dates.add(check_date(date_str))
+                    amount = parse_csv_amount(row[amount_col])
+                    category = row[category_col] if category_col is not None and row[category_col].strip() else default_category
+                    category = check_string(category, "Kategoria")
+                    description = check_string(row[description_col], "Opis")
+                except ValueError as e:
+                    errors.append((line_number, str(e), delimiter.join(row)))
+                    continue
+                rows.append((date_str, amount, category, description))
+    except FileNotFoundError:
+        print(f"BŁĄD: Nie znaleziono pliku {csv_path}")
+        sys.exit(1)
+    except UnicodeDecodeError:
+        print(f"BŁĄD: Plik {csv_path} musi być zapisany w kodowaniu UTF-8")
+        sys.exit(1)
+
+    if any(row[1] < 0 for row in rows):
+        credits = sum(1 for row in rows if row[1] > 0)
+        rows = [(date_str, -amount, category, description)
+                for date_str, amount, category, description in rows if amount < 0]
+        return rows, errors, credits
+    return rows, errors, 0
+
+def format_import_errors(csv_path, errors):
+    """Format validation errors of CSV import"""
+    lines = [f"BŁĄD: Plik {csv_path} zawiera błędne wiersze ({len(errors)}):"]
+    for line_number, message, raw in errors[:MAX_REPORTED_ERRORS]:
+        lines.append(f"Wiersz {line_number}: {message} (podano: {raw})")
+    if len(errors) > MAX_REPORTED_ERRORS:
+        lines.append(f"... i {len(errors) - MAX_REPORTED_ERRORS} kolejnych")
+    lines.append("Nie zaimportowano żadnych transakcji. Popraw plik i spróbuj ponownie.")
+    return "\n".join(lines)
+
+def import_transactions(data, rows):
+    """Add validated rows as transactions, skip ones already present, return (imported, skipped)"""
+    # Count existing transactions per key, so a re-imported statement is skipped
+    # while repeated identical rows within one statement are still kept
+    existing = {}
+    dates = [row[0] for row in rows]
+    archived = archived_between(data, "transactions", min(dates), max(dates) + "~") if rows else []
+    for entries in (data["transactions"], archived):
+        for t in entries:
+            if t is not None:
+                key = transaction_key(t["date"], t["amount"], t["description"])
+                existing[key] = existing.get(key, 0) + 1
+
+    imported = 0
+    skipped = 0
+    next_id = data["next_transaction_id"]
+    for date_str, amount, category, description in rows:
+        key = transaction_key(date_str, amount, description)
+        if existing.get(key):
+            existing[key] -= 1
+            skipped += 1
+            continue
+        transaction = Transaction(next_id, date_str, amount, category, description)
+        commit_change(data, {"op": "append", "key": "transactions", "item": transaction})
+        next_id += 1
+        imported += 1
+    if imported:
+        commit_change(data, {"op": "set", "key": "next_transaction_id", "value": next_id})
+    return (imported, skipped)
+
+# === BATCH ===
+# Reading and running the lines of a batch: batch_runner.py
+
+# Data shared by the commands of a running batch: {"path", "data"}
+BATCH = None
+
+# === DAEMON ===
+# Daemon (serve) and HTTP API (api): server.py
+
+# Data kept in memory by the running daemon: {"path", "data", "signature"}
+RESIDENT = None
+
+def data_signature(path):
+    """Get modification time and size of the data file and its journal"""
+    signature = []
+    for name in (path, journal_path(path)):
+        try:
+            stat = os.stat(name)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def note_resident_save(path):
+    """Remember the file signature after the daemon saved resident data itself"""
+    if RESIDENT is not None and RESIDENT["path"] == path:
+        RESIDENT["signature"] = data_signature(path)
+
+# === CLI ===
+
+# Options given before the subcommand: [(argument names, add_argument options)]
+GLOBAL_OPTIONS = [
+    (('--profile',), {'action': 'store_true', 'help': 'Pokaż na stderr czas i pamięć poszczególnych faz komendy'}),
+    (('--profile-output',), {'metavar': 'PLIK', 'default': None, 'help': 'Zapisz profil faz jako JSON do pliku'}),
+    (('--profile-cprofile',), {'metavar': 'PLIK', 'default': None, 'help': 'Zapisz pełny profil cProfile komendy do pliku'}),
+]
+
+# Subcommands: name -> (help, [(argument names, add_argument options)])
+COMMANDS = {
+    'status': ('Sprawdź stan budżetu', [
+        (('--detailed',), {'action': 'store_true', 'help': 'Pokaż szczegółowe informacje'}),
+    ]),
+    'add': ('Dodaj transakcję', [
+        (('--amount',), {'required': True, 'help': 'Kwota'}),
+        (('--category',), {'required': True, 'help': 'Kategoria'}),
+        (('--description',), {'required': True, 'help': 'Opis'}),
+        (('--date',), {'required': False, 'default': None, 'help': 'Data (YYYY-MM-DD), domyślnie dziś'}),
+    ]),
+    'apply-fixed': ('Dodaj koszty stałe', []),
+    'list': ('Pokaż wydatki po kategoriach', [
+        (('--month',), {'required': False, 'default': None, 'help': 'Miesiąc (YYYY-MM), domyślnie bieżący'}),
+    ]),
+    'transactions': ('Pokaż listę transakcji', [
+        (('--month',), {'required': False, 'default': None, 'help': 'Miesiąc (YYYY-MM), domyślnie bieżący'}),
+        (('--from',), {'dest': 'from_date', 'required': False, 'default': None, 'help': 'Pierwszy dzień (YYYY-MM-DD)'}),
+        (('--to',), {'dest': 'to_date', 'required': False, 'default': None, 'help': 'Ostatni dzień (YYYY-MM-DD), domyślnie dziś'}),
+        (('--days',), {'type': int, 'required': False, 'default': None, 'help': 'Ostatnie N dni, łącznie z dzisiejszym'}),
+    ]),
+    'edit': ('Edytuj transakcję', [
+        (('transaction_id',), {'type': int, 'help': 'ID transakcji'}),
+        (('--amount',), {'required': False, 'default': None, 'help': 'Nowa kwota'}),
+        (('--category',), {'required': False, 'default': None, 'help': 'Nowa kategoria'}),
+        (('--description',), {'required': False, 'default': None, 'help': 'Nowy opis'}),
+        (('--date',), {'required': False, 'default': None, 'help': 'Nowa data (YYYY-MM-DD)'}),
+    ]),
+    'delete': ('Usuń transakcję', [
+        (('transaction_id',), {'type': int, 'help': 'ID transakcji'}),
+    ]),
+    'set-limit': ('Ustaw limit budżetu', [
+        (('amount',), {'type': float, 'help': 'Kwota limitu'}),
+        (('--month',), {'required': False, 'default': None, 'help': 'Miesiąc (YYYY-MM), brak = default'}),
+    ]),
+    'limits': ('Pokaż historię limitów', []),
+    'fixed-list': ('Pokaż listę kosztów stałych', []),
+    'fixed-add': ('Dodaj nowy koszt stały', [
+        (('--amount',), {'required': True, 'help': 'Kwota'}),
+        (('--category',), {'required': True, 'help': 'Kategoria'}),
+        (('--description',), {'required': True, 'help': 'Opis'}),
+    ]),
+    'fixed-edit': ('Edytuj koszt stały', [
+        (('fixed_cost_id',), {'type': int, 'help': 'ID kosztu stałego'}),
+        (('--amount',), {'required': False, 'default': None, 'help': 'Nowa kwota'}),
+        (('--category',), {'required': False, 'default': None, 'help': 'Nowa kategoria'}),
+        (('--description',), {'required': False, 'default': None, 'help': 'Nowy opis'}),
+    ]),
+    'fixed-delete': ('Usuń koszt stały', [
+        (('fixed_cost_id',), {'type': int, 'help': 'ID kosztu stałego'}),
+    ]),
+    'set-balance': ('Ustaw początkowe saldo portfela', [
+        (('amount',), {'type': float, 'help': 'Kwota początkowego salda'}),
+    ]),
+    'balance': ('Pokaż obecne saldo portfela', [
+        (('--detailed',), {'action': 'store_true', 'help': 'Pokaż szczegółowe informacje z podziałem na miesiące'}),
+        (('--month',), {'required': False, 'default': None, 'help': 'Pokaż saldo na koniec miesiąca (YYYY-MM)'}),
+    ]),
+    'recurring-list': ('Pokaż listę przychodów cyklicznych', []),
+    'recurring-add': ('Dodaj nowy przychód cykliczny (miesięczny)', [
+        (('--amount',), {'required': True, 'help': 'Kwota'}),
+        (('--description',), {'required': True, 'help': 'Opis'}),
+    ]),
+    'recurring-edit': ('Edytuj przychód cykliczny', [
+        (('income_id',), {'type': int, 'help': 'ID przychodu cyklicznego'}),
+        (('--amount',), {'required': False, 'default': None, 'help': 'Nowa kwota'}),
+        (('--description',), {'required': False, 'default': None, 'help': 'Nowy opis'}),
+    ]),
+    'recurring-delete': ('Usuń przychód cykliczny', [
+        (('income_id',), {'type': int, 'help': 'ID przychodu cyklicznego'}),
+    ]),
+    'apply-recurring-income': ('Dodaj przychody cykliczne dla bieżącego miesiąca', []),
+    'income-add': ('Dodaj przychód jednorazowy', [
+        (('--amount',), {'required': True, 'help': 'Kwota'}),
+        (('--description',), {'required': True, 'help': 'Opis'}),
+        (('--date',), {'required': False, 'default': None, 'help': 'Data (YYYY-MM-DD), domyślnie dziś'}),
+    ]),
+    'income-list': ('Pokaż listę przychodów jednorazowych', [
+        (('--month',), {'required': False, 'default': None, 'help': 'Miesiąc (YYYY-MM), domyślnie bieżący'}),
+    ]),
+    'income-edit': ('Edytuj przychód jednorazowy', [
+        (('income_id',), {'type': int, 'help': 'ID przychodu jednorazowego'}),
+        (('--amount',), {'required': False, 'default': None, 'help': 'Nowa kwota'}),
+        (('--description',), {'required': False, 'default': None, 'help': 'Nowy opis'}),
+        (('--date',), {'required': False, 'default': None, 'help': 'Nowa data (YYYY-MM-DD)'}),
+    ]),
+    'income-delete': ('Usuń przychód jednorazowy', [
+        (('income_id',), {'type': int, 'help': 'ID przychodu jednorazowego'}),
+    ]),
+    'import': ('Importuj transakcje z pliku CSV (np. wyciągu bankowego)', [
+        (('--csv',), {'dest': 'csv_file', 'required': True, 'help': 'Plik CSV z kolumnami date,amount,description (opcjonalnie category)'}),
+        (('--category',), {'required': False, 'default': 'Inne', 'help': 'Kategoria dla wierszy bez kategorii (domyślnie Inne)'}),
+        (('--delimiter',), {'required': False, 'default': ',', 'help': 'Separator kolumn (domyślnie ,)'}),
+    ]),
+    'analyze': ('Analiza wydatków z wielu miesięcy', [
+        (('--from',), {'dest': 'from_month', 'required': False, 'default': None, 'help': 'Pierwszy miesiąc (YYYY-MM)'}),
+        (('--to',), {'dest': 'to_month', 'required': False, 'default': None, 'help': 'Ostatni miesiąc (YYYY-MM)'}),
+        (('--top',), {'type': int, 'required': False, 'default': 5, 'help': 'Liczba największych kategorii (domyślnie 5)'}),
+        (('--categories',), {'action': 'store_true', 'help': 'Pokaż wydatki per kategoria w każdym miesiącu'}),
+        (('--daily',), {'action': 'store_true', 'help': 'Pokaż wydatki dzienne'}),
+    ]),
+    'report': ('Raport wydatków miesiąc x kategoria z przychodami i limitami', [
+        (('--from',), {'dest': 'from_month', 'required': False, 'default': None, 'help': 'Pierwszy miesiąc (YYYY-MM), domyślnie styczeń roku z --to'}),
+        (('--to',), {'dest': 'to_month', 'required': False, 'default': None, 'help': 'Ostatni miesiąc (YYYY-MM), domyślnie bieżący'}),
+        (('--format',), {'dest': 'output_format', 'choices': list(REPORT_FORMATS), 'default': 'text', 'help': 'Format wyniku (domyślnie text)'}),
+    ]),
+    'search': ('Wyszukaj wydatki i przychody po słowach z opisu i kategorii', [
+        (('terms',), {'nargs': '+', 'metavar': 'SŁOWO', 'help': 'Słowa, które muszą wystąpić; OR rozdziela alternatywy, słowo* pasuje do początku słowa'}),
+        (('--month',), {'required': False, 'default': None, 'help': 'Miesiąc (YYYY-MM), domyślnie cała historia'}),
+        (('--from',), {'dest': 'from_date', 'required': False, 'default': None, 'help': 'Pierwszy dzień (YYYY-MM-DD)'}),
+        (('--to',), {'dest': 'to_date', 'required': False, 'default': None, 'help': 'Ostatni dzień (YYYY-MM-DD), domyślnie dziś'}),
+        (('--days',), {'type': int, 'required': False, 'default': None, 'help': 'Ostatnie N dni, łącznie z dzisiejszym'}),
+        (('--min',), {'dest': 'min_amount', 'required': False, 'default': None, 'help': 'Najmniejsza kwota'}),
+        (('--max',), {'dest': 'max_amount', 'required': False, 'default': None, 'help': 'Największa kwota'}),
+        (('--type',), {'dest': 'entry_type', 'choices': ['all', 'expenses', 'income'], 'default': 'all', 'help': 'Szukaj tylko wydatków (expenses) lub przychodów jednorazowych (income)'}),
+    ]),
+    'verify-aggregates': ('Przebuduj sumy miesięczne i pokaż rozbieżności', []),
+    'compact': ('Złóż dziennik zmian do pliku danych', []),
+    'archive': ('Przenieś transakcje i przychody zakończonego roku do skompresowanego archiwum', [
+        (('--year',), {'required': True, 'help': 'Rok (YYYY)'}),
+    ]),
+    'unarchive': ('Przywróć rok z archiwum do pliku danych (np. do poprawek)', [
+        (('--year',), {'required': True, 'help': 'Rok (YYYY)'}),
+    ]),
+    'migrate-partitioned': ('Przenieś dane z data.json do plików miesięcznych', []),
+    'migrate-binary': ('Przenieś dane z data.json do pliku binarnego data.bin', []),
+    'export-json': ('Przenieś dane z pliku binarnego data.bin z powrotem do data.json', []),
+    'migrate-sqlite': ('Przenieś dane z data.json do bazy SQLite', []),
+    'batch': ('Wykonaj wiele komend przy jednym wczytaniu i zapisie danych', [
+        (('file',), {'nargs': '?', 'default': '-', 'help': 'Plik z komendami, jedna w linii (tekst lub JSON), domyślnie stdin'}),
+        (('--atomic',), {'action': 'store_true', 'help': 'Wszystko albo nic: pierwszy błąd przerywa paczkę bez zapisu zmian'}),
+        (('--json',), {'dest': 'as_json', 'action': 'store_true', 'help': 'Wyniki jako JSON, jeden obiekt na linię'}),
+    ]),
+    'serve': ('Uruchom serwer trzymający dane w pamięci - komendy są przekazywane do niego przez gniazdo Unix', []),
+    'api': ('Uruchom API HTTP (JSON) dla lokalnych klientów', [
+        (('--host',), {'required': False, 'default': API_HOST, 'help': f'Adres nasłuchiwania (domyślnie {API_HOST})'}),
+        (('--port',), {'type': int, 'required': False, 'default': API_PORT, 'help': f'Port (domyślnie {API_PORT})'}),
+    ]),
+}
+
+def build_parser(argv):
+    """Build argument parser, with only the invoked subcommand's parser when it is known"""
+    parser = argparse.ArgumentParser(description="Budget CLI - Prosty system zarządzania budżetem domowym")
+    for flags, options in GLOBAL_OPTIONS:
+        parser.add_argument(*flags, **options)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    command = find_command(argv)
+    names = [command] if command in COMMANDS else list(COMMANDS)
+    for name in names:
+        help_text, arguments = COMMANDS[name]
+        subparser = subparsers.add_parser(name, help=help_text)
+        for flags, options in arguments:
+            subparser.add_argument(*flags, **options)
+
+    if len(names) < len(COMMANDS):
+        # Top-level usage in errors lists every command, so report them with the full parser
+        parser.error = lambda message: build_parser([]).parse_args(argv)
+    return parser
+
+def find_command(argv):
+    """Get the subcommand name from argv, skipping global options and their values"""
+    takes_value = {flag for flags, options in GLOBAL_OPTIONS if options.get('action') != 'store_true' for flag in flags}
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument in takes_value:
+            next(arguments, None)
+        elif not argument.startswith('-'):
+            return argument
+    return None
+
+# === MAIN ===
+
+def run_command(args):
+    """Run a parsed subcommand against the data file"""
+    data_file = resolve_data_file()
+
+    # Handle status command
+    if args.command == 'status':
+        data = load_data(data_file, months=[get_current_month()])
+        month = get_current_month()
+        spent = get_month_expenses(data, month)
+        limit = get_limit_for_month(data, month)
+        remaining = limit - spent
+
+        # Calculate balance
+        current_balance = calculate_current_balance(data)
+        month_income, _ = calculate_balance_for_month(data, month)
+
+        if args.detailed:
+            details = calculate_detailed_status(limit, spent, month)
+            output = format_detailed_status_with_balance(limit, spent, month, details,
+                                                         current_balance, month_income)
+        else:
+            output = format_status_with_balance(limit, spent, remaining, month,
+                                                current_balance, month_income)
+
+        print(output)
+
+    # Handle add command
+    elif args.command == 'add':
+        amount = validate_amount(args.amount)
+        category = validate_string(args.category, "Kategoria")
+        description = validate_string(args.description, "Opis")
+        transaction_date = validate_date(args.date)
+        data = load_data(data_file, defer_save=True, months=[month_of(transaction_date)])
+        add_transaction(data, amount, category, description, transaction_date)
+        save_data(data, data_file)
+        print(f"Dodano {float(to_pln(amount))} PLN ({category})")
+
+    # Handle apply-fixed command
+    elif args.command == 'apply-fixed':
+        data = load_data(data_file, months=[])
+        count, total = apply_fixed_costs(data)
+        if count > 0:
+            save_data(data, data_file)
+            print(f"Dodano {count} kosztów stałych ({to_pln(total):.2f} PLN)")
+
+    # Handle list command
+    elif args.command == 'list':
+        month = args.month if args.month else get_current_month()
+        # Category totals come from the aggregates, the transaction lists are not read
+        data = load_data(data_file, months=[month])
+        grouped = get_month_category_totals(data, month)
+        output = format_category_list(grouped)
+        print(output)
+
+    # Handle transactions command
+    elif args.command == 'transactions':
+        start, end, months = validate_date_range(args.month, args.from_date, args.to_date, args.days)
+        import streaming
+
+        transactions = streaming.stream_query(data_file, "transactions", start, end, list)
+        if transactions is None:
+            data = load_data(data_file, months=months)
+            transactions = get_entries_between(data, "transactions", start, end)
+        output = format_transactions_list(transactions)
+        print(output)
+
+    # Handle edit command
+    elif args.command == 'edit':
+        data = load_data(data_file, defer_save=True)
+        edit_transaction(data, args.transaction_id,
+                        amount=args.amount,
+                        category=args.category,
+                        description=args.description,
+                        date=args.date)
+        save_data(data, data_file)
+        print(f"Transakcja {args.transaction_id} została zaktualizowana")
+
+    # Handle delete command
+    elif args.command == 'delete':
+        data = load_data(data_file, defer_save=True)
+        transaction = delete_transaction(data, args.transaction_id)
+        save_data(data, data_file)
+        print(f"Usunięto transakcję {args.transaction_id}: {to_pln(transaction['amount']):.2f} PLN ({transaction['category']})")
+
+    # Handle set-limit command
+    elif args.command == 'set-limit':
+        amount = validate_amount(args.amount)
+        data = load_data(data_file, defer_save=True, months=[])
+        set_limit(data, amount, args.month)
+        save_data(data, data_file)
+        if args.month:
+            print(f"Ustawiono limit dla {args.month}: {to_pln(amount):.2f} PLN")
+        else:
+            print(f"Ustawiono domyślny limit: {to_pln(amount):.2f} PLN")
+
+    # Handle limits command
+    elif args.command == 'limits':
+        data = load_data(data_file, months=[])
+        output = format_limits_list(data.get("limits", {}))
+        print(output)
+
+    # Handle fixed-list command
+    elif args.command == 'fixed-list':
+        data = load_data(data_file, months=[])
+        output = format_fixed_costs_list(data.get("fixed_costs", []))
+        print(output)
+
+    # Handle fixed-add command
+    elif args.command == 'fixed-add':
+        amount = validate_amount(args.amount)
+        category = validate_string(args.category, "Kategoria")
+        description = validate_string(args.description, "Opis")
+        data = load_data(data_file, defer_save=True, months=[])
+        fixed_cost = add_fixed_cost(data, amount, category, description)
+        save_data(data, data_file)
+        print(f"Dodano koszt stały {fixed_cost['id']}: {to_pln(amount):.2f} PLN ({category})")
+
+    # Handle fixed-edit command
+    elif args.command == 'fixed-edit':
+        data = load_data(data_file, defer_save=True, months=[])
+        edit_fixed_cost(data, args.fixed_cost_id,
+                       amount=args.amount,
+                       category=args.category,
+                       description=args.description)
+        save_data(data, data_file)
+        print(f"Koszt stały {args.fixed_cost_id} został zaktualizowany")
+
+    # Handle fixed-delete command
+    elif args.command == 'fixed-delete':
+        data = load_data(data_file, defer_save=True, months=[])
+        fixed_cost = delete_fixed_cost(data, args.fixed_cost_id)
+        save_data(data, data_file)
+        print(f"Usunięto koszt stały {args.fixed_cost_id}: {to_pln(fixed_cost['amount']):.2f} PLN ({fixed_cost['category']})")
+
+    # Handle set-balance command
+    elif args.command == 'set-balance':
+        amount = validate_amount(args.amount)
+        data = load_data(data_file, defer_save=True, months=[])
+        set_initial_balance(data, amount)
+        save_data(data, data_file)
+        print(f"Ustawiono początkowe saldo portfela: {to_pln(amount):.2f} PLN")
+
+    # Handle balance command
+    elif args.command == 'balance':
+        month = validate_month(args.month) if args.month else None
+        data = load_data(data_file, months=[])
+        current_balance = calculate_current_balance(data)
+
+        if month and args.detailed:
+            month_income, month_expenses = calculate_balance_for_month(data, month)
+            print(f"""=== SALDO PORTFELA NA KONIEC {month} ===
+Saldo na początku miesiąca: {to_pln(calculate_balance_at_month_end(data, previous_month(month))):.2f} PLN
+Przychody w miesiącu: {to_pln(month_income):.2f} PLN
+Wydatki w miesiącu: {to_pln(month_expenses):.2f} PLN
+Saldo na koniec miesiąca: {to_pln(calculate_balance_at_month_end(data, month)):.2f} PLN""")
+        elif month:
+            print(f"Saldo portfela na koniec {month}: {to_pln(calculate_balance_at_month_end(data, month)):.2f} PLN")
+        elif args.detailed:
+            # Show monthly breakdown
+            total_income = calculate_total_income(data)
+            total_expenses = calculate_total_expenses(data)
+            initial = data.get("initial_balance", 0)
+
+            print(f"""=== SZCZEGÓŁOWE SALDO PORTFELA ===
+Początkowe saldo: {to_pln(initial):.2f} PLN
+Suma wszystkich przychodów: {to_pln(total_income):.2f} PLN
+Suma wszystkich wydatków: {to_pln(total_expenses):.2f} PLN
+Obecne saldo: {to_pln(current_balance):.2f} PLN""")
+        else:
+            print(f"Obecne saldo portfela: {to_pln(current_balance):.2f} PLN")
+
+    # Handle recurring-list command
+    elif args.command == 'recurring-list':
+        data = load_data(data_file, months=[])
+        output = format_recurring_income_list(data.get("recurring_income", []))
+        print(output)
+
+    # Handle recurring-add command
+    elif args.command == 'recurring-add':
+        amount = validate_amount(args.amount)
+        description = validate_string(args.description, "Opis")
+        data = load_data(data_file, defer_save=True, months=[])
+        income = add_recurring_income(data, amount, description)
+        save_data(data, data_file)
+        print(f"Dodano przychód cykliczny {income['id']}: {to_pln(amount):.2f} PLN ({description})")
+
+    # Handle recurring-edit command
+    elif args.command == 'recurring-edit':
+        data = load_data(data_file, defer_save=True, months=[])
+        edit_recurring_income(data, args.income_id,
+                             amount=args.amount,
+                             description=args.description)
+        save_data(data, data_file)
+        print(f"Przychód cykliczny {args.income_id} został zaktualizowany")
+
+    # Handle recurring-delete command
+    elif args.command == 'recurring-delete':
+        data = load_data(data_file, defer_save=True, months=[])
+        income = delete_recurring_income(data, args.income_id)
+        save_data(data, data_file)
+        print(f"Usunięto przychód cykliczny {args.income_id}: {to_pln(income['amount']):.2f} PLN ({income['description']})")
+
+    # Handle apply-recurring-income command
+    elif args.command == 'apply-recurring-income':
+        data = load_data(data_file, months=[])
+        count, total = apply_recurring_income(data)
+        if count > 0:
+            save_data(data, data_file)
+            print(f"Dodano {count} przychodów cyklicznych ({to_pln(total):.2f} PLN)")
+
+    # Handle income-add command
+    elif args.command == 'income-add':
+        amount = validate_amount(args.amount)
+        description = validate_string(args.description, "Opis")
+        income_date = validate_date(args.date)
+        data = load_data(data_file, defer_save=True, months=[month_of(income_date)])
+        income = add_one_time_income(data, amount, description, income_date)
+        save_data(data, data_file)
+        print(f"Dodano przychód jednorazowy {income['id']}: {to_pln(amount):.2f} PLN ({description})")
+
+    # Handle income-list command
+    elif args.command == 'income-list':
+        month = args.month if args.month else get_current_month()
+        data = load_data(data_file, months=[month])
+        income = get_month_income(data, month)
+        output = format_one_time_income_list(income)
+        print(output)
+
+    # Handle income-edit command
+    elif args.command == 'income-edit':
+        data = load_data(data_file, defer_save=True)
+        edit_one_time_income(data, args.income_id,
+                            amount=args.amount,
+                            description=args.description,
+                            date=args.date)
+        save_data(data, data_file)
+        print(f"Przychód jednorazowy {args.income_id} został zaktualizowany")
+
+    # Handle income-delete command
+    elif args.command == 'income-delete':
+        data = load_data(data_file, defer_save=True)
+        income = delete_one_time_income(data, args.income_id)
+        save_data(data, data_file)
+        print(f"Usunięto przychód jednorazowy {args.income_id}: {to_pln(income['amount']):.2f} PLN ({income['description']})")
+
+    # Handle import command
+    elif args.command == 'import':
+        delimiter = "\t" if args.delimiter == "\\t" else args.delimiter
+        if len(delimiter) != 1:
+            print("BŁĄD: Separator musi być pojedynczym znakiem (np. , lub ; lub \\t)")
+            print(f"Podano: {args.delimiter}")
+            sys.exit(1)
+        rows, errors, credits = read_csv_transactions(args.csv_file, args.category, delimiter)
+        if errors:
+            print(format_import_errors(args.csv_file, errors))
+            sys.exit(1)
+        # Duplicates can only be in the months covered by the file
+        months = sorted({month_of(row[0]) for row in rows})
+        data = load_data(data_file, defer_save=True, months=months)
+        imported, skipped = import_transactions(data, rows)
+        if has_pending_changes(data):
+            save_data(data, data_file)
+        print(f"Zaimportowano {imported} transakcji z {args.csv_file}")
+        if skipped:
+            print(f"Pominięto {skipped} transakcji, które już istnieją")
+        if credits:
+            print(f"Pominięto {credits} wierszy z wpływami (kwota dodatnia w wyciągu z wydatkami ujemnymi)")
+
+    # Handle analyze command
+    elif args.command == 'analyze':
+        import analytics
+
+        validate_month_range(args.from_month, args.to_month)
+        months = month_span(args.from_month, args.to_month) if args.from_month and args.to_month else None
+        data = load_data(data_file, months=months)
+        archived = archived_between(data, "transactions", args.from_month or "", (args.to_month or "") + "~")
+        columns = analytics.build_columns(data["transactions"] + archived, args.from_month, args.to_month)
+        output = format_analysis(analytics.month_category_totals(columns),
+                                 analytics.top_categories(columns, max(args.top, 0)),
+                                 analytics.daily_totals(columns) if args.daily else {},
+                                 analytics.ENGINE,
+                                 show_categories=args.categories,
+                                 show_daily=args.daily)
+        print(output)
+
+    # Handle report command
+    elif args.command == 'report':
+        validate_month_range(args.from_month, args.to_month)
+        end_month = args.to_month or get_current_month()
+        start_month = args.from_month or f"{end_month[:4]}-01"
+        validate_month_range(start_month, end_month)
+        months = month_span(start_month, end_month)
+        data = load_data(data_file, months=months)
+        report = build_report(data, start_month, end_month)
+        print(REPORT_FORMATS[args.output_format](report))
+
+    # Handle search command
+    elif args.command == 'search':
+        import text_search
+
+        groups = validate_search_query(args.terms)
+        if (args.month, args.from_date, args.to_date, args.days) == (None, None, None, None):
+            start, end, months = "", "~", None
+        else:
+            start, end, months = validate_date_range(args.month, args.from_date, args.to_date, args.days)
+        min_amount, max_amount = validate_amount_range(args.min_amount, args.max_amount)
+        # SQLite searches in SQL, the other storages need the entries of the period in memory
+        if months is None and get_storage(data_file) is STORAGE_BACKENDS["sqlite"]:
+            months = []
+        data = load_data(data_file, months=months)
+        found = {}
+        for key, entry_type in (("transactions", "expenses"), ("one_time_income", "income")):
+            found[key] = []
+            if args.entry_type in ("all", entry_type):
+                found[key] = text_search.search_entries(data, data_file, key, groups, start, end, min_amount, max_amount)
+        print(text_search.format_search_results(found["transactions"], found["one_time_income"]))
+
+    # Handle verify-aggregates command
+    elif args.command == 'verify-aggregates':
+        data = load_data(data_file, defer_save=True)
+        drifts = verify_aggregates(data)
+        if not drifts:
+            print("Sumy są zgodne z transakcjami i przychodami")
+        else:
+            for label, stored, expected in drifts:
+                print(f"Rozbieżność {label}: zapisano {to_pln(stored):.2f} PLN, powinno być {to_pln(expected):.2f} PLN")
+            commit_change(data, {"op": "set", "key": "aggregates", "value": build_aggregates(data)})
+            print(f"Przebudowano sumy ({len(drifts)} rozbieżności)")
+        if has_pending_changes(data):
+            save_data(data, data_file)
+
+    # Handle compact command
+    elif args.command == 'compact':
+        import journal
+
+        data = load_data(data_file, defer_save=True)
+        count = len(journal.read_journal(data_file))
+        compact_storage(data, data_file)
+        print(f"Skompaktowano plik {data_file} (wpisy dziennika: {count})")
+
+    # Handle archive command
+    elif args.command == 'archive':
+        import archives
+
+        year = validate_closed_year(args.year)
+        data = load_data(data_file, defer_save=True)
+        moved = archives.archive_year(data, year)
+        if not any(moved.values()):
+            print(f"Brak transakcji i przychodów z roku {year} do przeniesienia")
+        else:
+            save_data(data, data_file)
+            print(f"Przeniesiono do {archives.archive_path(year)}: {moved['transactions']} transakcji "
+                  f"i {moved['one_time_income']} przychodów z roku {year}")
+        if has_pending_changes(data):
+            save_data(data, data_file)
+
+    # Handle unarchive command
+    elif args.command == 'unarchive':
+        import archives
+
+        data = load_data(data_file, defer_save=True)
+        if args.year not in data.get("archived_years", []):
+            print(f"BŁĄD: Rok {args.year} nie jest zarchiwizowany")
+            print(f"Zarchiwizowane lata: {', '.join(data.get('archived_years', [])) or 'brak'}")
+            sys.exit(1)
+        moved = archives.unarchive_year(data, args.year)
+        save_data(data, data_file)
+        # The data file no longer lists the year, so the archive is not read any more
+        os.unlink(archives.archive_path(args.year))
+        print(f"Przywrócono z archiwum {moved['transactions']} transakcji i {moved['one_time_income']} przychodów "
+              f"z roku {args.year}")
+
+    # Handle migrate-sqlite command
+    elif args.command == 'migrate-sqlite':
+        import sqlite_storage
+
+        data = sqlite_storage.migrate_json_to_sqlite(DATA_FILE, SQLITE_FILE)
+        print(f"Przeniesiono {len(data['transactions'])} transakcji i {len(data['one_time_income'])} przychodów do {SQLITE_FILE}")
+        print(f"Plik {DATA_FILE} nie jest już używany - aplikacja korzysta z bazy SQLite")
+
+    # Handle migrate-partitioned command
+    elif args.command == 'migrate-partitioned':
+        import partitioned_storage
+
+        data = partitioned_storage.migrate_json_to_partitioned(DATA_FILE, MANIFEST_FILE)
+        print(f"Przeniesiono dane do {len(data['_partitions'])} plików miesięcznych w {os.path.join(os.path.dirname(MANIFEST_FILE), PARTITIONS_DIR)}")
+        print(f"Plik {DATA_FILE} nie jest już używany - aplikacja korzysta z {MANIFEST_FILE}")
+
+    # Handle migrate-binary command
+    elif args.command == 'migrate-binary':
+        import binary_storage
+
+        data = binary_storage.migrate_json_to_binary(DATA_FILE, BINARY_FILE)
+        print(f"Przeniesiono {len(data['transactions'])} transakcji i {len(data['one_time_income'])} przychodów do {BINARY_FILE}")
+        print(f"Plik {DATA_FILE} nie jest już używany - aplikacja korzysta z {BINARY_FILE}")
+
+    # Handle export-json command
+    elif args.command == 'export-json':
+        if data_file != BINARY_FILE:
+            print(f"BŁĄD: Dane nie są przechowywane w pliku binarnym {BINARY_FILE}")
+            print(f"Aplikacja korzysta z: {data_file}")
+            sys.exit(1)
+        import binary_storage
+
+        data = binary_storage.export_binary_to_json(BINARY_FILE, DATA_FILE)
+        print(f"Przeniesiono {len(data['transactions'])} transakcji i {len(data['one_time_income'])} przychodów do {DATA_FILE}")
+        print(f"Plik {BINARY_FILE} nie jest już używany (kopia: {BINARY_FILE}.bak)")
+
+    # Handle batch command
+    elif args.command == 'batch':
+        import batch_runner
+        import contextlib
+
+        # Notices printed while loading would break the JSON lines on stdout
+        with contextlib.redirect_stdout(sys.stderr) if args.as_json else contextlib.nullcontext():
+            results, stopped, saved = batch_runner.run_batch(args.lines, data_file, atomic=args.atomic)
+        if args.as_json:
+            for result in results:
+                print(json.dumps(result, ensure_ascii=False))
+            print(json.dumps({"stopped_at_line": stopped, "saved": saved}))
+        else:
+            print(batch_runner.format_batch_results(results, stopped, saved))
+        if stopped is not None or any(result["code"] != 0 for result in results):
+            sys.exit(1)
+
+    # Handle serve command
+    elif args.command == 'serve':
+        import server
+        server.serve(data_file)
+
+    # Handle api command
+    elif args.command == 'api':
+        import server
+        server.serve_api(data_file, args.host, args.port)
+
+def main():
+    """Run the command given on the command line"""
+    # A running daemon already holds the data in memory; profiling measures a direct run
+    # and a batch reads its input here, loading the data only once anyway
+    if (os.path.exists(SOCKET_FILE) and not any(arg.startswith('--profile') for arg in sys.argv[1:])
+            and find_command(sys.argv[1:]) != 'batch'):
+        import server
+        code = server.forward_to_daemon(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+
+    # Parse arguments
+    args = build_parser(sys.argv[1:]).parse_args()
+    if args.profile or args.profile_output or args.profile_cprofile:
+        start_profiling(args)
+    # Read before taking the data lock, so a slow producer does not hold it and a retry sees the same lines
+    if args.command == 'batch':
+        import batch_runner
+        args.lines = batch_runner.read_batch_input(args.file)
+    # Servers take the data lock for each request themselves
+    if args.command in ('serve', 'api'):
+        run_command(args)
+    else:
+        run_locked(args)
@@ -0,0 +1,82 @@
+"""Append-only change journal of the JSON data file (BUDGET_JOURNAL=1)"""
+import json
+import os
+import sys
+
+from budget_core import (apply_change, compact_deleted, entry_json, find_item, journal_path,
+                         profiled)
+
+# === JOURNAL ===
+
+@profiled("journal_append")
+def append_journal(path, changes):
+    """Append change records to the journal, one JSON object per line"""
+    try:
+        with open(journal_path(path), 'a', encoding='utf-8') as f:
+            for change in changes:
+                f.write(json.dumps(change, default=entry_json) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    except PermissionError:
+        print(f"BŁĄD: Nie można zapisać do pliku {journal_path(path)}")
+        print("Plik jest otwarty w innym programie. Zamknij edytor i spróbuj ponownie.")
+        sys.exit(1)
+
+def read_journal(path):
+    """Read change records from the journal, skip a torn last line"""
+    jpath = journal_path(path)
+    if not os.path.exists(jpath):
+        return []
+
+    with open(jpath, 'r', encoding='utf-8') as f:
+        lines = [line for line in f.read().split("\n") if line.strip()]
+
+    changes = []
+    for number, line in enumerate(lines, 1):
+        try:
+            changes.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Last line may be incomplete after a crash during append
+            if number == len(lines):
+                break
+            print(f"BŁĄD: Dziennik {jpath} jest uszkodzony (linia {number}).")
+            print(f"Sprawdź plik lub przywróć z backupu: {path}.bak")
+            sys.exit(1)
+    return changes
+
+@profiled("journal_replay")
+def replay_journal(data, path):
+    """Replay journal on top of the loaded snapshot, return number of changes"""
+    changes = read_journal(path)
+
+    for change in changes:
+        # Appends already present in the snapshot (crash during compaction) become updates
+        if change["op"] == "append":
+            item = change["item"]
+            if find_item(data, change["key"], item.get("id")) is not None:
+                change = {"op": "update", "key": change["key"], "id": item["id"], "fields": item}
+        apply_change(data, change)
+
+    compact_deleted(data)
+    return len(changes)
+
+def journal_overlay(changes, key):
+    """Fold journal changes of one list into (updated fields, removed IDs, appended entries)"""
+    updates = {}
+    removed = set()
+    appended = {}
+    for change in changes:
+        if change["key"] != key:
+            continue
+        if change["op"] == "append":
+            appended[change["item"].get("id")] = dict(change["item"])
+        elif change["op"] == "update":
+            target = appended.get(change["id"])
+            if target is None:
+                target = updates.setdefault(change["id"], {})
+            target.update(change["fields"])
+        elif change["op"] == "remove":
+            appended.pop(change["id"], None)
+            updates.pop(change["id"], None)
+            removed.add(change["id"])
+    return updates, removed, appended
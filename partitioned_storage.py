@@ -0,0 +1,187 @@
+"""Partitioned storage: a manifest and one JSON file of entries per month"""
+import json
+import os
+import sys
+
+from budget_core import (PARTITIONS_DIR, backup_file, load_data, month_of, profiled, snapshot_of,
+                         to_entries, write_json_atomic)
+
+# === PARTITIONED STORAGE ===
+
+PARTITIONED_KEYS = ("transactions", "one_time_income")
+
+def partition_path(path, month_str):
+    """Get path of the partition file for a month"""
+    return os.path.join(os.path.dirname(path), PARTITIONS_DIR, f"{month_str}.json")
+
+def create_partitioned_data(data, path):
+    """Create new manifest (and partitions) for data"""
+    data["_partitions"] = set()
+    data["_loaded_months"] = None
+    data["_partition_of"] = {}
+    os.makedirs(os.path.join(os.path.dirname(path), PARTITIONS_DIR), exist_ok=True)
+    write_partitions(data, path, partition_months(data))
+
+@profiled("read")
+def read_partitioned_data(path, months=None):
+    """Read manifest and month partitions (all when months is None)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except json.JSONDecodeError:
+        print(f"BŁĄD: Plik {path} jest uszkodzony (nieprawidłowy JSON).")
+        print(f"Sprawdź składnię lub przywróć z backupu: {path}.bak")
+        print("Nie próbowano nadpisać pliku.")
+        sys.exit(1)
+
+    # Aggregates and the grosze conversion need the full history
+    if "aggregates" not in manifest or manifest.get("amount_unit") != "grosze":
+        months = None
+
+    data = dict(manifest)
+    # Manifests written before the aggregates kept totals per month, the months are enough
+    partitions = set(data.pop("partitions", []))
+    for key in PARTITIONED_KEYS:
+        data[key] = []
+
+    # Remember in which partition each loaded entry lives
+    partition_of = {}
+    to_load = sorted(partitions) if months is None else sorted(m for m in months if m in partitions)
+    for month in to_load:
+        partition = read_partition(path, month)
+        for key in PARTITIONED_KEYS:
+            data[key].extend(partition[key])
+            for item in partition[key]:
+                partition_of[(key, item.get("id"))] = month
+    # Lists keep ID (insertion) order like the other storages
+    for key in PARTITIONED_KEYS:
+        data[key].sort(key=lambda item: item["id"])
+
+    data["_partitions"] = partitions
+    data["_loaded_months"] = None if months is None else set(months)
+    data["_partition_of"] = partition_of
+    return data
+
+def read_partition(path, month_str):
+    """Read a single month partition"""
+    ppath = partition_path(path, month_str)
+    if not os.path.exists(ppath):
+        return {key: [] for key in PARTITIONED_KEYS}
+    try:
+        with open(ppath, 'r', encoding='utf-8') as f:
+            partition = json.load(f)
+    except json.JSONDecodeError:
+        print(f"BŁĄD: Plik {ppath} jest uszkodzony (nieprawidłowy JSON).")
+        print(f"Sprawdź składnię lub przywróć z backupu: {ppath}.bak")
+        sys.exit(1)
+    for key in PARTITIONED_KEYS:
+        partition.setdefault(key, [])
+    return partition
+
+def partition_months(data):
+    """Get months of all loaded transactions and income"""
+    months = set()
+    for key in PARTITIONED_KEYS:
+        for item in data.get(key, []):
+            months.add(month_of(item["date"]))
+    return months
+
+def dirty_partitions(data, changes):
+    """Get months whose partitions are touched by the change records"""
+    partition_of = data["_partition_of"]
+    dirty = set()
+    for change in changes:
+        key = change["key"]
+        if key not in PARTITIONED_KEYS:
+            continue
+        if change["op"] == "append":
+            dirty.add(month_of(change["item"]["date"]))
+            continue
+        # Updates and removals touch the entry's old partition, and the new one for date edits
+        old_month = partition_of.get((key, change["id"]))
+        if old_month:
+            dirty.add(old_month)
+        if change["op"] == "update" and "date" in change["fields"]:
+            dirty.add(month_of(change["fields"]["date"]))
+    return dirty
+
+def save_partitioned_data(data, path):
+    """Save data - rewrite only the partitions touched by pending changes, then the manifest"""
+    changes = data.pop("_changes", [])
+    if data.pop("_needs_snapshot", False) and data["_loaded_months"] is None:
+        dirty = partition_months(data) | set(data["_partitions"])
+    else:
+        dirty = dirty_partitions(data, changes)
+    write_partitions(data, path, dirty)
+
+def write_partitions(data, path, months):
+    """Write given month partitions and the manifest listing the partition months"""
+    loaded = data["_loaded_months"]
+    partitions = data["_partitions"]
+    partition_of = data["_partition_of"]
+
+    grouped = {month: {key: [] for key in PARTITIONED_KEYS} for month in months}
+    for key in PARTITIONED_KEYS:
+        for item in data[key]:
+            month = month_of(item["date"])
+            if month in grouped:
+                grouped[month][key].append(item)
+
+    for month, partition in grouped.items():
+        # Partition not read by this command: only new entries can be in memory
+        if loaded is not None and month not in loaded:
+            stored = read_partition(path, month)
+            for key in PARTITIONED_KEYS:
+                partition[key] = stored[key] + partition[key]
+
+        # Keep entries in ID (insertion) order like the single-file layout
+        for key in PARTITIONED_KEYS:
+            partition[key].sort(key=lambda item: item.get("id", 0))
+
+        ppath = partition_path(path, month)
+        if not partition["transactions"] and not partition["one_time_income"]:
+            partitions.discard(month)
+            if os.path.exists(ppath):
+                os.unlink(ppath)
+            continue
+
+        os.makedirs(os.path.dirname(ppath), exist_ok=True)
+        if os.path.exists(ppath):
+            backup_file(ppath)
+        write_json_atomic(partition, ppath)
+
+        partitions.add(month)
+        for key in PARTITIONED_KEYS:
+            for item in partition[key]:
+                partition_of[(key, item.get("id"))] = month
+
+    manifest = {k: v for k, v in snapshot_of(data).items() if k not in PARTITIONED_KEYS}
+    manifest["partitions"] = sorted(partitions)
+    if os.path.exists(path):
+        backup_file(path)
+    write_json_atomic(manifest, path)
+
+def read_partitioned_generation(path):
+    """Get save generation stored in the manifest"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("generation", 0)
+
+def compact_partitioned_data(data, path):
+    """Rewrite all partitions and the manifest"""
+    data.pop("_changes", None)
+    data.pop("_needs_snapshot", None)
+    if data["_loaded_months"] is not None:
+        data.update(to_entries(read_partitioned_data(path)))
+        data.pop("_index", None)
+    write_partitions(data, path, partition_months(data) | set(data["_partitions"]))
+
+def migrate_json_to_partitioned(json_path, manifest_path):
+    """One-shot copy of JSON data file into month partitions"""
+    if os.path.exists(manifest_path):
+        print(f"BŁĄD: Plik {manifest_path} już istnieje.")
+        print("Usuń go (wraz z katalogiem partycji) ręcznie, jeśli chcesz przeprowadzić migrację ponownie.")
+        sys.exit(1)
+
+    data = load_data(json_path)
+    create_partitioned_data(data, manifest_path)
+    return data
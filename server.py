@@ -0,0 +1,568 @@
+"""Daemon (serve) and HTTP API (api) answering commands from data kept in memory"""
+import json
+import os
+import sys
+import time
+
+import budget_core
+from budget_core import (DataLock, LOCK_FILE, LOCK_POLL_MAX, LOCK_TIMEOUT, SOCKET_FILE,
+                         STALE_RETRIES, StaleDataError, add_transaction, auto_apply_due,
+                         build_parser, calculate_balance_at_month_end, calculate_balance_for_month,
+                         calculate_current_balance, calculate_total_expenses,
+                         calculate_total_income, check_amount, check_date, check_month,
+                         check_string, data_signature, delete_transaction, edit_transaction,
+                         find_transaction_by_id, finish_load, get_current_month,
+                         get_limit_for_month, get_month_category_totals, get_month_expenses,
+                         get_month_transactions, has_pending_changes, open_lock, read_data_file,
+                         resolve_data_file, run_locked, save_data, to_pln, try_lock)
+
+# === DAEMON ===
+
+# Bytes read from the socket at once
+SOCKET_CHUNK_SIZE = 65536
+
+def load_resident(path):
+    """Load the whole data file into memory for the daemon, keep the previous data if it fails"""
+    replace_resident(path, read_data_file(path))
+
+def replace_resident(path, data):
+    """Make loaded data the resident data, close the database of the previous one"""
+    if budget_core.RESIDENT is not None and "_sqlite" in budget_core.RESIDENT["data"]:
+        budget_core.RESIDENT["data"]["_sqlite"].close()
+    budget_core.RESIDENT = {"path": path, "data": data, "signature": data_signature(path)}
+
+def refresh_resident():
+    """Reload resident data if the data file was changed or migrated outside the daemon"""
+    path = resolve_data_file()
+    if path != budget_core.RESIDENT["path"] or data_signature(path) != budget_core.RESIDENT["signature"]:
+        load_resident(path)
+
+def read_message(conn):
+    """Read one JSON message sent until the peer shuts down writing, None if nothing was sent"""
+    chunks = []
+    while True:
+        chunk = conn.recv(SOCKET_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    if not chunks:
+        return None
+    return json.loads(b"".join(chunks).decode('utf-8'))
+
+def execute_request(argv):
+    """Run CLI arguments against the resident data, return (exit code, stdout, stderr)"""
+    import contextlib
+    import io
+    import traceback
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            args = build_parser(argv).parse_args(argv)
+            if args.command == 'serve':
+                print(f"BŁĄD: Serwer budżetu już działa ({SOCKET_FILE})")
+                code = 1
+            elif args.command == 'api':
+                print("BŁĄD: API nie może działać razem z serwerem budżetu - zatrzymaj najpierw serve")
+                code = 1
+            elif args.command == 'batch':
+                print("BŁĄD: Paczka komend jest wykonywana bezpośrednio, nie przez serwer budżetu")
+                code = 1
+            else:
+                run_locked(args)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+
+    # A failed command may leave unsaved changes behind - start again from the file
+    if code != 0 and has_pending_changes(budget_core.RESIDENT["data"]):
+        budget_core.RESIDENT["signature"] = None
+    return code, stdout.getvalue(), stderr.getvalue()
+
+def handle_connection(conn):
+    """Answer one client request: {"argv": [...]} -> {"code", "stdout", "stderr"}"""
+    # A stuck client must not block the daemon
+    conn.settimeout(5)
+    try:
+        request = read_message(conn)
+        argv = request["argv"]
+        if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+            raise ValueError("argv")
+    except (OSError, ValueError, KeyError, TypeError):
+        response = {"code": 2, "stdout": "", "stderr": "BŁĄD: Nieprawidłowe żądanie do serwera budżetu\n"}
+    else:
+        conn.settimeout(None)
+        code, stdout, stderr = execute_request(argv)
+        response = {"code": code, "stdout": stdout, "stderr": stderr}
+    try:
+        conn.sendall(json.dumps(response).encode('utf-8'))
+    except OSError:
+        pass
+
+def serve(data_file):
+    """Keep data in memory and run commands sent over the Unix socket until interrupted"""
+    import signal
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("BŁĄD: Tryb serwera wymaga gniazd Unix, niedostępnych w tym systemie")
+        sys.exit(1)
+
+    if os.path.exists(SOCKET_FILE):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(SOCKET_FILE)
+            print(f"BŁĄD: Serwer budżetu już działa ({SOCKET_FILE})")
+            sys.exit(1)
+        except OSError:
+            # Left over from a daemon that was killed
+            os.unlink(SOCKET_FILE)
+        finally:
+            probe.close()
+
+    with DataLock():
+        load_resident(data_file)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_FILE)
+    os.chmod(SOCKET_FILE, 0o600)
+    server.listen()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Serwer budżetu działa: dane {data_file}, gniazdo {SOCKET_FILE} (Ctrl+C kończy)", flush=True)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                handle_connection(conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(SOCKET_FILE):
+            os.unlink(SOCKET_FILE)
+        print("Serwer budżetu zatrzymany")
+
+def forward_to_daemon(argv):
+    """Run the command in the running daemon and print its output
+
+    Returns the exit code, or None when no daemon is listening and the
+    command has to run directly on the data file.
+    """
+    if not os.path.exists(SOCKET_FILE):
+        return None
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(SOCKET_FILE)
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        client.sendall(json.dumps({"argv": argv}).encode('utf-8'))
+        client.shutdown(socket.SHUT_WR)
+        response = read_message(client)
+    if response is None:
+        print("BŁĄD: Serwer budżetu przerwał połączenie. Sprawdź, czy komenda została wykonana.")
+        return 1
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
+
+# === HTTP API ===
+
+API_MAX_BODY = 64 * 1024  # bytes
+
+API_BATCH_DELAY = 0.005  # seconds the writer waits for more writes to join a batch
+
+# True while the writer saves, changes of the data file are then its own
+API_WRITING = False
+
+class ApiError(Exception):
+    """Request error answered with an HTTP status and a message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def api_amount(grosze):
+    """Amount for API responses, in PLN"""
+    return float(to_pln(grosze))
+
+def api_transaction(transaction):
+    """Transaction for API responses"""
+    return {
+        "id": transaction["id"],
+        "date": transaction["date"],
+        "amount": api_amount(transaction["amount"]),
+        "category": transaction["category"],
+        "description": transaction["description"]
+    }
+
+def api_month(query):
+    """Get month from the query string, current month by default"""
+    month = query.get("month", [None])[0] or get_current_month()
+    try:
+        return check_month(month)
+    except ValueError as e:
+        raise ApiError(400, str(e)) from None
+
+def api_needs_refresh():
+    """Check if resident data has to be reloaded or get the new month applied, which may save it"""
+    if auto_apply_due(budget_core.RESIDENT["data"]):
+        return True
+    if API_WRITING:
+        return False
+    path = resolve_data_file()
+    return path != budget_core.RESIDENT["path"] or data_signature(path) != budget_core.RESIDENT["signature"]
+
+async def api_refresh():
+    """Reload resident data in a worker thread if the data file was changed or migrated outside the API"""
+    import asyncio
+
+    path = resolve_data_file()
+    if path != budget_core.RESIDENT["path"] or data_signature(path) != budget_core.RESIDENT["signature"]:
+        data = await asyncio.get_running_loop().run_in_executor(None, read_data_file, path)
+        replace_resident(path, data)
+
+def api_save_copy(data):
+    """Copy of resident data to save in a worker thread while reads go on with the original
+
+    Saving changes the lists, sets and indexes of the data (tombstones,
+    partitions, generation) and the checkpoints in the aggregates, so these are
+    copied. Entries are shared.
+    """
+    import copy
+
+    saved = {key: value.copy() if isinstance(value, (list, dict, set)) else value for key, value in data.items()}
+    if "aggregates" in data:
+        saved["aggregates"] = copy.deepcopy(data["aggregates"])
+    return saved
+
+async def api_lock():
+    """Take the data lock, polling with asyncio.sleep so other requests are served meanwhile
+
+    Returns the open lock file, or None when it cannot be opened. Raises
+    ApiError 503 when another budget command holds the lock longer than LOCK_TIMEOUT.
+    """
+    import asyncio
+
+    handle = open_lock(LOCK_FILE)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    pause = 0.001
+    while handle is not None and not try_lock(handle):
+        if time.monotonic() >= deadline:
+            handle.close()
+            raise ApiError(503, f"Dane są zablokowane przez inną komendę budżetu dłużej niż {LOCK_TIMEOUT} s")
+        await asyncio.sleep(pause)
+        pause = min(pause * 2, LOCK_POLL_MAX)
+    return handle
+
+def api_status(data, query):
+    """GET /status?month=YYYY-MM"""
+    month = api_month(query)
+    spent = get_month_expenses(data, month)
+    limit = get_limit_for_month(data, month)
+    month_income, _ = calculate_balance_for_month(data, month)
+    return 200, {
+        "month": month,
+        "limit": api_amount(limit),
+        "spent": api_amount(spent),
+        "remaining": api_amount(limit - spent),
+        "income": api_amount(month_income),
+        "month_balance": api_amount(month_income - spent),
+        "balance": api_amount(calculate_current_balance(data))
+    }
+
+def api_balance(data, query):
+    """GET /balance?month=YYYY-MM (month optional, adds the balance at its end)"""
+    result = {
+        "initial_balance": api_amount(data.get("initial_balance", 0)),
+        "total_income": api_amount(calculate_total_income(data)),
+        "total_expenses": api_amount(calculate_total_expenses(data)),
+        "balance": api_amount(calculate_current_balance(data))
+    }
+    if "month" in query:
+        month = api_month(query)
+        result["month"] = month
+        result["month_end_balance"] = api_amount(calculate_balance_at_month_end(data, month))
+    return 200, result
+
+def api_transactions(data, query):
+    """GET /transactions?month=YYYY-MM"""
+    month = api_month(query)
+    return 200, [api_transaction(t) for t in get_month_transactions(data, month)]
+
+def api_categories(data, query):
+    """GET /categories?month=YYYY-MM"""
+    month = api_month(query)
+    return 200, {category: api_amount(total) for category, total in get_month_category_totals(data, month).items()}
+
+def api_fields(body, required):
+    """Validate transaction fields of a request body, return them as given (the CLI validators accept them)"""
+    if not isinstance(body, dict):
+        raise ApiError(400, "Treść żądania musi być obiektem JSON")
+    for field in required:
+        if body.get(field) is None:
+            raise ApiError(400, f"Brak pola {field}")
+    checks = {
+        "amount": check_amount,
+        "category": lambda value: check_string(value, "Kategoria"),
+        "description": lambda value: check_string(value, "Opis"),
+        "date": check_date,
+    }
+    fields = {}
+    for field, check in checks.items():
+        value = body.get(field)
+        if value is None:
+            continue
+        if field != "amount" and not isinstance(value, str):
+            raise ApiError(400, f"Pole {field} musi być tekstem")
+        try:
+            check(value)
+        except ValueError as e:
+            raise ApiError(400, str(e)) from None
+        fields[field] = value
+    return fields
+
+def api_transaction_id(value):
+    """Parse transaction ID from the URL"""
+    if not value.isdigit():
+        raise ApiError(404, f"Nie znaleziono transakcji o ID {value}")
+    return int(value)
+
+def api_add(body):
+    """POST /transactions - operation for the writer"""
+    fields = api_fields(body, ("amount", "category", "description"))
+
+    def operation(data):
+        add_transaction(data, check_amount(fields["amount"]), check_string(fields["category"], "Kategoria"),
+                        check_string(fields["description"], "Opis"),
+                        fields.get("date") or time.strftime("%Y-%m-%d"))
+        return 201, api_transaction(find_transaction_by_id(data, data["next_transaction_id"] - 1))
+    return operation
+
+def api_edit(transaction_id, body):
+    """PATCH /transactions/<id> - operation for the writer"""
+    fields = api_fields(body, ())
+
+    def operation(data):
+        if find_transaction_by_id(data, transaction_id) is None:
+            raise ApiError(404, f"Nie znaleziono transakcji o ID {transaction_id}")
+        return 200, api_transaction(edit_transaction(data, transaction_id, **fields))
+    return operation
+
+def api_delete(transaction_id):
+    """DELETE /transactions/<id> - operation for the writer"""
+    def operation(data):
+        if find_transaction_by_id(data, transaction_id) is None:
+            raise ApiError(404, f"Nie znaleziono transakcji o ID {transaction_id}")
+        return 200, api_transaction(delete_transaction(data, transaction_id))
+    return operation
+
+# Read routes: path -> handler(data, query)
+API_READS = {
+    "status": api_status,
+    "balance": api_balance,
+    "transactions": api_transactions,
+    "categories": api_categories,
+}
+
+def api_route(method, parts, body):
+    """Map a request to ("read", handler) or ("write", operation)"""
+    if len(parts) == 1 and parts[0] in API_READS:
+        if method == "GET":
+            return "read", API_READS[parts[0]]
+        if method == "POST" and parts[0] == "transactions":
+            return "write", api_add(body)
+        raise ApiError(405, f"Metoda {method} nie jest obsługiwana dla /{parts[0]}")
+    if len(parts) == 2 and parts[0] == "transactions":
+        if method == "PATCH":
+            return "write", api_edit(api_transaction_id(parts[1]), body)
+        if method == "DELETE":
+            return "write", api_delete(api_transaction_id(parts[1]))
+        raise ApiError(405, f"Metoda {method} nie jest obsługiwana dla /transactions/<id>")
+    raise ApiError(404, "Nie znaleziono zasobu")
+
+async def read_http_request(reader):
+    """Read an HTTP request, return (method, path, query, body)"""
+    from urllib.parse import parse_qs, urlsplit
+
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ApiError(400, "Nieprawidłowe żądanie HTTP")
+    method, target, _ = request_line
+
+    length = 0
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            if not value.strip().isdigit():
+                raise ApiError(400, "Nieprawidłowy nagłówek Content-Length")
+            length = int(value)
+    if length > API_MAX_BODY:
+        raise ApiError(413, "Treść żądania jest za duża")
+
+    body = None
+    if length:
+        try:
+            body = json.loads((await reader.readexactly(length)).decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError(400, "Treść żądania nie jest prawidłowym JSON") from None
+
+    url = urlsplit(target)
+    return method, [part for part in url.path.split("/") if part], parse_qs(url.query), body
+
+def api_apply_batch(data, batch):
+    """Apply the current month and a batch of write operations to the data in memory
+
+    Operations of None are reads waiting for the data to be refreshed.
+    """
+    finish_load(data, budget_core.RESIDENT["path"], defer_save=True)
+    results = []
+    for operation, future in batch:
+        try:
+            results.append((future, None if operation is None else operation(data)))
+        except ApiError as e:
+            results.append((future, e))
+    return results
+
+async def api_commit(batch):
+    """Apply a batch holding the data lock and save it once, again when another writer saved in between
+
+    Reloading and saving run in a worker thread, so reads are answered meanwhile.
+    """
+    import asyncio
+    global API_WRITING
+
+    for attempt in range(1, STALE_RETRIES + 1):
+        handle = await api_lock()
+        try:
+            await api_refresh()
+            data = budget_core.RESIDENT["data"]
+            results = api_apply_batch(data, batch)
+            if has_pending_changes(data):
+                # Reads keep the unsaved changes in data until the copy is written
+                saved = api_save_copy(data)
+                API_WRITING = True
+                await asyncio.get_running_loop().run_in_executor(None, save_data, saved, budget_core.RESIDENT["path"])
+                budget_core.RESIDENT["data"] = saved
+            return results
+        except StaleDataError as e:
+            # Resident data holds the rejected changes - reload it from the file
+            budget_core.RESIDENT["signature"] = None
+            if attempt == STALE_RETRIES:
+                raise
+            print(f"Uwaga: dane zostały zapisane przez inny proces ({e}), ponawiam zapis", file=sys.stderr)
+        finally:
+            API_WRITING = False
+            if handle is not None:
+                # Closing the file releases the lock
+                handle.close()
+
+async def api_writer(queue):
+    """Apply queued write operations in batches with one save per batch"""
+    import asyncio
+
+    while True:
+        batch = [await queue.get()]
+        # Writes arriving in a burst join the batch
+        await asyncio.sleep(API_BATCH_DELAY)
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+
+        try:
+            results = await api_commit(batch)
+        except ApiError as e:
+            results = [(future, e) for _, future in batch]
+        except (Exception, SystemExit) as e:
+            # Nothing from this batch is known to be saved - reload from the file next time
+            if budget_core.RESIDENT is not None:
+                budget_core.RESIDENT["signature"] = None
+            error = ApiError(500, f"Nie udało się zapisać zmian: {e}")
+            results = [(future, error) for _, future in batch]
+
+        for future, outcome in results:
+            if future.cancelled():
+                continue
+            if isinstance(outcome, ApiError):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+async def api_submit(queue, operation):
+    """Queue an operation for the writer and wait for its result"""
+    import asyncio
+
+    future = asyncio.get_running_loop().create_future()
+    await queue.put((operation, future))
+    return await future
+
+async def api_handle(reader, writer, queue):
+    """Answer one HTTP request with a JSON response"""
+    import contextlib
+    import http
+    import io
+    import traceback
+
+    try:
+        method, parts, query, body = await read_http_request(reader)
+        kind, handler = api_route(method, parts, body)
+        if kind == "read":
+            # Reloading the file or applying the new month may save, which only the writer does
+            if api_needs_refresh():
+                await api_submit(queue, None)
+            # Messages printed by the shared functions are not part of the response
+            with contextlib.redirect_stdout(io.StringIO()):
+                status, payload = handler(budget_core.RESIDENT["data"], query)
+        else:
+            status, payload = await api_submit(queue, handler)
+    except ApiError as e:
+        status, payload = e.status, {"error": str(e)}
+    except (Exception, SystemExit):
+        traceback.print_exc()
+        status, payload = 500, {"error": "Wewnętrzny błąd serwera"}
+
+    content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    writer.write(f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                 "Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(content)}\r\n"
+                 "Connection: close\r\n\r\n".encode('latin-1') + content)
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+def serve_api(data_file, host, port):
+    """Serve the JSON HTTP API from resident data until interrupted"""
+    import asyncio
+
+    async def main():
+        queue = asyncio.Queue()
+        writer_task = asyncio.create_task(api_writer(queue))
+        server = await asyncio.start_server(lambda reader, writer: api_handle(reader, writer, queue), host, port)
+        print(f"API budżetu działa: http://{host}:{port} (dane {data_file}, Ctrl+C kończy)", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+    with DataLock():
+        load_resident(data_file)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    print("API budżetu zatrzymane")
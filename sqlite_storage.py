@@ -0,0 +1,254 @@
+"""SQLite storage: tables indexed by date, category and ID, saved change by change"""
+import json
+import os
+import sys
+
+from budget_core import (LazyData, SEARCH_FIELDS, SEARCH_KEYS, STREAMED_KEYS, as_entry, load_data,
+                         profiled, search_tokens, snapshot_of)
+
+# === SQLITE STORAGE ===
+
+SQLITE_TABLES = {
+    "transactions": ("id", "date", "amount", "category", "description"),
+    "one_time_income": ("id", "date", "amount", "description"),
+    "fixed_costs": ("id", "amount", "category", "description"),
+    "recurring_income": ("id", "amount", "description"),
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date);
+
+CREATE TABLE IF NOT EXISTS one_time_income (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_one_time_income_date ON one_time_income (date);
+
+CREATE TABLE IF NOT EXISTS fixed_costs (
+    id INTEGER PRIMARY KEY,
+    amount INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS recurring_income (
+    id INTEGER PRIMARY KEY,
+    amount INTEGER NOT NULL,
+    description TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS limits (
+    month TEXT PRIMARY KEY,
+    amount INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS search_terms (
+    key TEXT NOT NULL,
+    token TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (key, token, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_terms_id ON search_terms (key, id);
+"""
+
+# PRAGMA user_version of databases whose search_terms cover all entries
+SQLITE_SEARCH_VERSION = 1
+
+def connect_sqlite(path):
+    """Open SQLite database and make sure the schema exists"""
+    import sqlite3
+
+    try:
+        # The API loads and saves in a worker thread and reads on its event loop
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.executescript(SQLITE_SCHEMA)
+    except sqlite3.DatabaseError:
+        print(f"BŁĄD: Plik {path} nie jest prawidłową bazą SQLite.")
+        print("Nie próbowano nadpisać pliku.")
+        sys.exit(1)
+    return conn
+
+def create_sqlite_data(data, path):
+    """Create new SQLite database with given data"""
+    data["_sqlite"] = connect_sqlite(path)
+    write_sqlite_snapshot(data)
+
+@profiled("read")
+def read_sqlite_data(path, months=None):
+    """Read data from SQLite database
+
+    When months is given, transactions and one-time income are read on first
+    access only - month queries go to SQL directly.
+    """
+    conn = connect_sqlite(path)
+    data = {}
+
+    for key, value in conn.execute("SELECT key, value FROM settings"):
+        data[key] = json.loads(value)
+
+    # Databases created before the grosze format have REAL columns, which SQLite
+    # keeps returning as floats even for integer values
+    as_amount = int if data.get("amount_unit") == "grosze" else float
+
+    data["limits"] = {month: as_amount(amount) for month, amount in conn.execute("SELECT month, amount FROM limits")}
+
+    lazy_keys = STREAMED_KEYS if months is not None else ()
+    for table in SQLITE_TABLES:
+        if table not in lazy_keys:
+            data[table] = read_sqlite_table(conn, table, as_amount)
+
+    if lazy_keys:
+        data = LazyData(data, lambda: {table: read_sqlite_table(conn, table, as_amount) for table in lazy_keys}, lazy_keys)
+    data["_sqlite"] = conn
+    return data
+
+def read_sqlite_table(conn, table, as_amount=int):
+    """Read all entries of a table in ID order"""
+    columns = SQLITE_TABLES[table]
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+    return [sqlite_row_to_item(columns, row, as_amount) for row in rows]
+
+def sqlite_row_to_item(columns, row, as_amount=int):
+    """Convert a database row to an entry dict"""
+    item = dict(zip(columns, row))
+    item["amount"] = as_amount(item["amount"])
+    return item
+
+def write_sqlite_snapshot(data):
+    """Replace all database contents with data"""
+    conn = data["_sqlite"]
+    with conn:
+        conn.execute("DELETE FROM settings")
+        conn.execute("DELETE FROM limits")
+        conn.execute("DELETE FROM search_terms")
+        for table in SQLITE_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+
+        for key, value in snapshot_of(data).items():
+            if key == "limits":
+                conn.executemany("INSERT INTO limits (month, amount) VALUES (?, ?)", value.items())
+            elif key in SQLITE_TABLES:
+                for item in value:
+                    sqlite_upsert(conn, key, item)
+                if key in SEARCH_KEYS:
+                    sqlite_index_terms(conn, key, value)
+            else:
+                conn.execute("INSERT INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        conn.execute(f"PRAGMA user_version = {SQLITE_SEARCH_VERSION}")
+
+def sqlite_upsert(conn, table, item):
+    """Insert or replace a single row"""
+    columns = SQLITE_TABLES[table]
+    placeholders = ", ".join("?" for _ in columns)
+    conn.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                 [item.get(column) for column in columns])
+
+def apply_sqlite_change(conn, change):
+    """Translate a change record into SQL statements"""
+    op = change["op"]
+    key = change["key"]
+
+    if op == "set" and key == "limits":
+        conn.execute("DELETE FROM limits")
+        conn.executemany("INSERT INTO limits (month, amount) VALUES (?, ?)", change["value"].items())
+    elif op == "set":
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(change["value"])))
+    elif op == "append":
+        sqlite_upsert(conn, key, change["item"])
+        if key in SEARCH_KEYS:
+            sqlite_index_terms(conn, key, [change["item"]])
+    elif op == "update" and change["fields"]:
+        assignments = ", ".join(f"{field} = ?" for field in change["fields"])
+        conn.execute(f"UPDATE {key} SET {assignments} WHERE id = ?",
+                     list(change["fields"].values()) + [change["id"]])
+        if key in SEARCH_KEYS and not SEARCH_FIELDS.isdisjoint(change["fields"]):
+            columns = SQLITE_TABLES[key]
+            rows = conn.execute(f"SELECT {', '.join(columns)} FROM {key} WHERE id = ?", (change["id"],)).fetchall()
+            conn.execute("DELETE FROM search_terms WHERE key = ? AND id = ?", (key, change["id"]))
+            sqlite_index_terms(conn, key, [sqlite_row_to_item(columns, row) for row in rows])
+    elif op == "remove":
+        conn.execute(f"DELETE FROM {key} WHERE id = ?", (change["id"],))
+        if key in SEARCH_KEYS:
+            conn.execute("DELETE FROM search_terms WHERE key = ? AND id = ?", (key, change["id"]))
+
+def sqlite_index_terms(conn, key, items):
+    """Insert search tokens of entries into search_terms"""
+    conn.executemany("INSERT OR IGNORE INTO search_terms (key, token, id) VALUES (?, ?, ?)",
+                     ((key, token, item["id"]) for item in items for token in search_tokens(item)))
+
+@profiled("search_build")
+def ensure_sqlite_search(conn):
+    """Fill search_terms of a database created before the search index"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SQLITE_SEARCH_VERSION:
+        return
+    with conn:
+        conn.execute("DELETE FROM search_terms")
+        for key in SEARCH_KEYS:
+            sqlite_index_terms(conn, key, read_sqlite_table(conn, key))
+        conn.execute(f"PRAGMA user_version = {SQLITE_SEARCH_VERSION}")
+
+def save_sqlite_data(data, path):
+    """Save data - apply pending changes as SQL or rewrite all tables"""
+    if "_sqlite" not in data:
+        data["_sqlite"] = connect_sqlite(path)
+    changes = data.pop("_changes", [])
+
+    if data.pop("_needs_snapshot", False) or not changes:
+        write_sqlite_snapshot(data)
+        return
+
+    conn = data["_sqlite"]
+    with conn:
+        for change in changes:
+            apply_sqlite_change(conn, change)
+        # Aggregates are maintained in memory, not through change records
+        if "aggregates" in data:
+            apply_sqlite_change(conn, {"op": "set", "key": "aggregates", "value": data["aggregates"]})
+
+def read_sqlite_generation(path):
+    """Get save generation stored in the settings table"""
+    conn = connect_sqlite(path)
+    try:
+        row = conn.execute("SELECT value FROM settings WHERE key = 'generation'").fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else 0
+
+def compact_sqlite_data(data, path):
+    """Rebuild SQLite database file to reclaim free space"""
+    save_sqlite_data(data, path)
+    data["_sqlite"].execute("VACUUM")
+
+def migrate_json_to_sqlite(json_path, sqlite_path):
+    """One-shot copy of JSON data file into a new SQLite database"""
+    if os.path.exists(sqlite_path):
+        print(f"BŁĄD: Baza {sqlite_path} już istnieje.")
+        print("Usuń ją ręcznie, jeśli chcesz przeprowadzić migrację ponownie.")
+        sys.exit(1)
+
+    data = load_data(json_path)
+    create_sqlite_data(data, sqlite_path)
+    data["_sqlite"].close()
+    return data
+
+def sqlite_entries_between(conn, key, start, end):
+    """Get transactions or one-time income with start <= date < end from the database in ID order"""
+    columns = SQLITE_TABLES[key]
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {key} WHERE date >= ? AND date < ? ORDER BY id",
+                        (start, end))
+    return [as_entry(key, sqlite_row_to_item(columns, row)) for row in rows]
@@ -0,0 +1,169 @@
+"""Reading entries of a JSON data file one by one, without loading the whole file"""
+import json
+import os
+import re
+import sys
+
+import budget_core
+from budget_core import (STORAGE_BACKENDS, STREAMED_KEYS, STREAM_CHUNK_SIZE, archived_years_between,
+                         as_entry, auto_apply_due, auto_apply_fixed_if_needed,
+                         auto_apply_recurring_income_if_needed, get_storage, iter_by_dates,
+                         migrate_data, profiled)
+
+# === STREAMING ===
+
+WHITESPACE = re.compile(r"\s*")
+
+def iter_json_records(path, key, sections, head_only=False):
+    """Yield entries of the top-level list key from a JSON data file without loading it whole
+
+    Entries of the other big lists are decoded one by one and dropped, all
+    remaining top-level values are stored in sections as they are read.
+    With head_only the file is read only up to the first big list.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ""
+        pos = 0
+        eof = False
+        read_size = STREAM_CHUNK_SIZE
+
+        def read_more():
+            nonlocal buf, pos, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+                return
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def next_char():
+            # Skip whitespace, refill the buffer as needed, return next char ("" at end)
+            nonlocal pos
+            while True:
+                pos = WHITESPACE.match(buf, pos).end()
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                read_more()
+
+        def expect(chars):
+            nonlocal pos
+            char = next_char()
+            if not char or char not in chars:
+                raise json.JSONDecodeError(f"Expected one of {chars!r}", buf, pos)
+            pos += 1
+            return char
+
+        def decode_value():
+            nonlocal pos, read_size
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A number at the end of the buffer may continue in the next chunk
+                    if end < len(buf) or eof:
+                        pos = end
+                        read_size = STREAM_CHUNK_SIZE
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                # Value longer than the buffer - read bigger chunks to keep retries few
+                read_more()
+                read_size *= 2
+
+        expect("{")
+        if next_char() == "}":
+            return
+        while True:
+            name = decode_value()
+            expect(":")
+            if head_only and (name in STREAMED_KEYS or name != "layout" and "layout" not in sections):
+                return
+            if name in STREAMED_KEYS and next_char() == "[":
+                # Streamed lists are never kept, sections only records they exist
+                sections[name] = []
+                pos += 1
+                if next_char() == "]":
+                    pos += 1
+                else:
+                    while True:
+                        item = decode_value()
+                        if name == key:
+                            yield item
+                        if expect(",]") == "]":
+                            break
+            else:
+                sections[name] = decode_value()
+            if expect(",}") == "}":
+                return
+
+def iter_json_data(path, key, sections):
+    """Stream entries of a list like read_json_data would return them, journal included"""
+    import journal
+
+    changes = journal.read_journal(path)
+    updates, removed, appended = journal.journal_overlay(changes, key)
+
+    try:
+        for item in iter_json_records(path, key, sections):
+            item_id = item.get("id")
+            # Entries appended again by the journal are yielded from it below
+            if item_id in removed or item_id in appended:
+                continue
+            if item_id in updates:
+                item.update(updates[item_id])
+            yield item
+    except json.JSONDecodeError:
+        print(f"BŁĄD: Plik {path} jest uszkodzony (nieprawidłowy JSON).")
+        print(f"Sprawdź składnię lub przywróć z backupu: {path}.bak")
+        print("Nie próbowano nadpisać pliku.")
+        sys.exit(1)
+    yield from appended.values()
+
+    for change in changes:
+        if change["op"] == "set":
+            sections[change["key"]] = change["value"]
+
+def stream_is_current(sections):
+    """Check streamed data needs no migration or auto-apply, which require a full load
+
+    Prints the same notices load_data would print for config-only auto-apply checks.
+    """
+    # Invalid structure and old formats are reported or migrated by load_data
+    if "transactions" not in sections or "fixed_costs" not in sections or sections.get("amount_unit") != "grosze":
+        return False
+    probe = dict(sections)
+    if migrate_data(probe):
+        return False
+
+    if auto_apply_due(probe):
+        return False
+
+    # Nothing to add - only the "nothing to apply" notices are printed
+    auto_apply_fixed_if_needed(probe)
+    auto_apply_recurring_income_if_needed(probe)
+    return True
+
+@profiled("stream")
+def stream_query(path, key, start, end, reduce):
+    """Run reduce over entries with start <= date < end streamed from a JSON data file
+
+    Returns None when the file cannot be streamed (other backend, missing
+    file, data held in memory by a daemon or batch, pending migration/auto-apply)
+    and the caller must use load_data.
+    """
+    if get_storage(path) is not STORAGE_BACKENDS["json"] or not os.path.exists(path):
+        return None
+    if budget_core.RESIDENT is not None or budget_core.BATCH is not None:
+        return None
+    sections = {}
+    try:
+        result = reduce(as_entry(key, item) for item in iter_by_dates(iter_json_data(path, key, sections), start, end))
+    except (ValueError, TypeError):
+        # Invalid entries are reported by load_data
+        return None
+    # Archived years are read by get_entries_between after a normal load
+    if not stream_is_current(sections) or archived_years_between(sections, start, end):
+        return None
+    return result
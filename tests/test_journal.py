@@ -0,0 +1,50 @@
+"""Change journal: records written by a batch replay to the same data"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_PY = str(ROOT / "budget.py")
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        (Path(self.workdir.name) / "data").mkdir()
+        self.data_file = Path(self.workdir.name) / "data" / "data.json"
+        self.env = dict(os.environ, BUDGET_JOURNAL="1")
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def budget(self, *args, stdin=None):
+        """Run budget.py in the work directory, return its output"""
+        result = subprocess.run([sys.executable, BUDGET_PY] + list(args), cwd=self.workdir.name, env=self.env,
+                                input=stdin, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return result.stdout
+
+    def test_verify_aggregates_then_add_in_batch(self):
+        self.budget("add", "--amount", "10", "--category", "Jedzenie", "--description", "Zakupy")
+        self.budget("compact")
+        # Drift the stored sums so verify-aggregates rebuilds them
+        data = json.loads(self.data_file.read_text(encoding="utf-8"))
+        data["aggregates"]["expenses"] = 500
+        self.data_file.write_text(json.dumps(data), encoding="utf-8")
+
+        self.budget("batch", stdin="verify-aggregates\nadd --amount 5 --category Jedzenie --description Bilet\n")
+        records = [json.loads(line) for line in (Path(str(self.data_file) + ".journal")
+                                                 .read_text(encoding="utf-8").splitlines())]
+        rebuilt = next(record for record in records if record["key"] == "aggregates")
+        self.assertEqual(rebuilt["value"]["expenses"], 1000)
+
+        self.assertIn("Sumy są zgodne", self.budget("verify-aggregates"))
+        self.budget("compact")
+        data = json.loads(self.data_file.read_text(encoding="utf-8"))
+        self.assertEqual(data["aggregates"]["expenses"], 1500)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Config-only commands read the small sections, not the whole history"""
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.generate import generate_data, write_data
+from benchmarks.startup import BUDGET_PY, paired_ms
+
+TRANSACTIONS = 200000
+
+# Wall clock of a command on a file with TRANSACTIONS entries, fastest of the paired runs
+BOUND_MS = 50
+
+COMMANDS = [
+    ["limits"],
+    ["fixed-list"],
+    ["recurring-list"],
+    ["status"],
+]
+
+class LazyLoadTest(unittest.TestCase):
+    def test_config_commands_on_long_history(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            write_data(generate_data(TRANSACTIONS), Path(workdir) / "data" / "data.json")
+            # Fixed costs and income of the current month are added and saved once, untimed
+            subprocess.run([sys.executable, BUDGET_PY, "status"], cwd=workdir, capture_output=True, check=True)
+            for command in COMMANDS:
+                with self.subTest(command=" ".join(command)):
+                    elapsed, _ = paired_ms(workdir, [BUDGET_PY] + command)
+                    self.assertLess(min(elapsed), BOUND_MS)
+
+if __name__ == "__main__":
+    unittest.main()
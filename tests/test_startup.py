@@ -0,0 +1,19 @@
+"""Startup of the everyday commands: overhead over the interpreter and deferred imports"""
+import tempfile
+import unittest
+
+from benchmarks.startup import COMMANDS, TARGET_MS, imported_modules, measure_command, prepare_workdir
+
+class StartupTest(unittest.TestCase):
+    def test_commands_start_within_target(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            prepare_workdir(workdir)
+            baseline_modules = imported_modules(workdir, ["-c", "pass"])
+            for command in COMMANDS:
+                with self.subTest(command=" ".join(command)):
+                    result = measure_command(workdir, command, baseline_modules)
+                    self.assertEqual(result["leaked"], [])
+                    self.assertLess(result["overhead"], TARGET_MS)
+
+if __name__ == "__main__":
+    unittest.main()
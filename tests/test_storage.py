@@ -0,0 +1,46 @@
+"""Storage backends: the same commands list the same entries in the same order"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_PY = str(ROOT / "budget.py")
+
+BACKENDS = {"json": [], "sqlite": ["migrate-sqlite"], "partitioned": ["migrate-partitioned"],
+            "binary": ["migrate-binary"]}
+
+class StorageOrderTest(unittest.TestCase):
+    def budget(self, workdir, *args):
+        """Run budget.py in workdir, return its output"""
+        result = subprocess.run([sys.executable, BUDGET_PY] + list(args), cwd=workdir, env=dict(os.environ),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return result.stdout
+
+    def listing(self, migrate):
+        """Add, back-date and move entries on a backend, return the listings"""
+        with tempfile.TemporaryDirectory() as workdir:
+            (Path(workdir) / "data").mkdir()
+            if migrate:
+                self.budget(workdir, *migrate)
+            self.budget(workdir, "add", "--amount", "10", "--category", "Jedzenie", "--description", "Pierwsza",
+                        "--date", "2026-03-10")
+            self.budget(workdir, "add", "--amount", "20", "--category", "Jedzenie", "--description", "Druga",
+                        "--date", "2026-03-12")
+            self.budget(workdir, "add", "--amount", "30", "--category", "Transport", "--description", "Wstecz",
+                        "--date", "2026-02-05")
+            self.budget(workdir, "edit", "1", "--date", "2026-01-20")
+            return [self.budget(workdir, "transactions", "--from", "2026-01-01", "--to", "2026-03-31"),
+                    self.budget(workdir, "search", "jedzenie")]
+
+    def test_backends_keep_id_order(self):
+        expected = self.listing(BACKENDS["json"])
+        for name, migrate in BACKENDS.items():
+            with self.subTest(storage=name):
+                self.assertEqual(self.listing(migrate), expected)
+
+if __name__ == "__main__":
+    unittest.main()
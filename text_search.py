@@ -0,0 +1,243 @@
+"""Full-text search: the token index of entries, its saved file and the search command"""
+import json
+import os
+
+from budget_core import (JOURNAL_COMPACT_SIZE, ProfilePhase, SEARCH_FIELDS, SEARCH_KEYS,
+                         STORAGE_BACKENDS, archived_between, as_entry, calculate_total, find_item,
+                         format_one_time_income_list, format_transactions_list, get_storage,
+                         has_pending_changes, journal_path, profiled, search_path, search_tokens,
+                         sqlite_for_query, to_pln, write_atomic)
+
+# === SEARCH INDEX ===
+
+def get_search_index(data, key):
+    """Get token -> set of IDs index of a list, build it on first use"""
+    indexes = data.setdefault("_search_index", {})
+    if key not in indexes:
+        index = {}
+        for item in data[key]:
+            if item is not None:
+                for token in search_tokens(item):
+                    index.setdefault(token, set()).add(item["id"])
+        indexes[key] = index
+    return indexes[key]
+
+def search_records(data, changes):
+    """Get {"key", "id", "tokens"} records with the tokens entries touched by changes have now"""
+    records = []
+    for change in changes:
+        key = change["key"]
+        if key not in SEARCH_KEYS:
+            continue
+        if change["op"] == "append":
+            # The appended dict is the entry itself, so it also reflects later edits
+            item = change["item"]
+            item_id = item["id"]
+        elif change["op"] == "update" and not SEARCH_FIELDS.isdisjoint(change["fields"]):
+            item_id = change["id"]
+            item = find_item(data, key, item_id)
+        elif change["op"] == "remove":
+            item_id = change["id"]
+            item = None
+        else:
+            continue
+        records.append({"key": key, "id": item_id, "tokens": sorted(search_tokens(item)) if item else []})
+    return records
+
+def apply_search_records(indexes, records):
+    """Replace tokens of the recorded entries in indexes, the last record of an entry wins"""
+    for key in SEARCH_KEYS:
+        changed = {record["id"]: record["tokens"] for record in records if record["key"] == key}
+        if not changed:
+            continue
+        index = indexes.setdefault(key, {})
+        stale = set(changed)
+        for token in list(index):
+            index[token] -= stale
+            if not index[token]:
+                del index[token]
+        for item_id, tokens in changed.items():
+            for token in tokens:
+                index.setdefault(token, set()).add(item_id)
+
+@profiled("search_read")
+def read_search_file(path, generation):
+    """Read the saved search index and its log, None when missing, damaged or behind the data"""
+    spath = search_path(path)
+    try:
+        with open(spath, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        records = []
+        if os.path.exists(journal_path(spath)):
+            with open(journal_path(spath), 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+    except (OSError, json.JSONDecodeError):
+        # The index is derived from the data, so any problem just means a rebuild
+        return None
+
+    # Each save logs its entries followed by the generations it moved the data between
+    current = stored.get("generation")
+    applied, pending = [], []
+    for record in records:
+        if "generation" not in record:
+            pending.append(record)
+        elif record["previous"] != current:
+            return None
+        else:
+            current = record["generation"]
+            applied += pending
+            pending = []
+    if current != generation:
+        return None
+
+    indexes = {key: {token: set(ids) for token, ids in stored.get(key, {}).items()} for key in SEARCH_KEYS}
+    apply_search_records(indexes, applied)
+    return indexes
+
+@profiled("search_write")
+def write_search_file(data, path):
+    """Write the whole search index of data with the generation it matches, drop its log"""
+    stored = {"generation": data.get("generation", 0)}
+    for key in SEARCH_KEYS:
+        stored[key] = {token: sorted(ids) for token, ids in data["_search_index"].get(key, {}).items()}
+    content = json.dumps(stored, separators=(",", ":")).encode('utf-8')
+    write_atomic(search_path(path), lambda f: f.write(content))
+    log = journal_path(search_path(path))
+    if os.path.exists(log):
+        os.unlink(log)
+
+def log_saved_changes(data, path, changes):
+    """Log entries touched by a save for the saved search index"""
+    spath = search_path(path)
+    if any(change["op"] == "set" and change["key"] in SEARCH_KEYS for change in changes):
+        # Whole lists were replaced (archive), the next search builds the index again
+        os.unlink(spath)
+        if os.path.exists(journal_path(spath)):
+            os.unlink(journal_path(spath))
+        return
+    generation = data.get("generation", 0)
+    records = search_records(data, changes) + [{"generation": generation, "previous": generation - 1}]
+    try:
+        with open(journal_path(spath), 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+    except OSError:
+        # A missing save breaks the generation chain and the index is rebuilt on next search
+        pass
+
+def load_search_index(data, path):
+    """Get search indexes of data - kept in memory, read from the saved index or built and saved"""
+    if "_search_index" in data:
+        return data["_search_index"]
+
+    # SQLite keeps its own index in the database, partial data would give an incomplete index
+    persist = get_storage(path) is not STORAGE_BACKENDS["sqlite"] and data.get("_loaded_months") is None
+    indexes = read_search_file(path, data.get("generation", 0)) if persist else None
+    if indexes is not None:
+        # Changes not saved yet are not in the saved index
+        apply_search_records(indexes, search_records(data, data.get("_changes", [])))
+        data["_search_index"] = indexes
+        log = journal_path(search_path(path))
+        if os.path.exists(log) and os.path.getsize(log) > JOURNAL_COMPACT_SIZE and not has_pending_changes(data):
+            write_search_file(data, path)
+        return indexes
+
+    with ProfilePhase("search_build"):
+        for key in SEARCH_KEYS:
+            get_search_index(data, key)
+    if persist and not has_pending_changes(data):
+        write_search_file(data, path)
+    return data["_search_index"]
+
+# === SEARCH ===
+
+def match_search(index, groups):
+    """Get IDs of entries matching any group, a group matches entries having all its words"""
+    found = set()
+    for group in groups:
+        postings = []
+        for word in group:
+            if word.endswith("*"):
+                prefix = word[:-1]
+                postings.append(set().union(*(ids for token, ids in index.items() if token.startswith(prefix))))
+            else:
+                postings.append(index.get(word, set()))
+        # Intersect starting from the rarest word
+        postings.sort(key=len)
+        found |= postings[0].intersection(*postings[1:])
+    return found
+
+def sqlite_search(conn, key, groups, start, end, min_amount, max_amount):
+    """Get entries matching the search groups, dates and amounts from SQLite, in ID order"""
+    import sqlite_storage
+
+    sqlite_storage.ensure_sqlite_search(conn)
+    selects, params = [], []
+    for group in groups:
+        words = []
+        for word in group:
+            if word.endswith("*"):
+                # Tokens are lowercase letters and digits, which all sort before "~"
+                words.append("SELECT id FROM search_terms WHERE key = ? AND token >= ? AND token < ?")
+                params += [key, word[:-1], word[:-1] + "~"]
+            else:
+                words.append("SELECT id FROM search_terms WHERE key = ? AND token = ?")
+                params += [key, word]
+        # Compound selects have no precedence, so each group is a subquery of its own
+        selects.append(f"SELECT id FROM ({' INTERSECT '.join(words)})")
+
+    query = f"WHERE id IN ({' UNION '.join(selects)}) AND date >= ? AND date < ?"
+    params += [start, end]
+    if min_amount is not None:
+        query += " AND amount >= ?"
+        params.append(min_amount)
+    if max_amount is not None:
+        query += " AND amount <= ?"
+        params.append(max_amount)
+
+    columns = sqlite_storage.SQLITE_TABLES[key]
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {key} {query} ORDER BY id", params)
+    return [as_entry(key, sqlite_storage.sqlite_row_to_item(columns, row)) for row in rows]
+
+@profiled("search")
+def search_entries(data, path, key, groups, start, end, min_amount=None, max_amount=None):
+    """Get transactions or one-time income matching the search with start <= date < end, in ID order"""
+    conn = sqlite_for_query(data)
+    if conn is not None:
+        found = sqlite_search(conn, key, groups, start, end, min_amount, max_amount)
+    else:
+        found = []
+        for item_id in sorted(match_search(load_search_index(data, path).get(key, {}), groups)):
+            item = find_item(data, key, item_id)
+            # Entries of partitions that were not loaded are outside the period anyway
+            if item is not None and start <= item["date"] < end and in_amount_range(item, min_amount, max_amount):
+                found.append(item)
+
+    # Archived years are not indexed, their entries are matched one by one
+    archived = [item for item in archived_between(data, key, start, end)
+                if in_amount_range(item, min_amount, max_amount) and search_matches(search_tokens(item), groups)]
+    if archived:
+        found = sorted(found + archived, key=lambda item: item["id"])
+    return found
+
+def in_amount_range(item, min_amount, max_amount):
+    """Check an entry's amount is within optional bounds"""
+    return (min_amount is None or item["amount"] >= min_amount) and (max_amount is None or item["amount"] <= max_amount)
+
+def search_matches(tokens, groups):
+    """Check an entry's tokens match any search group"""
+    return any(all(any(token.startswith(word[:-1]) for token in tokens) if word.endswith("*") else word in tokens
+                   for word in group)
+               for group in groups)
+
+def format_search_results(transactions, income):
+    """Format found expenses and one-time income with their counts and sums"""
+    sections = []
+    if transactions:
+        sections.append(format_transactions_list(transactions) + "\n" +
+                        f"Znalezione wydatki: {len(transactions)}, razem {to_pln(calculate_total(transactions)):.2f} PLN")
+    if income:
+        sections.append(format_one_time_income_list(income) + "\n" +
+                        f"Znalezione przychody: {len(income)}, razem {to_pln(calculate_total(income)):.2f} PLN")
+    if not sections:
+        return "Nie znaleziono pasujących wpisów"
+    return "\n\n".join(sections)